@@ -3,6 +3,8 @@ import React, { useEffect, useMemo, useState } from "react";
 import axios from "axios";
 import API_BASE_URL from "../api";
 import { useGlobal } from "../GlobalContext";
+import TrabajadorTypeahead from "./TrabajadorTypeahead";
+import { fetchKeysetPage } from "../keysetPage";
 
 function useAuthAxios() {
   const token = localStorage.getItem("token");
@@ -68,11 +70,12 @@ export default function CTSCalculadaComponent() {
 
   // listas
   const [ctsList, setCtsList] = useState([]);
+  const [ctsNext, setCtsNext] = useState(null); // cursor de la página siguiente
   const [conceptosList, setConceptosList] = useState([]);
 
   // combos
   const [periodos, setPeriodos] = useState([]);
-  const [trabajadores, setTrabajadores] = useState([]);
+  const [trabajadorNombre, setTrabajadorNombre] = useState(""); // trabajadores: autocompletado en TrabajadorTypeahead
   const [bancos, setBancos] = useState([]);
   const [monedas, setMonedas] = useState([]);
   const [situaciones, setSituaciones] = useState([]);
@@ -128,19 +131,17 @@ export default function CTSCalculadaComponent() {
 
   // ------ Combos ------
   const loadCombos = async () => {
-    if (!empresaId) { setPeriodos([]); setTrabajadores([]); }
+    if (!empresaId) { setPeriodos([]); }
     try {
       setLoading(true);
-      const [p, t, b, m, s, c] = await Promise.all([
+      const [p, b, m, s, c] = await Promise.all([
         empresaId ? auth.get(`/cts-calculada-combos/periodocts/?empresaId=${empresaId}`) : Promise.resolve({ data: [] }),
-        empresaId ? auth.get(`/cts-calculada-combos/trabajador/?empresaId=${empresaId}`) : Promise.resolve({ data: [] }),
         auth.get(`/cts-calculada-combos/banco/`),
         auth.get(`/cts-calculada-combos/moneda/`),
         auth.get(`/cts-calculada-combos/situacion/`),
         auth.get(`/cts-calculada-combos/concepto-planilla/`),
       ]);
       setPeriodos(p.data || []);
-      setTrabajadores(t.data || []);
       setBancos(b.data || []);
       setMonedas(m.data || []);
       setSituaciones(s.data || []);
@@ -154,11 +155,15 @@ export default function CTSCalculadaComponent() {
   };
 
   // ------ Listas ------
-  const loadHeader = async () => {
+  // por páginas (keyset); more = agregar la página siguiente a la lista
+  const loadHeader = async (more = false) => {
     try {
       setLoading(true);
-      const res = await auth.get(`/cts-calculada/${empresaId ? `?empresaId=${empresaId}` : ""}`);
-      setCtsList(res.data || []);
+      const { items, next } = await fetchKeysetPage(
+        auth, `/cts-calculada/`, { empresaId: empresaId || undefined }, more ? ctsNext : null
+      );
+      setCtsList((prev) => (more ? [...prev, ...items] : items));
+      setCtsNext(next);
     } catch (err) {
       console.error(err);
       alert("No se pudo listar CTS Calculada.");
@@ -186,6 +191,7 @@ export default function CTSCalculadaComponent() {
     loadCombos();
     loadHeader();
     setFormHeader(emptyHeader);
+    setTrabajadorNombre("");
     setFormDetail(emptyDetail);
     setConceptosList([]);
     setActiveTab("cts");
@@ -206,6 +212,7 @@ export default function CTSCalculadaComponent() {
 
   const onHeaderNew = () => {
     setFormHeader(emptyHeader);
+    setTrabajadorNombre("");
     setFormDetail(emptyDetail);
     setConceptosList([]);
     setActiveTab("cts");
@@ -241,6 +248,7 @@ export default function CTSCalculadaComponent() {
       DiasIntereses: row.DiasIntereses ?? "",
       PKIDSituacionRegistro: row.PKIDSituacionRegistro ?? "",
     });
+    setTrabajadorNombre(row.Trabajador || "");
     setFormDetail((d) => ({ ...d, PKIDCTSCalculada: row.PKID }));
   };
 
@@ -363,9 +371,7 @@ export default function CTSCalculadaComponent() {
   const selectedPeriodo = selectedRow ? periodoLabel({ Ano: selectedRow.Ano, Mes: selectedRow.Mes }) : (
     (formHeader.PKIDPeriodoCTS && periodoLabel(periodos.find(p=>Number(p.PKID)===Number(formHeader.PKIDPeriodoCTS)))) || ""
   );
-  const selectedTrabajador =
-    selectedRow?.Trabajador ||
-    (formHeader.PKIDTrabajador && (trabajadores.find(t=>Number(t.PKID)===Number(formHeader.PKIDTrabajador))?.NombreCompleto || ""));
+  const selectedTrabajador = trabajadorNombre;
 
   const tabs = [
     { id: "cts", title: "CTS Calculada" },
@@ -414,12 +420,16 @@ export default function CTSCalculadaComponent() {
               </div>
               <div>
                 <label style={label}>Trabajador *</label>
-                <select name="PKIDTrabajador" value={formHeader.PKIDTrabajador} onChange={onHeaderChange} style={input}>
-                  <option value="">-- Seleccionar --</option>
-                  {trabajadores.map((t) => (
-                    <option key={t.PKID} value={t.PKID}>{t.NombreCompleto}</option>
-                  ))}
-                </select>
+                <TrabajadorTypeahead
+                  empresaId={empresaId}
+                  value={formHeader.PKIDTrabajador}
+                  label={trabajadorNombre}
+                  onSelect={(t) => {
+                    setFormHeader((f) => ({ ...f, PKIDTrabajador: t ? t.PKID : "" }));
+                    setTrabajadorNombre(t ? t.NombreCompleto : "");
+                  }}
+                  style={input}
+                />
               </div>
               <div>
                 <label style={label}>Banco *</label>
@@ -644,7 +654,7 @@ export default function CTSCalculadaComponent() {
         <div style={card}>
           <div style={{ display: "flex", justifyContent: "space-between", marginBottom: 8 }}>
             <strong>Registros CTS</strong>
-            <span style={{ fontSize: 12, color: "#6b7280" }}>Total: {ctsList.length}</span>
+            <span style={{ fontSize: 12, color: "#6b7280" }}>Mostrando: {ctsList.length}{ctsNext ? "+" : ""}</span>
           </div>
           <div style={{ overflowX: "auto" }}>
             <table style={{ width: "100%", borderCollapse: "collapse", fontSize: 13 }}>
@@ -688,6 +698,13 @@ export default function CTSCalculadaComponent() {
               </tbody>
             </table>
           </div>
+          {ctsNext && (
+            <div style={{ textAlign: "center", marginTop: 8 }}>
+              <button onClick={() => loadHeader(true)} disabled={loading} style={{ ...btn.base, ...btn.neutral }}>
+                Cargar más
+              </button>
+            </div>
+          )}
         </div>
       )}
 
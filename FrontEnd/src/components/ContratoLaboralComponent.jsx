@@ -3,6 +3,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import axios from "axios";
 import API_BASE_URL from "../api";
 import { useGlobal } from "../GlobalContext";
+import TrabajadorTypeahead from "./TrabajadorTypeahead";
 
 function useAuthAxios() {
   const token = localStorage.getItem("token");
@@ -83,8 +84,7 @@ export default function ContratoLaboralComponent() {
   const [contratos, setContratos] = useState([]);
   const [adendas, setAdendas] = useState([]);
 
-  // combos
-  const [trabajadores, setTrabajadores] = useState([]);
+  // combos (trabajadores: autocompletado en TrabajadorTypeahead)
   const [cargos, setCargos] = useState([]);
   const [modelos, setModelos] = useState([]);
   const [situaciones, setSituaciones] = useState([]);
@@ -132,7 +132,6 @@ export default function ContratoLaboralComponent() {
   // --------- cargar combos ----------
   const loadCombos = async () => {
     if (!empresaId) {
-      setTrabajadores([]);
       setCargos([]);
       setModelos([]);
       setSituaciones([]);
@@ -140,13 +139,11 @@ export default function ContratoLaboralComponent() {
     }
     try {
       setLoading(true);
-      const [trab, cargo, modelo, sit] = await Promise.all([
-        auth.get(`/contrato-laboral-combos/trabajador/?empresaId=${empresaId}`),
+      const [cargo, modelo, sit] = await Promise.all([
         auth.get(`/contrato-laboral-combos/cargo-empresa/?empresaId=${empresaId}`),
         auth.get(`/contrato-laboral-combos/modelo-contrato/`),
         auth.get(`/contrato-laboral-combos/situacion/`),
       ]);
-      setTrabajadores(trab.data || []);
       setCargos(cargo.data || []);
       setModelos(modelo.data || []);
       setSituaciones(sit.data || []);
@@ -213,14 +210,6 @@ export default function ContratoLaboralComponent() {
     }
   }, [activeTab, formContrato.PKID, formAdenda.PKIDContratoLaboral]);
 
-  // efecto: si cambia el trabajador en el form, mantener el nombre mostrado
-  useEffect(() => {
-    if (formContrato.PKIDTrabajador) {
-      const found = trabajadores.find((t) => Number(t.PKID) === Number(formContrato.PKIDTrabajador));
-      if (found) setSelectedTrabajadorName(found.NombreCompleto);
-    }
-  }, [formContrato.PKIDTrabajador, trabajadores]);
-
   // ---------- handlers contrato ----------
   const handleContratoChange = (e) => {
     const { name, value } = e.target;
@@ -300,8 +289,6 @@ export default function ContratoLaboralComponent() {
           await loadContratos();
           setFormContrato((f) => ({ ...f, PKID: newId }));
           setFormAdenda((f) => ({ ...f, PKIDContratoLaboral: newId }));
-          const found = trabajadores.find((t) => Number(t.PKID) === Number(formContrato.PKIDTrabajador));
-          if (found) setSelectedTrabajadorName(found.NombreCompleto);
         }
       }
       await loadContratos();
@@ -392,12 +379,7 @@ export default function ContratoLaboralComponent() {
   };
 
   // UI helpers para mostrar IDContratoLaboral en pestaña y header
-  const workerName =
-    selectedTrabajadorName ||
-    (formContrato.PKIDTrabajador
-      ? trabajadores.find((t) => Number(t.PKID) === Number(formContrato.PKIDTrabajador))?.NombreCompleto
-      : "") ||
-    "";
+  const workerName = selectedTrabajadorName || "";
 
   const selectedContratoPk = formContrato.PKID || formAdenda.PKIDContratoLaboral;
   const selectedContratoRow = selectedContratoPk
@@ -465,14 +447,16 @@ export default function ContratoLaboralComponent() {
               </div>
               <div>
                 <label style={label}>Trabajador *</label>
-                <select name="PKIDTrabajador" value={formContrato.PKIDTrabajador} onChange={handleContratoChange} style={input}>
-                  <option value="">-- Seleccionar --</option>
-                  {trabajadores.map((t) => (
-                    <option key={t.PKID} value={t.PKID}>
-                      {t.NombreCompleto}
-                    </option>
-                  ))}
-                </select>
+                <TrabajadorTypeahead
+                  empresaId={empresaId}
+                  value={formContrato.PKIDTrabajador}
+                  label={selectedTrabajadorName}
+                  onSelect={(t) => {
+                    setFormContrato((f) => ({ ...f, PKIDTrabajador: t ? t.PKID : "" }));
+                    setSelectedTrabajadorName(t ? t.NombreCompleto : "");
+                  }}
+                  style={input}
+                />
               </div>
               <div>
                 <label style={label}>Cargo empresa *</label>
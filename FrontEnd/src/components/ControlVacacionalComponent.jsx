@@ -3,6 +3,8 @@ import React, { useEffect, useMemo, useState } from "react";
 import axios from "axios";
 import API_BASE_URL from "../api";
 import { useGlobal } from "../GlobalContext";
+import TrabajadorTypeahead from "./TrabajadorTypeahead";
+import { fetchKeysetPage } from "../keysetPage";
 
 function useAuthAxios() {
   const token = localStorage.getItem("token");
@@ -67,9 +69,10 @@ export default function ControlVacacionalComponent() {
   const [activeTab, setActiveTab] = useState("control");
 
   const [controles, setControles] = useState([]);
+  const [controlesNext, setControlesNext] = useState(null); // cursor de la página siguiente
   const [periodos, setPeriodos] = useState([]);
 
-  const [trabajadores, setTrabajadores] = useState([]);
+  const [trabajadorNombre, setTrabajadorNombre] = useState("");
   const [situaciones, setSituaciones] = useState([]);
 
   const emptyCab = {
@@ -120,14 +123,11 @@ export default function ControlVacacionalComponent() {
 
   // ------- Combos -------
   const loadCombos = async () => {
-    if (!empresaId) { setTrabajadores([]); setSituaciones([]); return; }
+    if (!empresaId) { setSituaciones([]); return; }
     try {
       setLoading(true);
-      const [t, s] = await Promise.all([
-        auth.get(`/control-vacacional-combos/trabajador/?empresaId=${empresaId}`),
-        auth.get(`/control-vacacional-combos/situacion/`),
-      ]);
-      setTrabajadores(t.data || []);
+      // trabajadores: autocompletado en TrabajadorTypeahead
+      const s = await auth.get(`/control-vacacional-combos/situacion/`);
       setSituaciones(s.data || []);
     } catch (err) {
       console.error(err);
@@ -138,12 +138,16 @@ export default function ControlVacacionalComponent() {
   };
 
   // ------- Listas -------
-  const loadCab = async () => {
-    if (!empresaId) { setControles([]); return; }
+  // por páginas (keyset); more = agregar la página siguiente a la lista
+  const loadCab = async (more = false) => {
+    if (!empresaId) { setControles([]); setControlesNext(null); return; }
     try {
       setLoading(true);
-      const res = await auth.get(`/control-vacacional/?empresaId=${empresaId}`);
-      setControles(res.data || []);
+      const { items, next } = await fetchKeysetPage(
+        auth, `/control-vacacional/`, { empresaId }, more ? controlesNext : null
+      );
+      setControles((prev) => (more ? [...prev, ...items] : items));
+      setControlesNext(next);
     } catch (err) {
       console.error(err);
       alert("No se pudo listar Control Vacacional.");
@@ -171,6 +175,7 @@ export default function ControlVacacionalComponent() {
     loadCombos();
     loadCab();
     setFormCab(emptyCab);
+    setTrabajadorNombre("");
     setFormDet(emptyDet);
     setPeriodos([]);
     setActiveTab("control");
@@ -191,6 +196,7 @@ export default function ControlVacacionalComponent() {
 
   const handleCabNew = () => {
     setFormCab(emptyCab);
+    setTrabajadorNombre("");
     setFormDet(emptyDet);
     setPeriodos([]);
     setActiveTab("control");
@@ -210,6 +216,7 @@ export default function ControlVacacionalComponent() {
       PKIDSituacionRegistro: row.PKIDSituacionRegistro ?? "",
       FechaCese: row.FechaCese ?? "",
     });
+    setTrabajadorNombre(row.Trabajador || "");
     setFormDet((d) => ({ ...d, PKIDControlVacacional: row.PKID }));
   };
 
@@ -341,9 +348,6 @@ export default function ControlVacacionalComponent() {
   };
 
   // ------- UI helpers -------
-  const trabajadorSel = trabajadores.find((t) => Number(t.PKID) === Number(formCab.PKIDTrabajador));
-  const trabajadorNombre = trabajadorSel?.NombreCompleto || "";
-
   const tabs = [
     { id: "control", title: "Control" },
     { id: "periodos", title: trabajadorNombre ? `Periodos – ${trabajadorNombre} – ${formCab.Ano || "-"} / ${formCab.Mes || "-"}` : "Periodos" },
@@ -386,12 +390,16 @@ export default function ControlVacacionalComponent() {
               </div>
               <div>
                 <label style={label}>Trabajador *</label>
-                <select name="PKIDTrabajador" value={formCab.PKIDTrabajador} onChange={handleCabChange} style={input}>
-                  <option value="">-- Seleccionar --</option>
-                  {trabajadores.map((t) => (
-                    <option key={t.PKID} value={t.PKID}>{t.NombreCompleto}</option>
-                  ))}
-                </select>
+                <TrabajadorTypeahead
+                  empresaId={empresaId}
+                  value={formCab.PKIDTrabajador}
+                  label={trabajadorNombre}
+                  onSelect={(t) => {
+                    setFormCab((f) => ({ ...f, PKIDTrabajador: t ? t.PKID : "" }));
+                    setTrabajadorNombre(t ? t.NombreCompleto : "");
+                  }}
+                  style={input}
+                />
               </div>
               <div>
                 <label style={label}>Año *</label>
@@ -590,7 +598,7 @@ export default function ControlVacacionalComponent() {
         <div style={card}>
           <div style={{ display: "flex", justifyContent: "space-between", marginBottom: 8 }}>
             <strong>Controles</strong>
-            <span style={{ fontSize: 12, color: "#6b7280" }}>Total: {controles.length}</span>
+            <span style={{ fontSize: 12, color: "#6b7280" }}>Mostrando: {controles.length}{controlesNext ? "+" : ""}</span>
           </div>
           <div style={{ overflowX: "auto" }}>
             <table style={{ width: "100%", borderCollapse: "collapse", fontSize: 13 }}>
@@ -632,6 +640,13 @@ export default function ControlVacacionalComponent() {
               </tbody>
             </table>
           </div>
+          {controlesNext && (
+            <div style={{ textAlign: "center", marginTop: 8 }}>
+              <button onClick={() => loadCab(true)} disabled={loading} style={{ ...btn.base, ...btn.neutral }}>
+                Cargar más
+              </button>
+            </div>
+          )}
         </div>
       )}
 
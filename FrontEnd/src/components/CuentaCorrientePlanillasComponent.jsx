@@ -3,6 +3,8 @@ import React, { useEffect, useMemo, useState } from "react";
 import axios from "axios";
 import API_BASE_URL from "../api";
 import { useGlobal } from "../GlobalContext";
+import TrabajadorTypeahead from "./TrabajadorTypeahead";
+import { fetchKeysetPage } from "../keysetPage";
 
 function useAuthAxios() {
   const token = localStorage.getItem("token");
@@ -121,11 +123,12 @@ export default function CuentaCorrientePlanillasComponent() {
 
   // listas
   const [ccList, setCcList] = useState([]);
+  const [ccNext, setCcNext] = useState(null); // cursor de la página siguiente
   const [apList, setApList] = useState([]);
   const [cuotasList, setCuotasList] = useState([]);
 
   // combos
-  const [trabajadores, setTrabajadores] = useState([]);
+  const [trabajadorNombre, setTrabajadorNombre] = useState(""); // trabajadores: autocompletado en TrabajadorTypeahead
   const [monedas, setMonedas] = useState([]);
   const [situaciones, setSituaciones] = useState([]);
   const [conceptos, setConceptos] = useState([]);
@@ -196,8 +199,7 @@ export default function CuentaCorrientePlanillasComponent() {
   const loadCombos = async () => {
     try {
       setLoading(true);
-      const [t, m, s, cp, cc, tc, tp, n] = await Promise.all([
-        empresaId ? auth.get(`/ccp-combos/trabajador/?empresaId=${empresaId}`) : Promise.resolve({ data: [] }),
+      const [m, s, cp, cc, tc, tp, n] = await Promise.all([
         auth.get(`/ccp-combos/moneda/`),
         auth.get(`/ccp-combos/situacion/`),
         auth.get(`/ccp-combos/concepto-planilla/`),
@@ -206,7 +208,6 @@ export default function CuentaCorrientePlanillasComponent() {
         auth.get(`/ccp-combos/tipo-planilla/`),
         auth.get(`/ccp-combos/nomina/`),
       ]);
-      setTrabajadores(t.data || []);
       setMonedas(m.data || []);
       setSituaciones(s.data || []);
       setConceptos(cp.data || []);
@@ -223,12 +224,16 @@ export default function CuentaCorrientePlanillasComponent() {
   };
 
   // Listas
-  const loadCab = async () => {
+  // por páginas (keyset); more = agregar la página siguiente a la lista
+  const loadCab = async (more = false) => {
     try {
       setLoading(true);
     // Nota: no hace falta normalizar aquí; solo normalizamos al cargar en los inputs.
-      const res = await auth.get(`/cuenta-corriente-planillas/${empresaId ? `?empresaId=${empresaId}` : ""}`);
-      setCcList(res.data || []);
+      const { items, next } = await fetchKeysetPage(
+        auth, `/cuenta-corriente-planillas/`, { empresaId: empresaId || undefined }, more ? ccNext : null
+      );
+      setCcList((prev) => (more ? [...prev, ...items] : items));
+      setCcNext(next);
     } catch (err) {
       console.error(err);
       alert("No se pudo listar Cuenta Corriente.");
@@ -276,6 +281,7 @@ export default function CuentaCorrientePlanillasComponent() {
     loadCombos();
     loadCab();
     setFormCab(emptyCab);
+    setTrabajadorNombre("");
     setFormAp(emptyAp);
     setFormCuota(emptyCuota);
     setApList([]);
@@ -300,6 +306,7 @@ export default function CuentaCorrientePlanillasComponent() {
 
   const onCabNew = () => {
     setFormCab(emptyCab);
+    setTrabajadorNombre("");
     setFormAp((d) => ({ ...emptyAp, PKIDCuentaCorrientePlanillas: null }));
     setFormCuota((d) => ({ ...emptyCuota, PKIDCuentaCorrientePlanillas: null }));
     setApList([]);
@@ -329,6 +336,7 @@ export default function CuentaCorrientePlanillasComponent() {
       PKIDCuentaContable: row.PKIDCuentaContable ?? "",
       PKIDTipoComprobante: row.PKIDTipoComprobante ?? "",
     });
+    setTrabajadorNombre(row.Trabajador || "");
     setFormAp((d) => ({ ...d, PKIDCuentaCorrientePlanillas: row.PKID }));
     setFormCuota((d) => ({ ...d, PKIDCuentaCorrientePlanillas: row.PKID }));
   };
@@ -542,10 +550,7 @@ export default function CuentaCorrientePlanillasComponent() {
   };
 
   // UI helpers
-  const selectedRow = ccList.find((x) => Number(x.PKID) === Number(formCab.PKID || 0));
-  const selectedTrabajador =
-    selectedRow?.Trabajador ||
-    (trabajadores.find((t) => Number(t.PKID) === Number(formCab.PKIDTrabajador))?.NombreCompleto || "");
+  const selectedTrabajador = trabajadorNombre;
   const tabBtn = (id) => ({
     ...btn.base,
     ...(activeTab === id ? btn.primary : btn.subtle),
@@ -598,14 +603,16 @@ export default function CuentaCorrientePlanillasComponent() {
               </div>
               <div>
                 <label style={label}>Trabajador *</label>
-                <select name="PKIDTrabajador" value={formCab.PKIDTrabajador} onChange={onCabChange} style={input}>
-                  <option value="">-- Seleccionar --</option>
-                  {trabajadores.map((t) => (
-                    <option key={t.PKID} value={t.PKID}>
-                      {t.NombreCompleto}
-                    </option>
-                  ))}
-                </select>
+                <TrabajadorTypeahead
+                  empresaId={empresaId}
+                  value={formCab.PKIDTrabajador}
+                  label={selectedTrabajador}
+                  onSelect={(t) => {
+                    setFormCab((f) => ({ ...f, PKIDTrabajador: t ? t.PKID : "" }));
+                    setTrabajadorNombre(t ? t.NombreCompleto : "");
+                  }}
+                  style={input}
+                />
               </div>
               <div>
                 <label style={label}>Moneda *</label>
@@ -1070,7 +1077,7 @@ export default function CuentaCorrientePlanillasComponent() {
         <div style={card}>
           <div style={{ display: "flex", justifyContent: "space-between", marginBottom: 8 }}>
             <strong>Registros</strong>
-            <span style={{ fontSize: 12, color: "#6b7280" }}>Total: {ccList.length}</span>
+            <span style={{ fontSize: 12, color: "#6b7280" }}>Mostrando: {ccList.length}{ccNext ? "+" : ""}</span>
           </div>
           <div style={{ overflowX: "auto" }}>
             <table style={{ width: "100%", borderCollapse: "collapse", fontSize: 13 }}>
@@ -1123,6 +1130,13 @@ export default function CuentaCorrientePlanillasComponent() {
               </tbody>
             </table>
           </div>
+          {ccNext && (
+            <div style={{ textAlign: "center", marginTop: 8 }}>
+              <button onClick={() => loadCab(true)} disabled={loading} style={{ ...btn.base, ...btn.neutral }}>
+                Cargar más
+              </button>
+            </div>
+          )}
         </div>
       )}
 
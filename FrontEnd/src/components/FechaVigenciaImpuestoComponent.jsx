@@ -47,11 +47,12 @@ export default function FechaVigenciaImpuestoComponent() {
   // combos
   const [situaciones, setSituaciones] = useState([]);
 
-  // grilla + paginación
+  // grilla + paginación por cursor (keyset): cursors[i] abre la página i + 1
   const [rows, setRows] = useState([]);
-  const [total, setTotal] = useState(0);
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
+  const [cursors, setCursors] = useState([""]);
+  const [nextCursor, setNextCursor] = useState(null);
 
   // selección + form
   const empty = {
@@ -84,7 +85,7 @@ export default function FechaVigenciaImpuestoComponent() {
     if (fHasta) qs.append("fecha_hasta", fHasta);
     if (fSituacion) qs.append("situacion_id", fSituacion);
     if (withPaging) {
-      qs.append("page", String(page));
+      qs.append("cursor", cursors[page - 1] || "");
       qs.append("page_size", String(pageSize));
     }
     return qs.toString();
@@ -95,7 +96,7 @@ export default function FechaVigenciaImpuestoComponent() {
       const url = `/fecha-vigencia-impuesto/?${buildQuery(true)}`;
       const res = await auth.get(url);
       setRows(res.data?.items || []);
-      setTotal(res.data?.total ?? 0);
+      setNextCursor(res.data?.next_cursor || null);
     } catch (err) {
       console.error(err);
       alert("No se pudo listar.");
@@ -111,8 +112,19 @@ export default function FechaVigenciaImpuestoComponent() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [page, pageSize]);
 
-  const onFilter = (e) => { e?.preventDefault(); setPage(1); loadRows(); };
-  const onClearFilter = () => { setFIdTipo(""); setFDesde(""); setFHasta(""); setFSituacion(""); setPage(1); loadRows(); };
+  // a la página 1; si ya está en ella se recarga aquí (el efecto solo corre si page cambia)
+  const firstPage = () => {
+    setCursors([""]);
+    if (page === 1) loadRows();
+    else setPage(1);
+  };
+  const nextPage = () => {
+    if (!nextCursor) return;
+    setCursors((c) => [...c.slice(0, page), nextCursor]);
+    setPage((p) => p + 1);
+  };
+  const onFilter = (e) => { e?.preventDefault(); firstPage(); };
+  const onClearFilter = () => { setFIdTipo(""); setFDesde(""); setFHasta(""); setFSituacion(""); firstPage(); };
 
   const onNew = () => {
     setSelected(null);
@@ -226,9 +238,8 @@ export default function FechaVigenciaImpuestoComponent() {
     }
   };
 
-  const totalPages = Math.max(1, Math.ceil(total / pageSize));
-  const start = total === 0 ? 0 : (page - 1) * pageSize + 1;
-  const end = Math.min(total, page * pageSize);
+  const start = rows.length === 0 ? 0 : (page - 1) * pageSize + 1;
+  const end = (page - 1) * pageSize + rows.length;
   const cell = { padding: 8, borderBottom: "1px solid #f3f4f6" };
 
   const fmt2 = (v) => (v === null || v === undefined || v === "" ? "" : Number(v).toFixed(2));
@@ -359,7 +370,7 @@ export default function FechaVigenciaImpuestoComponent() {
           <strong>Registros</strong>
           <div style={{ display: "flex", gap: 12, alignItems: "center" }}>
             <span style={{ fontSize: 12, color: "#6b7280" }}>
-              Mostrando {start}-{end} de {total}
+              Mostrando {start}-{end}{nextCursor ? "" : " (fin)"}
             </span>
             <div style={{ display: "flex", gap: 6, alignItems: "center" }}>
               <button
@@ -370,20 +381,10 @@ export default function FechaVigenciaImpuestoComponent() {
               >
                 ◀
               </button>
-              <span style={{ fontSize: 12 }}>Página</span>
-              <input
-                value={page}
-                onChange={(e) => {
-                  const v = Number(e.target.value) || 1;
-                  const maxp = Math.max(1, Math.ceil(total / pageSize));
-                  setPage(Math.min(Math.max(1, v), maxp));
-                }}
-                style={{ ...input, width: 60 }}
-              />
-              <span style={{ fontSize: 12 }}>/ {Math.max(1, Math.ceil(total / pageSize))}</span>
+              <span style={{ fontSize: 12 }}>Página {page}</span>
               <select
                 value={pageSize}
-                onChange={(e) => { setPageSize(Number(e.target.value)); setPage(1); }}
+                onChange={(e) => { setPageSize(Number(e.target.value)); setCursors([""]); setPage(1); }}
                 style={{ ...input, width: 90 }}
               >
                 {[10, 20, 50, 100, 200].map((n) => (
@@ -392,9 +393,9 @@ export default function FechaVigenciaImpuestoComponent() {
               </select>
               <button
                 type="button"
-                onClick={() => setPage((p) => Math.min(Math.max(1, Math.ceil(total / pageSize)), p + 1))}
-                disabled={page >= Math.max(1, Math.ceil(total / pageSize))}
-                style={{ ...btn.base, ...btn.neutral, opacity: page >= Math.max(1, Math.ceil(total / pageSize)) ? 0.5 : 1 }}
+                onClick={nextPage}
+                disabled={!nextCursor}
+                style={{ ...btn.base, ...btn.neutral, opacity: nextCursor ? 1 : 0.5 }}
               >
                 ▶
               </button>
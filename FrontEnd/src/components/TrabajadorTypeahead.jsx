@@ -0,0 +1,117 @@
+// src/components/TrabajadorTypeahead.jsx
+// Selector de trabajador con autocompletado en el servidor
+// (/trabajador-combos/typeahead/): solo baja las coincidencias del texto
+// escrito, no la lista completa de la empresa.
+import React, { useEffect, useRef, useState } from "react";
+import http from "../http";
+
+const LIMIT = 20;
+const DEBOUNCE_MS = 250;
+
+const list = {
+  position: "absolute", zIndex: 20, left: 0, right: 0, top: "100%", marginTop: 2,
+  background: "#fff", border: "1px solid #d1d5db", borderRadius: 6,
+  boxShadow: "0 4px 12px rgba(0,0,0,.08)", maxHeight: 260, overflowY: "auto",
+};
+const item = { padding: "6px 8px", cursor: "pointer", fontSize: 14 };
+const hint = { padding: "6px 8px", fontSize: 12, color: "#6b7280" };
+
+/**
+ * value: PKID seleccionado ("" = ninguno); label: nombre a mostrar para value
+ * (p. ej. r.Trabajador de la fila en edición); onSelect(row | null) recibe
+ * { PKID, IDTrabajador, NombreCompleto, NumeroDocumentoIdentidad }.
+ */
+export default function TrabajadorTypeahead({ empresaId, value, label, onSelect, style, disabled, placeholder }) {
+  const [text, setText] = useState(label || "");
+  const [items, setItems] = useState([]);
+  const [open, setOpen] = useState(false);
+  const [active, setActive] = useState(-1);
+  const [loading, setLoading] = useState(false);
+  const seq = useRef(0);
+  const clearedHere = useRef(false);
+
+  // al cambiar el seleccionado desde fuera (editar otra fila, limpiar el form);
+  // si lo limpió el propio input al escribir, se conserva lo escrito
+  useEffect(() => {
+    if (clearedHere.current) { clearedHere.current = false; return; }
+    if (!value) setText("");
+    else if (label) setText(label);
+  }, [value, label]);
+
+  useEffect(() => {
+    const q = text.trim();
+    if (!open || !empresaId || !q) { setItems([]); return; }
+    const mine = ++seq.current;
+    setLoading(true);
+    const timer = setTimeout(async () => {
+      try {
+        const { data } = await http.get(`/trabajador-combos/typeahead/`, {
+          params: { empresaId, q, limit: LIMIT },
+        });
+        if (mine === seq.current) { setItems(data || []); setActive(-1); }
+      } catch (err) {
+        console.error(err);
+        if (mine === seq.current) setItems([]);
+      } finally {
+        if (mine === seq.current) setLoading(false);
+      }
+    }, DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [text, open, empresaId]);
+
+  const pick = (row) => {
+    setText(row.NombreCompleto || "");
+    setOpen(false);
+    setItems([]);
+    onSelect?.(row);
+  };
+
+  const onChange = (e) => {
+    setText(e.target.value);
+    setOpen(true);
+    if (value) { clearedHere.current = true; onSelect?.(null); }
+  };
+
+  const onKeyDown = (e) => {
+    if (!open || !items.length) return;
+    if (e.key === "ArrowDown") { e.preventDefault(); setActive((a) => Math.min(a + 1, items.length - 1)); }
+    else if (e.key === "ArrowUp") { e.preventDefault(); setActive((a) => Math.max(a - 1, 0)); }
+    else if (e.key === "Enter" && active >= 0) { e.preventDefault(); pick(items[active]); }
+    else if (e.key === "Escape") setOpen(false);
+  };
+
+  return (
+    <div style={{ position: "relative" }}>
+      <input
+        value={text}
+        onChange={onChange}
+        onKeyDown={onKeyDown}
+        onFocus={() => text && setOpen(true)}
+        onBlur={() => setTimeout(() => setOpen(false), 150)}
+        placeholder={placeholder || "Nombre, ID o documento..."}
+        disabled={disabled || !empresaId}
+        autoComplete="off"
+        style={style}
+      />
+      {open && text.trim() && (
+        <div style={list}>
+          {loading && !items.length && <div style={hint}>Buscando...</div>}
+          {!loading && !items.length && <div style={hint}>Sin coincidencias</div>}
+          {items.map((t, i) => (
+            <div
+              key={t.PKID}
+              onMouseDown={(e) => { e.preventDefault(); pick(t); }}
+              onMouseEnter={() => setActive(i)}
+              style={{ ...item, background: i === active ? "#eff6ff" : "#fff" }}
+            >
+              {t.NombreCompleto}
+              <span style={{ color: "#6b7280", fontSize: 12 }}>
+                {"  "}ID {t.IDTrabajador}{t.NumeroDocumentoIdentidad ? ` · ${t.NumeroDocumentoIdentidad}` : ""}
+              </span>
+            </div>
+          ))}
+        </div>
+      )}
+    </div>
+  );
+}
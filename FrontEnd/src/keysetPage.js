@@ -0,0 +1,12 @@
+// frontend/src/keysetPage.js
+// Listados paginados por cursor (keyset): el backend devuelve
+// {items, next_cursor, limit} cuando se envía limit/cursor.
+export const PAGE_SIZE = 100;
+
+// Una página de url; cursor null = primera página. -> { items, next }
+export async function fetchKeysetPage(client, url, params = {}, cursor = null, limit = PAGE_SIZE) {
+  const res = await client.get(url, {
+    params: { ...params, limit, ...(cursor ? { cursor } : {}) },
+  });
+  return { items: res.data?.items || [], next: res.data?.next_cursor || null };
+}
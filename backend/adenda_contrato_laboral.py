@@ -5,6 +5,7 @@ from typing import Optional
 from datetime import date
 from database import get_connection
 from security import get_current_user
+from services.serialize import row_dict, rows_response
 
 router = APIRouter(prefix="/adenda-contrato-laboral", tags=["Adenda ContratoLaboral"])
 
@@ -21,10 +22,6 @@ class AdendaCreate(BaseModel):
 class AdendaUpdate(AdendaCreate):
     PKID: int
 
-def rows_to_dicts(cur):
-    cols = [c[0] for c in cur.description]
-    return [dict(zip(cols, r)) for r in cur.fetchall()]
-
 @router.get("/", dependencies=[Depends(get_current_user)])
 def listar(contratoId: int = Query(..., gt=0)):
     conn = get_connection(); cur = conn.cursor()
@@ -37,7 +34,7 @@ def listar(contratoId: int = Query(..., gt=0)):
              WHERE a.PKIDContratoLaboral = ?
           ORDER BY a.PKID DESC
         """, (contratoId,))
-        return rows_to_dicts(cur)
+        return rows_response(cur)
     finally:
         cur.close(); conn.close()
 
@@ -55,8 +52,7 @@ def obtener(PKID: int = Path(..., gt=0)):
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Adenda no encontrada")
-        cols = [c[0] for c in cur.description]
-        return dict(zip(cols, row))
+        return row_dict(cur, row)
     finally:
         cur.close(); conn.close()
 
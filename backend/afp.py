@@ -5,6 +5,8 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import afp_rates
+from services.serialize import dicts
 
 router = APIRouter(prefix="/afp", tags=["AFP"])
 
@@ -53,10 +55,6 @@ class PeriodoOut(BaseModel):
 # ---------------------------
 # Helpers
 # ---------------------------
-def rows_to_dicts(cursor, rows):
-    cols = [c[0] for c in cursor.description]
-    return [dict(zip(cols, r)) for r in rows]
-
 def http400(e: Exception, fallback="Error en la operación"):
     msg = str(e)
     if "Violation" in msg or "constraint" in msg.lower():
@@ -86,7 +84,7 @@ def listar_afp(user: dict = Depends(get_current_user)):
             LEFT JOIN SituacionRegistro sr ON sr.PKID = a.PKIDSituacionRegistro
             ORDER BY a.IDAfp
         """)
-        data = rows_to_dicts(cur, cur.fetchall())
+        data = dicts(cur)
         cur.close(); conn.close()
         return data
     except Exception as e:
@@ -210,6 +208,7 @@ def eliminar_afp(pkid: int, user: dict = Depends(get_current_user)):
             cur.close(); conn.close()
             raise HTTPException(status_code=404, detail="AFP no encontrada")
         conn.commit()
+        afp_rates.invalidate()
         cur.close(); conn.close()
         return {"detail": "AFP eliminada"}
     except Exception as e:
@@ -249,12 +248,33 @@ def listar_periodos(
               AND p.Mes = ?
             ORDER BY cp.ConceptoPlanilla
         """, (pkid, Ano, Mes))
-        data = rows_to_dicts(cur, cur.fetchall())
+        data = dicts(cur)
         cur.close(); conn.close()
         return data
     except Exception as e:
         http400(e, "No se pudo listar los periodos")
 
+@router.get("/{pkid}/tasas-vigentes")
+def tasas_vigentes(
+    pkid: int,
+    Ano: int = Query(...),
+    Mes: int = Query(..., ge=1, le=12),
+    PKIDConceptoPlanilla: Optional[int] = Query(None),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Tasas en vigor para (Ano, Mes): la última fila de AfpPeriodo con
+    (Ano, Mes) <= al periodo pedido, por concepto.
+    """
+    try:
+        idx = afp_rates.get_index()
+    except pyodbc.Error as e:
+        http400(e, "No se pudo cargar las tasas AFP")
+    if PKIDConceptoPlanilla is not None:
+        row = idx.as_of(pkid, Ano, Mes, PKIDConceptoPlanilla)
+        return [row] if row else []
+    return idx.as_of(pkid, Ano, Mes)
+
 @router.post("/{pkid}/periodos", response_model=PeriodoOut)
 def crear_periodo(pkid: int, body: PeriodoIn, user: dict = Depends(get_current_user)):
     try:
@@ -277,6 +297,7 @@ def crear_periodo(pkid: int, body: PeriodoIn, user: dict = Depends(get_current_u
         ))
         new_id = cur.fetchone()[0]
         conn.commit()
+        afp_rates.invalidate()
 
         # Devolver con descripciones
         cur = conn.cursor()
@@ -332,6 +353,7 @@ def actualizar_periodo(periodo_id: int, body: PeriodoIn, user: dict = Depends(ge
             cur.close(); conn.close()
             raise HTTPException(status_code=404, detail="Periodo no encontrado")
         conn.commit()
+        afp_rates.invalidate()
 
         cur = conn.cursor()
         cur.execute("""
@@ -369,6 +391,7 @@ def eliminar_periodo(periodo_id: int, user: dict = Depends(get_current_user)):
             cur.close(); conn.close()
             raise HTTPException(status_code=404, detail="Periodo no encontrado")
         conn.commit()
+        afp_rates.invalidate()
         cur.close(); conn.close()
         return {"detail": "Periodo eliminado"}
     except Exception as e:
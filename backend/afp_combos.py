@@ -2,14 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
+from services.serialize import dicts
 
 router = APIRouter(prefix="/afp-combos", tags=["AFP Combos"])
 
-def rows_to_dicts(cursor, rows):
-    cols = [c[0] for c in cursor.description]
-    return [dict(zip(cols, r)) for r in rows]
-
 @router.get("/conceptos", response_model=List[Dict])
+@ref_cached("ConceptoPlanilla")
 def combo_conceptos(user: dict = Depends(get_current_user)):
     try:
         conn = get_connection()
@@ -19,13 +18,14 @@ def combo_conceptos(user: dict = Depends(get_current_user)):
             FROM ConceptoPlanilla
             ORDER BY ConceptoPlanilla
         """)
-        data = rows_to_dicts(cur, cur.fetchall())
+        data = dicts(cur)
         cur.close(); conn.close()
         return data
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/situaciones", response_model=List[Dict])
+@ref_cached("SituacionRegistro")
 def combo_situaciones(user: dict = Depends(get_current_user)):
     try:
         conn = get_connection()
@@ -35,13 +35,14 @@ def combo_situaciones(user: dict = Depends(get_current_user)):
             FROM SituacionRegistro
             ORDER BY SituacionRegistro
         """)
-        data = rows_to_dicts(cur, cur.fetchall())
+        data = dicts(cur)
         cur.close(); conn.close()
         return data
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/cuentas", response_model=List[Dict])
+@ref_cached("CuentaContable")
 def combo_cuentas(user: dict = Depends(get_current_user)):
     try:
         conn = get_connection()
@@ -51,7 +52,7 @@ def combo_cuentas(user: dict = Depends(get_current_user)):
             FROM CuentaContable
             ORDER BY CuentaContable
         """)
-        data = rows_to_dicts(cur, cur.fetchall())
+        data = dicts(cur)
         cur.close(); conn.close()
         return data
     except Exception as e:
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 import pyodbc
 from database import get_connection
 from security import get_current_user
+from services.serialize import dicts, row_dict
 
 router = APIRouter(prefix="/area", tags=["area"])
 
@@ -22,9 +23,6 @@ class AreaOut(BaseModel):
     PKIDSituacionRegistro: int
     SituacionRegistro: str | None = None  # join legible
 
-def _row_to_dict(cursor, row):
-    return {cursor.description[i][0]: row[i] for i in range(len(cursor.description))}
-
 @router.get("/", response_model=list[AreaOut])
 def listar_areas(
     PKIDEmpresa: int = Query(..., description="Filtrar por empresa"),
@@ -43,7 +41,7 @@ def listar_areas(
         """
         cur.execute(sql, PKIDEmpresa)
         rows = cur.fetchall()
-        return [_row_to_dict(cur, r) for r in rows]
+        return dicts(cur, rows)
     finally:
         cur.close()
         conn.close()
@@ -64,7 +62,7 @@ def obtener_area(pkid: int, user: dict = Depends(get_current_user)):
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Área no encontrada")
-        return _row_to_dict(cur, row)
+        return row_dict(cur, row)
     finally:
         cur.close()
         conn.close()
@@ -98,7 +96,7 @@ def crear_area(data: AreaIn, user: dict = Depends(get_current_user)):
         WHERE a.PKID = ?
         """, new_id)
         row = cur.fetchone()
-        return _row_to_dict(cur, row)
+        return row_dict(cur, row)
     finally:
         cur.close()
         conn.close()
@@ -138,7 +136,7 @@ def actualizar_area(pkid: int, data: AreaIn, user: dict = Depends(get_current_us
         WHERE a.PKID = ?
         """, pkid)
         row = cur.fetchone()
-        return _row_to_dict(cur, row)
+        return row_dict(cur, row)
     finally:
         cur.close()
         conn.close()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/area-combos", tags=["area-combos"])
 
 @router.get("/situacion")
+@ref_cached("SituacionRegistro")
 def combo_situacion(user: dict = Depends(get_current_user)):
     conn = get_connection()
     cur = conn.cursor()
@@ -6,6 +6,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/banco", tags=["banco"])
 
@@ -89,6 +90,7 @@ def crear_banco(banco: BancoIn, user: dict = Depends(get_current_user)):
         """, banco.IDBanco, banco.Banco, banco.SiglasBanco, banco.PKIDSituacionRegistro)
         pkid = cur.fetchone()[0]
         conn.commit()
+        ref_cache.invalidate("Banco")
         return {
             "PKID": pkid,
             **banco.dict(),
@@ -116,6 +118,7 @@ def actualizar_banco(pkid: int, banco: BancoIn, user: dict = Depends(get_current
             conn.rollback()
             raise HTTPException(status_code=404, detail="Banco no encontrado.")
         conn.commit()
+        ref_cache.invalidate("Banco")
         return {
             "PKID": pkid,
             **banco.dict(),
@@ -139,6 +142,7 @@ def eliminar_banco(pkid: int, user: dict = Depends(get_current_user)):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Banco no encontrado.")
         conn.commit()
+        ref_cache.invalidate("Banco")
         return {"ok": True}
     finally:
         cur.close()
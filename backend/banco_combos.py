@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/banco-combos", tags=["banco-combos"])
 
 @router.get("/monedas")
+@ref_cached("Moneda")
 def combo_monedas(user: dict = Depends(get_current_user)):
     conn = get_connection()
     cur = conn.cursor()
@@ -18,6 +20,7 @@ def combo_monedas(user: dict = Depends(get_current_user)):
         conn.close()
 
 @router.get("/tipos-cuenta")
+@ref_cached("TipoCuentaBanco")
 def combo_tipos_cuenta(user: dict = Depends(get_current_user)):
     conn = get_connection()
     cur = conn.cursor()
@@ -30,6 +33,7 @@ def combo_tipos_cuenta(user: dict = Depends(get_current_user)):
         conn.close()
 
 @router.get("/situaciones")
+@ref_cached("SituacionRegistro")
 def combo_situaciones(user: dict = Depends(get_current_user)):
     """Combito PROPIO para SituacionRegistro (PKID + SituacionRegistro)."""
     conn = get_connection()
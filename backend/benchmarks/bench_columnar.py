@@ -0,0 +1,140 @@
+# backend/benchmarks/bench_columnar.py
+"""
+Benchmark de serialización de listados con filas sintéticas con la forma
+del listado de cts_calculada (30 columnas). Mide tamaño del JSON y tiempo
+de armado + serialización de:
+
+  dicts      _row_to_dict por fila -> jsonable_encoder -> JSONResponse
+             (como era antes de services.serialize)
+  serialize  rows_response: dict(zip) por fila, codificado con orjson
+  columnar   ?format=columnar
+
+    cd backend
+    python benchmarks/bench_columnar.py --rows 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.columnar import Columnar  # noqa: E402
+from services.serialize import dumps, serializer  # noqa: E402
+
+COLUMNS = [
+    ("PKID", int), ("PKIDPeriodoCTS", int), ("Ano", int), ("Mes", int), ("PKIDEmpresa", int),
+    ("PKIDTrabajador", int), ("Trabajador", str), ("PKIDBanco", int), ("Banco", str),
+    ("CuentaBancariaCTS", str), ("BaseImponibleCTS", Decimal), ("ImportesCTSSoles", Decimal),
+    ("ImporteCTSUSD", Decimal), ("PKIDMoneda", int), ("Moneda", str), ("TipoCambioUSD", Decimal),
+    ("FechaInicio", date), ("FechaTermino", date), ("AnoTiempoServicio", int),
+    ("MesTiempoServicio", int), ("DiaTiempServicio", int), ("DiasLiquidados", int), ("Regimen", int),
+    ("PorcentajeCTS", Decimal), ("ImporteNoComputable", Decimal), ("FechaIngresoTrabajador", date),
+    ("DescuentoCTS", Decimal), ("ImporteProvisionCTS", Decimal), ("DiferenciaProvisionCalculoCTS", Decimal),
+    ("InteresesSoles", Decimal), ("DiasNoComputables", int), ("DiasIntereses", int),
+    ("PKIDSituacionRegistro", int), ("SituacionRegistro", str),
+]
+Row = namedtuple("Row", [c for c, _ in COLUMNS])
+# como cursor.description de pyodbc: (nombre, tipo, ...)
+DESCRIPTION = [(c, t, None, None, None, None, True) for c, t in COLUMNS]
+
+
+def synthetic_rows(n: int):
+    rows = []
+    base = date(2015, 1, 1)
+    for i in range(n):
+        ingreso = base + timedelta(days=i % 3000)
+        rows.append(Row(
+            i + 1, 10 + i % 12, 2024, 5 if i % 2 else 11, 1,
+            i % 20000 + 1, f"APELLIDO{i % 977} APELLIDO{i % 613} NOMBRE{i}", 1 + i % 6, "BANCO DE CRÉDITO",
+            f"191-{i:08d}-0-{i % 90}", Decimal("3450.25") + i % 500, Decimal("1725.13") + i % 250,
+            None if i % 3 else Decimal("459.91"), 1, "SOLES", Decimal("3.751"),
+            date(2023, 11, 1), date(2024, 4, 30), 0, 6, 0, 180, 1,
+            Decimal("100.00"), Decimal("0.00"), ingreso,
+            Decimal("0.00"), Decimal("1700.00"), Decimal("25.13"),
+            None, 0, 0, 1, "ACTIVO",
+        ))
+    return rows
+
+
+def _row_to_dict(r):
+    """Copia del _row_to_dict que tenía cts_calculada antes de services.serialize."""
+    return {
+        "PKID": r.PKID,
+        "PKIDPeriodoCTS": r.PKIDPeriodoCTS,
+        "Ano": r.Ano, "Mes": r.Mes,
+        "PKIDTrabajador": r.PKIDTrabajador, "Trabajador": r.Trabajador,
+        "PKIDBanco": r.PKIDBanco, "Banco": r.Banco,
+        "CuentaBancariaCTS": r.CuentaBancariaCTS,
+        "BaseImponibleCTS": float(r.BaseImponibleCTS) if r.BaseImponibleCTS is not None else None,
+        "ImportesCTSSoles": float(r.ImportesCTSSoles) if r.ImportesCTSSoles is not None else None,
+        "ImporteCTSUSD": float(r.ImporteCTSUSD) if r.ImporteCTSUSD is not None else None,
+        "PKIDMoneda": r.PKIDMoneda, "Moneda": r.Moneda,
+        "TipoCambioUSD": float(r.TipoCambioUSD) if r.TipoCambioUSD is not None else None,
+        "FechaInicio": r.FechaInicio.isoformat() if r.FechaInicio else None,
+        "FechaTermino": r.FechaTermino.isoformat() if r.FechaTermino else None,
+        "AnoTiempoServicio": r.AnoTiempoServicio,
+        "MesTiempoServicio": r.MesTiempoServicio,
+        "DiaTiempServicio": r.DiaTiempServicio,
+        "DiasLiquidados": r.DiasLiquidados,
+        "Regimen": r.Regimen,
+        "PorcentajeCTS": float(r.PorcentajeCTS) if r.PorcentajeCTS is not None else None,
+        "ImporteNoComputable": float(r.ImporteNoComputable) if r.ImporteNoComputable is not None else None,
+        "FechaIngresoTrabajador": r.FechaIngresoTrabajador.isoformat() if r.FechaIngresoTrabajador else None,
+        "DescuentoCTS": float(r.DescuentoCTS) if r.DescuentoCTS is not None else None,
+        "ImporteProvisionCTS": float(r.ImporteProvisionCTS) if r.ImporteProvisionCTS is not None else None,
+        "DiferenciaProvisionCalculoCTS": float(r.DiferenciaProvisionCalculoCTS) if r.DiferenciaProvisionCalculoCTS is not None else None,
+        "InteresesSoles": float(r.InteresesSoles) if r.InteresesSoles is not None else None,
+        "DiasNoComputables": r.DiasNoComputables,
+        "DiasIntereses": r.DiasIntereses,
+        "PKIDSituacionRegistro": r.PKIDSituacionRegistro,
+        "SituacionRegistro": r.SituacionRegistro,
+    }
+
+
+def render_rows(rows) -> bytes:
+    return JSONResponse(content=jsonable_encoder([_row_to_dict(r) for r in rows])).body
+
+
+def render_serialize(rows) -> bytes:
+    return dumps(serializer(DESCRIPTION, ("PKIDEmpresa",)).dicts(rows))
+
+
+def render_columnar(rows, columnar: Columnar) -> bytes:
+    return columnar.response(DESCRIPTION, rows).body
+
+
+def timed(fn, repeat: int):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    columnar = Columnar(drop=("PKIDEmpresa",))
+    print(f"{'filas':>8} {'formato':>10} {'KB':>9} {'ms':>9} {'veloc.':>7}")
+    for n in args.rows:
+        rows = synthetic_rows(n)
+        t_base, b_base = timed(lambda: render_rows(rows), args.repeat)
+        for nombre, fn in (("dicts", lambda: render_rows(rows)),
+                           ("serialize", lambda: render_serialize(rows)),
+                           ("columnar", lambda: render_columnar(rows, columnar))):
+            t, b = (t_base, b_base) if nombre == "dicts" else timed(fn, args.repeat)
+            print(f"{n:>8} {nombre:>10} {len(b) / 1024:>9.0f} {t * 1000:>9.1f} {t_base / t:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
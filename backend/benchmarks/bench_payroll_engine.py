@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_payroll_engine.py
+"""
+Benchmark del motor de planilla NumPy con datos sintéticos (sin base de datos).
+
+    cd backend
+    python benchmarks/bench_payroll_engine.py --workers 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.payroll_engine import PeriodInputs, compute, BASE_FLAGS  # noqa: E402
+
+
+def synthetic_inputs(workers: int, ingresos: int = 25, afps: int = 4, seed: int = 7) -> PeriodInputs:
+    rng = np.random.default_rng(seed)
+    ingreso_ids = np.arange(1001, 1001 + ingresos)
+    conceptos = {}
+    for cid in ingreso_ids:
+        conceptos[int(cid)] = {"ConceptoPlanilla": f"Ingreso {cid}",
+                               **{col: bool(rng.random() < 0.7) for col in BASE_FLAGS.values()}}
+    for cid in range(3001, 3011):
+        conceptos[cid] = {"ConceptoPlanilla": f"Descuento {cid}"}
+
+    matriz = rng.gamma(2.0, 600.0, size=(workers, ingresos))
+    matriz[rng.random(size=matriz.shape) < 0.6] = 0.0
+
+    afp_rates = []
+    for a in range(afps):
+        afp_rates += [
+            {"PKIDAfp": a + 1, "IDConceptoPlanilla": 3001, "PorcentajeTrabajador": 10.0, "PorcentajeMixta": 10.0, "TopeAfp": None},
+            {"PKIDAfp": a + 1, "IDConceptoPlanilla": 3002, "PorcentajeTrabajador": 1.3 + a / 10, "PorcentajeMixta": 0.0, "TopeAfp": 12000.0},
+            {"PKIDAfp": a + 1, "IDConceptoPlanilla": 3003, "PorcentajeTrabajador": 1.5 + a / 10, "PorcentajeMixta": 0.2, "TopeAfp": None},
+        ]
+    deducciones = [
+        {"IDConceptoPlanilla": 3004, "IndicadorONPCheck": True, "IndicadorPorcentajeCheck": True, "PorcentajeTrabajador": 13.0},
+        {"IDConceptoPlanilla": 3005, "IndicadorPorcentajeCheck": True, "PorcentajeEmpleador": 9.0, "MinimoEmpleador": 101.25},
+        {"IDConceptoPlanilla": 3006, "IndicadorRentaCheck": 1, "MontoCreditoDeduccion": 37450.0},
+        {"IDConceptoPlanilla": 3007, "IndicadorCuotaCheck": True, "AsignaMontoTrabajador": 25.0},
+    ]
+    renta = [{"ImporteBase": b, "TasaImpuesto": t}
+             for b, t in [(0, 8), (26750, 14), (107000, 17), (187250, 20), (240750, 30)]]
+    return PeriodInputs(
+        empresa=1, ano=2025, mes=5,
+        trabajadores=np.arange(1, workers + 1),
+        nombres=[f"TRABAJADOR {i}" for i in range(1, workers + 1)],
+        ingreso_ids=ingreso_ids,
+        ingresos=matriz,
+        conceptos=conceptos,
+        afp_idx=rng.integers(-1, afps, size=workers),
+        afp_pkids=list(range(1, afps + 1)),
+        afp_rates=afp_rates,
+        deducciones=deducciones,
+        renta_tramos=renta,
+        comision_mixta=rng.random(size=workers) < 0.3,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    inputs = synthetic_inputs(args.workers)
+    print(f"insumos sintéticos: {time.perf_counter() - t0:.3f}s")
+
+    tiempos = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        result = compute(inputs)
+        tiempos.append(time.perf_counter() - t0)
+    print(f"compute ({args.workers} trabajadores x {len(result.concepto_ids)} conceptos): "
+          f"min {min(tiempos):.3f}s  med {sorted(tiempos)[len(tiempos) // 2]:.3f}s")
+
+    t0 = time.perf_counter()
+    cols = result.to_columns()
+    print(f"to_columns: {time.perf_counter() - t0:.3f}s  ({len(cols['IDTrabajador'])} filas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_pdf_report.py
+"""
+Benchmark del PDF de conceptos: render anterior (Paragraph por celda y una
+sola Table) contra services.pdf_report, con filas sintéticas.
+
+    cd backend
+    python benchmarks/bench_pdf_report.py --rows 1000 10000 50000
+    python benchmarks/bench_pdf_report.py --rows 50000 --legacy-max 10000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import pdf_report  # noqa: E402
+
+HEADER = ["IDConceptoPlanilla", "ConceptoPlanilla", "ConceptoAbreviado",
+          "TipoConcepto", "TipoConceptoGasto", "TipoHoraDia"]
+PROPORTIONS = [0.9, 2.2, 1.6, 0.9, 0.9, 0.9]
+
+
+def synthetic_rows(n: int):
+    rows = []
+    for i in range(n):
+        nombre = f"Concepto de planilla {i}"
+        if i % 7 == 0:
+            nombre += " con una descripción larga que obliga a partir la celda en varias líneas"
+        rows.append([1000 + i, nombre, f"CP{i}", 1 + i % 3, None if i % 5 else 2, i % 4])
+    return rows
+
+
+def render_legacy(rows) -> bytes:
+    """Copia del render anterior de reports.conceptos_report (sin encabezado/pie)."""
+    styles = getSampleStyleSheet()
+    p_small = ParagraphStyle("small", parent=styles["Normal"], fontName="Helvetica",
+                             fontSize=8.5, leading=10, spaceAfter=0)
+    p_bold = ParagraphStyle("small_bold", parent=p_small, fontName="Helvetica-Bold")
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), leftMargin=16 * mm, rightMargin=16 * mm,
+                            topMargin=22 * mm, bottomMargin=18 * mm)
+    data = [[Paragraph(c, p_bold) for c in HEADER]]
+    for r in rows:
+        data.append([Paragraph(str("" if v is None else v), p_small) for v in r])
+    total = sum(PROPORTIONS)
+    tbl = Table(data, colWidths=[doc.width * p / total for p in PROPORTIONS], repeatRows=1)
+    tbl.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#DDDDDD")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#FAFAFA")]),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    doc.build([Spacer(1, 4 * mm), tbl])
+    return buffer.getvalue()
+
+
+def render_new(rows, parallel) -> bytes:
+    layout = pdf_report.ReportLayout(title="Reporte de Conceptos", subtitle="Benchmark",
+                                     company="Mi Empresa S.A.C.")
+    f = pdf_report.render_table_pdf(layout, HEADER, rows, PROPORTIONS, parallel=parallel)
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, len(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    ap.add_argument("--legacy-max", type=int, default=50000,
+                    help="no correr el render anterior por encima de estas filas")
+    args = ap.parse_args()
+
+    print(f"procesos: {pdf_report.MAX_PROCS}  pypdf: {pdf_report.HAS_PYPDF}")
+    print(f"{'filas':>8} {'anterior s':>11} {'nuevo s':>9} {'paralelo s':>11} {'KB nuevo':>9}")
+    for n in args.rows:
+        rows = synthetic_rows(n)
+        legacy = f"{timed(render_legacy, rows)[0]:.2f}" if n <= args.legacy_max else "-"
+        t_new, size = timed(render_new, rows, False)
+        t_par, _ = timed(render_new, rows, True)
+        print(f"{n:>8} {legacy:>11} {t_new:>9.2f} {t_par:>11.2f} {size // 1024:>9}")
+
+
+if __name__ == "__main__":
+    main()
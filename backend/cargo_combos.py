@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/cargo-combos", tags=["cargo-combos"])
 
 @router.get("/situaciones")
+@ref_cached("SituacionRegistro")
 def combo_situaciones(user: dict = Depends(get_current_user)):
     conn = get_connection()
     cur = conn.cursor()
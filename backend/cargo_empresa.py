@@ -3,6 +3,8 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
+from services.serialize import dicts
 
 router = APIRouter(prefix="/cargo-empresa", tags=["cargo-empresa"])
 
@@ -20,9 +22,6 @@ class CargoEmpresaOut(BaseModel):
     PKIDSituacionRegistro: int
     SituacionRegistro: Optional[str] = None
 
-def _row_to_dict(row, columns) -> Dict[str, Any]:
-    return {col[0]: val for col, val in zip(columns, row)}
-
 @router.get("/", response_model=List[CargoEmpresaOut])
 def listar_cargos(
     PKIDEmpresa: int = Query(...),
@@ -39,22 +38,7 @@ def listar_cargos(
             WHERE ce.PKIDEmpresa = ?
             ORDER BY ce.IDCargoEmpresa
         """, (PKIDEmpresa,))
-        rows = cur.fetchall()
-        if not rows:
-            return []
-        cols = cur.description
-        out = []
-        for r in rows:
-            d = _row_to_dict(r, cols)
-            out.append({
-                "PKID": d["PKID"],
-                "IDCargoEmpresa": d["IDCargoEmpresa"],
-                "PKIDEmpresa": d["PKIDEmpresa"],
-                "CargoEmpresa": d["CargoEmpresa"],
-                "PKIDSituacionRegistro": d["PKIDSituacionRegistro"],
-                "SituacionRegistro": d.get("SituacionRegistro"),
-            })
-        return out
+        return dicts(cur)
     finally:
         cur.close()
         conn.close()
@@ -87,6 +71,7 @@ def crear_cargo(item: CargoEmpresaIn, user: dict = Depends(get_current_user)):
         new_id = int(row[0])
 
         conn.commit()
+        ref_cache.invalidate("CargoEmpresa")
         return {"message": "Creado", "PKID": new_id}
     except HTTPException:
         raise
@@ -111,6 +96,7 @@ def actualizar_cargo(pkid: int, item: CargoEmpresaIn, user: dict = Depends(get_c
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No existe el registro")
         conn.commit()
+        ref_cache.invalidate("CargoEmpresa")
         return {"message": "Actualizado"}
     except HTTPException:
         raise
@@ -130,6 +116,7 @@ def eliminar_cargo(pkid: int, user: dict = Depends(get_current_user)):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No existe el registro")
         conn.commit()
+        ref_cache.invalidate("CargoEmpresa")
         return {"message": "Eliminado"}
     except HTTPException:
         raise
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from typing import List, Dict, Any
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/categoria-trabajador", tags=["categoria-trabajador"])
 
@@ -76,6 +77,7 @@ def crear(item: CategoriaTrabajadorIn, user: dict = Depends(get_current_user)):
         new_id = int(row[0])
 
         conn.commit()
+        ref_cache.invalidate("CategoriaTrabajador")
         return {"message": "Creado", "PKID": new_id}
     except HTTPException:
         raise
@@ -100,6 +102,7 @@ def actualizar(pkid: int, item: CategoriaTrabajadorIn, user: dict = Depends(get_
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No existe el registro")
         conn.commit()
+        ref_cache.invalidate("CategoriaTrabajador")
         return {"message": "Actualizado"}
     except HTTPException:
         raise
@@ -120,6 +123,7 @@ def eliminar(pkid: int, user: dict = Depends(get_current_user)):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No existe el registro")
         conn.commit()
+        ref_cache.invalidate("CategoriaTrabajador")
         return {"message": "Eliminado"}
     except HTTPException:
         raise
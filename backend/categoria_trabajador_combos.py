@@ -3,10 +3,12 @@ from fastapi import APIRouter, Depends
 from typing import List, Dict, Any
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/categoria-trabajador-combos", tags=["categoria-trabajador-combos"])
 
 @router.get("/situaciones", response_model=List[Dict[str, Any]])
+@ref_cached("SituacionRegistro")
 def situaciones(user: dict = Depends(get_current_user)):
     conn = get_connection()
     cur = conn.cursor()
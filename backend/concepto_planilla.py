@@ -6,6 +6,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/concepto-planilla", tags=["ConceptoPlanilla"])
 
@@ -113,6 +114,7 @@ def crear_concepto(body: ConceptoPlanillaCreate):
         cur.execute(insert_sql, params)
         new_id = cur.fetchone()[0]
         conn.commit()
+        ref_cache.invalidate("ConceptoPlanilla")
         return {"PKID": new_id}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -169,6 +171,7 @@ def actualizar_concepto(PKID: int, body: ConceptoPlanillaUpdate):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Concepto no encontrado.")
         conn.commit()
+        ref_cache.invalidate("ConceptoPlanilla")
         return {"ok": True}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -189,6 +192,7 @@ def eliminar_concepto(PKID: int = Path(..., gt=0)):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Concepto no encontrado.")
         conn.commit()
+        ref_cache.invalidate("ConceptoPlanilla")
         return {"ok": True}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/condicion-trabajador-combos", tags=["Combos CondicionTrabajador"])
 
 @router.get("/situacion", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     conn = get_connection()
     cur = conn.cursor()
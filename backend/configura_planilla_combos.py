@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/configura-planilla-combos", tags=["Combos ConfiguraPlanilla"])
 
 @router.get("/empresa/", dependencies=[Depends(get_current_user)])
+@ref_cached("Empresa")
 def combo_empresa():
     conn = get_connection()
     cur = conn.cursor()
@@ -23,6 +25,7 @@ def combo_empresa():
         conn.close()
 
 @router.get("/nomina/", dependencies=[Depends(get_current_user)])
+@ref_cached("Nomina")
 def combo_nomina():
     conn = get_connection()
     cur = conn.cursor()
@@ -39,6 +42,7 @@ def combo_nomina():
         conn.close()
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     conn = get_connection()
     cur = conn.cursor()
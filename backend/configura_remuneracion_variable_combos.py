@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/configura-remuneracion-variable-combos", tags=["Combos ConfiguraRemuneracionVariable"])
 
 @router.get("/empresa", dependencies=[Depends(get_current_user)])
+@ref_cached("Empresa")
 def combo_empresa():
     conn = get_connection()
     cur = conn.cursor()
@@ -18,6 +20,7 @@ def combo_empresa():
         conn.close()
 
 @router.get("/tipoproceso", dependencies=[Depends(get_current_user)])
+@ref_cached("TipoProceso")
 def combo_tipoproceso():
     conn = get_connection()
     cur = conn.cursor()
@@ -30,6 +33,7 @@ def combo_tipoproceso():
         conn.close()
 
 @router.get("/situacion", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     conn = get_connection()
     cur = conn.cursor()
@@ -5,6 +5,8 @@ from typing import Optional, Dict, Any, List
 from datetime import date
 from database import get_connection
 from security import get_current_user
+from services.keyset import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from services.serialize import json_response, row_dict, rows_response, serializer
 
 router = APIRouter(prefix="/contrato-laboral", tags=["ContratoLaboral"])
 
@@ -22,49 +24,48 @@ class ContratoLaboralCreate(BaseModel):
 class ContratoLaboralUpdate(ContratoLaboralCreate):
     PKID: int
 
-def dicts(cur): 
-    cols = [c[0] for c in cur.description]
-    return [dict(zip(cols, r)) for r in cur.fetchall()]
+_LISTAR_SQL = """
+    SELECT c.*,
+           t.NombreCompleto AS Trabajador,
+           t.PKIDEmpresa,
+           ce.CargoEmpresa,
+           m.ModeloContratoLaboral,
+           s.SituacionRegistro
+      FROM ContratoLaboral c
+INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
+ LEFT JOIN CargoEmpresa ce ON ce.PKID = c.PKIDCargoEmpresa
+ LEFT JOIN ModeloContratoLaboral m ON m.PKID = c.PKIDModeloContratoLaboral
+ LEFT JOIN SituacionRegistro s ON s.PKID = c.PKIDSituacionRegistro
+"""
+
+KEYSET = Keyset([("c.PKID", True)], key=lambda r: (r.PKID,))
 
 @router.get("/", dependencies=[Depends(get_current_user)])
-def listar(empresaId: Optional[int] = Query(None, gt=0)):
+def listar(
+    empresaId: Optional[int] = Query(None, gt=0),
+    cursor: Optional[str] = Query(None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Con cursor o limit devuelve {items, next_cursor, limit}"),
+):
     """
     Si empresaId viene, filtra por Trabajador.PKIDEmpresa = empresaId
+    Con cursor o limit pagina por PKID y devuelve {items, next_cursor, limit}
     """
     conn = get_connection(); cur = conn.cursor()
     try:
-        if empresaId:
-            cur.execute("""
-                SELECT c.*, 
-                       t.NombreCompleto AS Trabajador,
-                       t.PKIDEmpresa,
-                       ce.CargoEmpresa,
-                       m.ModeloContratoLaboral,
-                       s.SituacionRegistro
-                  FROM ContratoLaboral c
-            INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
-             LEFT JOIN CargoEmpresa ce ON ce.PKID = c.PKIDCargoEmpresa
-             LEFT JOIN ModeloContratoLaboral m ON m.PKID = c.PKIDModeloContratoLaboral
-             LEFT JOIN SituacionRegistro s ON s.PKID = c.PKIDSituacionRegistro
-                 WHERE t.PKIDEmpresa = ?
-              ORDER BY c.PKID DESC
-            """, (empresaId,))
-        else:
-            cur.execute("""
-                SELECT c.*, 
-                       t.NombreCompleto AS Trabajador,
-                       t.PKIDEmpresa,
-                       ce.CargoEmpresa,
-                       m.ModeloContratoLaboral,
-                       s.SituacionRegistro
-                  FROM ContratoLaboral c
-            INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
-             LEFT JOIN CargoEmpresa ce ON ce.PKID = c.PKIDCargoEmpresa
-             LEFT JOIN ModeloContratoLaboral m ON m.PKID = c.PKIDModeloContratoLaboral
-             LEFT JOIN SituacionRegistro s ON s.PKID = c.PKIDSituacionRegistro
-              ORDER BY c.PKID DESC
-            """)
-        return dicts(cur)
+        params = [empresaId] if empresaId else []
+        conds = ["t.PKIDEmpresa = ?"] if empresaId else []
+        paginado = cursor is not None or limit is not None
+        if paginado:
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                conds.append(cond)
+        sql = _LISTAR_SQL + (" WHERE " + " AND ".join(conds) if conds else "") + KEYSET.order_by()
+        if not paginado:
+            cur.execute(sql, params)
+            return rows_response(cur)
+        limit = limit or DEFAULT_LIMIT
+        cur.execute(sql + KEYSET.fetch(params, limit), params)
+        return json_response(KEYSET.page(cur.fetchall(), limit, serializer(cur.description).dict))
     finally:
         cur.close(); conn.close()
 
@@ -89,8 +90,7 @@ def obtener(PKID: int = Path(..., gt=0)):
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Contrato no encontrado")
-        cols = [c[0] for c in cur.description]
-        return dict(zip(cols, row))
+        return row_dict(cur, row)
     finally:
         cur.close(); conn.close()
 
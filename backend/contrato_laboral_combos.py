@@ -2,14 +2,13 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
+from services.serialize import dicts
 
 router = APIRouter(prefix="/contrato-laboral-combos", tags=["Combos ContratoLaboral"])
 
-def rows_to_dicts(cur):
-    cols = [c[0] for c in cur.description]
-    return [dict(zip(cols, r)) for r in cur.fetchall()]
-
 @router.get("/trabajador/", dependencies=[Depends(get_current_user)])
+@ref_cached("Trabajador")
 def combo_trabajador(empresaId: int = Query(..., gt=0)):
     conn = get_connection(); cur = conn.cursor()
     try:
@@ -20,11 +19,12 @@ def combo_trabajador(empresaId: int = Query(..., gt=0)):
              WHERE PKIDEmpresa = ?
              ORDER BY NombreCompleto
         """, (empresaId,))
-        return rows_to_dicts(cur)
+        return dicts(cur)
     finally:
         cur.close(); conn.close()
 
 @router.get("/cargo-empresa/", dependencies=[Depends(get_current_user)])
+@ref_cached("CargoEmpresa")
 def combo_cargo_empresa(empresaId: int = Query(..., gt=0)):
     conn = get_connection(); cur = conn.cursor()
     try:
@@ -35,11 +35,12 @@ def combo_cargo_empresa(empresaId: int = Query(..., gt=0)):
              WHERE PKIDEmpresa = ?
              ORDER BY CargoEmpresa
         """, (empresaId,))
-        return rows_to_dicts(cur)
+        return dicts(cur)
     finally:
         cur.close(); conn.close()
 
 @router.get("/modelo-contrato/", dependencies=[Depends(get_current_user)])
+@ref_cached("ModeloContratoLaboral")
 def combo_modelo_contrato():
     conn = get_connection(); cur = conn.cursor()
     try:
@@ -48,11 +49,12 @@ def combo_modelo_contrato():
               FROM ModeloContratoLaboral
              ORDER BY ModeloContratoLaboral
         """)
-        return rows_to_dicts(cur)
+        return dicts(cur)
     finally:
         cur.close(); conn.close()
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     conn = get_connection(); cur = conn.cursor()
     try:
@@ -61,6 +63,6 @@ def combo_situacion():
               FROM SituacionRegistro
              ORDER BY SituacionRegistro
         """)
-        return rows_to_dicts(cur)
+        return dicts(cur)
     finally:
         cur.close(); conn.close()
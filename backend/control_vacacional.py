@@ -1,11 +1,16 @@
 # backend/control_vacacional.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
+import time
 import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import vacation_engine
+from services.columnar import Columnar
+from services.keyset import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from services.serialize import json_response, rows_response, serializer
 
 router = APIRouter(prefix="/control-vacacional", tags=["ControlVacacional"])
 
@@ -25,10 +30,34 @@ class ControlVacacionalCreate(BaseModel):
 class ControlVacacionalUpdate(ControlVacacionalCreate):
     PKID: int
 
+class CalcularVacaciones(BaseModel):
+    PKIDEmpresa: int
+    Ano: int
+    Mes: int
+    AnoHasta: Optional[int] = None          # con AnoHasta/MesHasta: un registro por mes del rango
+    MesHasta: Optional[int] = None
+    DiasPorAno: float = vacation_engine.DIAS_POR_ANO
+    Incremental: bool = False               # un solo mes: solo trabajadores con fechas, periodos o remuneración cambiados
+    PKIDSituacionRegistro: int
+    Simular: bool = False
+
+MAX_MESES_CALCULO = 24
+
 # ---------- Listar con joins (filtro por empresa opcional) ----------
+COLUMNAR = Columnar()
+
+# mismo orden que el listado; PKID desempata. NombreCompleto puede ser NULL
+KEYSET = Keyset(
+    [("c.Ano", True), ("c.Mes", True), ("ISNULL(t.NombreCompleto, '')", False), ("c.PKID", False)],
+    key=lambda r: (r.Ano, r.Mes, r.Trabajador or "", r.PKID),
+)
+
 @router.get("/", dependencies=[Depends(get_current_user)])
 def listar_control(
-    empresaId: Optional[int] = Query(None, description="Filtrar por empresa (desde Trabajador.PKIDEmpresa)")
+    empresaId: Optional[int] = Query(None, description="Filtrar por empresa (desde Trabajador.PKIDEmpresa)"),
+    cursor: Optional[str] = Query(None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Con cursor o limit devuelve {items, next_cursor, limit}"),
+    formato: Optional[Literal["columnar"]] = Query(None, alias="format", description="columnar: nombres una vez y un arreglo por columna"),
 ):
     try:
         conn = get_connection()
@@ -54,6 +83,22 @@ def listar_control(
         INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
         INNER JOIN SituacionRegistro s ON s.PKID = c.PKIDSituacionRegistro
         """
+        if cursor is not None or limit is not None:
+            limit = limit or DEFAULT_LIMIT
+            params = [empresaId] if empresaId else []
+            conds = ["t.PKIDEmpresa = ?"] if empresaId else []
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                conds.append(cond)
+            if conds:
+                base_sql += " WHERE " + " AND ".join(conds)
+            base_sql += KEYSET.order_by() + KEYSET.fetch(params, limit)
+            cur.execute(base_sql, params)
+            if formato == "columnar":
+                rows, next_cursor = KEYSET.split(cur.fetchall(), limit)
+                return COLUMNAR.response(cur.description, rows, next_cursor=next_cursor, limit=limit)
+            return json_response(KEYSET.page(cur.fetchall(), limit, serializer(cur.description).dict))
+
         if empresaId:
             base_sql += " WHERE t.PKIDEmpresa = ? ORDER BY c.Ano DESC, c.Mes DESC, t.NombreCompleto"
             cur.execute(base_sql, (empresaId,))
@@ -61,26 +106,51 @@ def listar_control(
             base_sql += " ORDER BY c.Ano DESC, c.Mes DESC, t.NombreCompleto"
             cur.execute(base_sql)
 
-        rows = cur.fetchall()
-        data = []
-        for r in rows:
-            data.append({
-                "PKID": r.PKID,
-                "PKIDTrabajador": r.PKIDTrabajador,
-                "Trabajador": r.Trabajador,
-                "PKIDEmpresa": r.PKIDEmpresa,
-                "Ano": r.Ano,
-                "Mes": r.Mes,
-                "FechaIngreso": r.FechaIngreso.isoformat() if r.FechaIngreso else None,
-                "SaldoVacaciones": float(r.SaldoVacaciones) if r.SaldoVacaciones is not None else None,
-                "DiasTruncosVacaciones": float(r.DiasTruncosVacaciones) if r.DiasTruncosVacaciones is not None else None,
-                "MesesTruncosVacaciones": float(r.MesesTruncosVacaciones) if r.MesesTruncosVacaciones is not None else None,
-                "SaldoImporteVacaciones": float(r.SaldoImporteVacaciones) if r.SaldoImporteVacaciones is not None else None,
-                "PKIDSituacionRegistro": r.PKIDSituacionRegistro,
-                "SituacionRegistro": r.SituacionRegistro,
-                "FechaCese": r.FechaCese.isoformat() if r.FechaCese else None,
-            })
-        return data
+        if formato == "columnar":
+            return COLUMNAR.response(cur.description, cur.fetchall())
+        return rows_response(cur)
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ---------- Cálculo masivo (services/vacation_engine.py) ----------
+@router.post("/calcular", dependencies=[Depends(get_current_user)])
+def calcular_control(payload: CalcularVacaciones):
+    """
+    Devengue de vacaciones de todos los trabajadores de la empresa para el
+    mes (o rango de meses): upsert de ControlVacacional por trabajador/mes y
+    de los periodos del último mes. Con Simular devuelve las filas sin grabar.
+    """
+    hasta = (payload.AnoHasta or payload.Ano, payload.MesHasta or payload.Mes)
+    meses = vacation_engine.month_range((payload.Ano, payload.Mes), hasta)
+    if not all(1 <= m <= 12 for m in (payload.Mes, hasta[1])) or not meses:
+        raise HTTPException(status_code=400, detail="Rango de meses inválido.")
+    if len(meses) > MAX_MESES_CALCULO:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_MESES_CALCULO} meses por cálculo.")
+    # VacacionCorrida guarda un (Ano, Mes) por trabajador: en un rango los
+    # meses intermedios no quedarían registrados y se saltarían después
+    if payload.Incremental and len(meses) > 1:
+        raise HTTPException(status_code=400, detail="El cálculo incremental es de un solo mes.")
+    t0 = time.perf_counter()
+    try:
+        conn = get_connection()
+        inputs = vacation_engine.load_inputs(conn, payload.PKIDEmpresa, meses, payload.DiasPorAno)
+        huellas = vacation_engine.fingerprints(inputs)
+        total = len(inputs.trabajadores)
+        if payload.Incremental:
+            cambiados = vacation_engine.changed(conn, inputs, huellas)
+            inputs = vacation_engine.subset(inputs, cambiados)
+            huellas = huellas[cambiados]
+        result = vacation_engine.compute(inputs)
+        out = {"trabajadores": total, "recalculados": len(inputs.trabajadores), "meses": len(meses)}
+        if payload.Simular:
+            out["filas"] = result.rows()
+            out["periodos"] = result.period_rows()
+        elif len(inputs.trabajadores):
+            out.update(vacation_engine.save(conn, result, payload.PKIDSituacionRegistro, huellas))
+        out["segundos"] = round(time.perf_counter() - t0, 2)
+        return json_response(out)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -4,10 +4,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/control-vacacional-combos", tags=["ControlVacacionalCombos"])
 
 @router.get("/trabajador/", dependencies=[Depends(get_current_user)])
+@ref_cached("Trabajador")
 def combo_trabajador(empresaId: int = Query(..., description="Filtrar por empresa")):
     try:
         conn = get_connection()
@@ -23,6 +25,7 @@ def combo_trabajador(empresaId: int = Query(..., description="Filtrar por empres
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
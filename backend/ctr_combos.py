@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Depends
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/ctr-combos", tags=["Combos CTR"])
 
 @router.get("/empresas", dependencies=[Depends(get_current_user)])
+@ref_cached("Empresa")
 def combo_empresas():
     conn = get_connection()
     cur = conn.cursor()
@@ -18,6 +20,7 @@ def combo_empresas():
         conn.close()
 
 @router.get("/nominas", dependencies=[Depends(get_current_user)])
+@ref_cached("Nomina")
 def combo_nominas():
     conn = get_connection()
     cur = conn.cursor()
@@ -30,6 +33,7 @@ def combo_nominas():
         conn.close()
 
 @router.get("/categorias", dependencies=[Depends(get_current_user)])
+@ref_cached("CategoriaTrabajador")
 def combo_categorias():
     conn = get_connection()
     cur = conn.cursor()
@@ -42,6 +46,7 @@ def combo_categorias():
         conn.close()
 
 @router.get("/situaciones", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situaciones():
     conn = get_connection()
     cur = conn.cursor()
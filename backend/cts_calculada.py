@@ -1,11 +1,16 @@
 # backend/cts_calculada.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Literal, Optional
+import time
 import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import cts_engine
+from services.columnar import Columnar
+from services.keyset import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from services.serialize import json_response, rows_response, serializer
 
 router = APIRouter(prefix="/cts-calculada", tags=["CTSCalculada"])
 
@@ -41,9 +46,36 @@ class CTSCalculadaCreate(BaseModel):
 class CTSCalculadaUpdate(CTSCalculadaCreate):
     PKID: int
 
+class CalcularCTS(BaseModel):
+    PKIDPeriodoCTS: int
+    TipoCambioUSD: Optional[float] = None
+    ConceptosGratificacion: List[int] = []              # IDConceptoPlanilla de gratificaciones
+    DiasNoComputables: Dict[int, int] = {}              # PKIDTrabajador -> días
+    Regimen: int = 1                                    # para quien no tiene CTS anterior
+    PorcentajeRegimen: Dict[int, float] = {}            # p. ej. {2: 50}
+    PKIDBanco: Optional[int] = None                     # por defecto, si no hay CTS anterior
+    PKIDMoneda: Optional[int] = None
+    PKIDSituacionRegistro: int
+    Simular: bool = False
+
 # --------- Listar con joins (filtro empresa) ---------
+# PKIDEmpresa solo sirve de filtro; no va en la respuesta
+_DROP = ("PKIDEmpresa",)
+COLUMNAR = Columnar(drop=_DROP)
+
+# mismo orden que el listado; PKID desempata. NombreCompleto puede ser NULL
+KEYSET = Keyset(
+    [("p.Ano", True), ("p.Mes", True), ("ISNULL(t.NombreCompleto, '')", False), ("c.PKID", False)],
+    key=lambda r: (r.Ano, r.Mes, r.Trabajador or "", r.PKID),
+)
+
 @router.get("/", dependencies=[Depends(get_current_user)])
-def listar_cts(empresaId: Optional[int] = Query(None)):
+def listar_cts(
+    empresaId: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Con cursor o limit devuelve {items, next_cursor, limit}"),
+    formato: Optional[Literal["columnar"]] = Query(None, alias="format", description="columnar: nombres una vez y un arreglo por columna"),
+):
     try:
         conn = get_connection()
         cur = conn.cursor()
@@ -76,43 +108,59 @@ def listar_cts(empresaId: Optional[int] = Query(None)):
             params = (empresaId, empresaId)
         else:
             params = ()
+        if cursor is not None or limit is not None:
+            limit = limit or DEFAULT_LIMIT
+            params = list(params)
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                sql += (" AND " if empresaId else " WHERE ") + cond
+            sql += KEYSET.order_by() + KEYSET.fetch(params, limit)
+            cur.execute(sql, params)
+            if formato == "columnar":
+                rows, next_cursor = KEYSET.split(cur.fetchall(), limit)
+                return COLUMNAR.response(cur.description, rows, next_cursor=next_cursor, limit=limit)
+            return json_response(KEYSET.page(cur.fetchall(), limit, serializer(cur.description, _DROP).dict))
         sql += " ORDER BY p.Ano DESC, p.Mes DESC, t.NombreCompleto"
         cur.execute(sql, params)
-        rows = cur.fetchall()
-        out = []
-        for r in rows:
-            out.append({
-                "PKID": r.PKID,
-                "PKIDPeriodoCTS": r.PKIDPeriodoCTS,
-                "Ano": r.Ano, "Mes": r.Mes,
-                "PKIDTrabajador": r.PKIDTrabajador, "Trabajador": r.Trabajador,
-                "PKIDBanco": r.PKIDBanco, "Banco": r.Banco,
-                "CuentaBancariaCTS": r.CuentaBancariaCTS,
-                "BaseImponibleCTS": float(r.BaseImponibleCTS) if r.BaseImponibleCTS is not None else None,
-                "ImportesCTSSoles": float(r.ImportesCTSSoles) if r.ImportesCTSSoles is not None else None,
-                "ImporteCTSUSD": float(r.ImporteCTSUSD) if r.ImporteCTSUSD is not None else None,
-                "PKIDMoneda": r.PKIDMoneda, "Moneda": r.Moneda,
-                "TipoCambioUSD": float(r.TipoCambioUSD) if r.TipoCambioUSD is not None else None,
-                "FechaInicio": r.FechaInicio.isoformat() if r.FechaInicio else None,
-                "FechaTermino": r.FechaTermino.isoformat() if r.FechaTermino else None,
-                "AnoTiempoServicio": r.AnoTiempoServicio,
-                "MesTiempoServicio": r.MesTiempoServicio,
-                "DiaTiempServicio": r.DiaTiempServicio,
-                "DiasLiquidados": r.DiasLiquidados,
-                "Regimen": r.Regimen,
-                "PorcentajeCTS": float(r.PorcentajeCTS) if r.PorcentajeCTS is not None else None,
-                "ImporteNoComputable": float(r.ImporteNoComputable) if r.ImporteNoComputable is not None else None,
-                "FechaIngresoTrabajador": r.FechaIngresoTrabajador.isoformat() if r.FechaIngresoTrabajador else None,
-                "DescuentoCTS": float(r.DescuentoCTS) if r.DescuentoCTS is not None else None,
-                "ImporteProvisionCTS": float(r.ImporteProvisionCTS) if r.ImporteProvisionCTS is not None else None,
-                "DiferenciaProvisionCalculoCTS": float(r.DiferenciaProvisionCalculoCTS) if r.DiferenciaProvisionCalculoCTS is not None else None,
-                "InteresesSoles": float(r.InteresesSoles) if r.InteresesSoles is not None else None,
-                "DiasNoComputables": r.DiasNoComputables,
-                "DiasIntereses": r.DiasIntereses,
-                "PKIDSituacionRegistro": r.PKIDSituacionRegistro,
-                "SituacionRegistro": r.SituacionRegistro,
-            })
-        return out
+        if formato == "columnar":
+            return COLUMNAR.response(cur.description, cur.fetchall())
+        return rows_response(cur, drop=_DROP)
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# --------- Cálculo masivo del periodo ---------
+@router.post("/calcular", dependencies=[Depends(get_current_user)])
+def calcular_cts(payload: CalcularCTS):
+    """
+    Calcula la CTS de todos los trabajadores con contrato en el semestre del
+    PeriodoCTS (services/cts_engine.py) y hace upsert de CTSCalculada y sus
+    conceptos. Con Simular devuelve las filas sin grabar.
+    """
+    if payload.Regimen not in (1, 2):
+        raise HTTPException(status_code=400, detail="Regimen inválido (solo 1 o 2).")
+    t0 = time.perf_counter()
+    try:
+        conn = get_connection()
+        inputs, _, bancos = cts_engine.load_inputs(
+            conn, payload.PKIDPeriodoCTS, gratificacion=payload.ConceptosGratificacion,
+            tipo_cambio=payload.TipoCambioUSD, regimen=payload.Regimen,
+            dias_no_computables=payload.DiasNoComputables, porcentajes=payload.PorcentajeRegimen,
+        )
+        result = cts_engine.compute(inputs)
+        out = {
+            "trabajadores": int(len(inputs.trabajadores)),
+            "calculados": int(result.elegible.sum()),
+            "importe_total": round(float(result.columnas["ImportesCTSSoles"][result.elegible].sum()), 2),
+        }
+        if payload.Simular:
+            out["filas"] = result.rows()
+        else:
+            out.update(cts_engine.save(conn, result, bancos, payload.PKIDBanco, payload.PKIDMoneda,
+                                       payload.PKIDSituacionRegistro))
+        out["segundos"] = round(time.perf_counter() - t0, 2)
+        return json_response(out)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -4,10 +4,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/cts-calculada-combos", tags=["CTSCalculadaCombos"])
 
 @router.get("/periodocts/", dependencies=[Depends(get_current_user)])
+@ref_cached("PeriodoCTS")
 def combo_periodocts(empresaId: int = Query(...)):
     try:
         conn = get_connection()
@@ -23,6 +25,7 @@ def combo_periodocts(empresaId: int = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trabajador/", dependencies=[Depends(get_current_user)])
+@ref_cached("Trabajador")
 def combo_trabajador(empresaId: int = Query(...)):
     try:
         conn = get_connection()
@@ -38,6 +41,7 @@ def combo_trabajador(empresaId: int = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/banco/", dependencies=[Depends(get_current_user)])
+@ref_cached("Banco")
 def combo_banco():
     try:
         conn = get_connection()
@@ -48,6 +52,7 @@ def combo_banco():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/moneda/", dependencies=[Depends(get_current_user)])
+@ref_cached("Moneda")
 def combo_moneda():
     try:
         conn = get_connection()
@@ -58,6 +63,7 @@ def combo_moneda():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
@@ -68,6 +74,7 @@ def combo_situacion():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/concepto-planilla/", dependencies=[Depends(get_current_user)])
+@ref_cached("ConceptoPlanilla")
 def combo_concepto_planilla():
     try:
         conn = get_connection()
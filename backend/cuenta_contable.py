@@ -6,6 +6,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/cuenta-contable", tags=["CuentaContable"])
 
@@ -104,6 +105,7 @@ def crear(body: CuentaContableCreate):
         ))
         new_id = cur.fetchone()[0]
         conn.commit()
+        ref_cache.invalidate("CuentaContable")
         return {"PKID": new_id}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -155,6 +157,7 @@ def actualizar(
             conn.rollback()
             raise HTTPException(status_code=404, detail="Cuenta no encontrada.")
         conn.commit()
+        ref_cache.invalidate("CuentaContable")
         return {"ok": True}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -174,6 +177,7 @@ def eliminar(PKID: int = Path(..., description="PKID de CuentaContable")):
             conn.rollback()
             raise HTTPException(status_code=404, detail="Cuenta no encontrada.")
         conn.commit()
+        ref_cache.invalidate("CuentaContable")
         return {"ok": True}
     except pyodbc.Error as ex:
         conn.rollback()
@@ -1,11 +1,14 @@
 # backend/cuenta_corriente_planillas.py
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.columnar import Columnar
+from services.keyset import Keyset, DEFAULT_LIMIT, MAX_LIMIT
+from services.serialize import json_response, rows_response, serializer
 
 router = APIRouter(prefix="/cuenta-corriente-planillas", tags=["CuentaCorrientePlanillas"])
 
@@ -31,8 +34,21 @@ class CCPCreate(BaseModel):
 class CCPUpdate(CCPCreate):
     PKID: int
 
+COLUMNAR = Columnar()
+
+# mismo orden que el listado; PKID desempata
+KEYSET = Keyset(
+    [("c.FechaEmision", True), ("c.IDCuentaCorrientePlanillas", True), ("c.PKID", True)],
+    key=lambda r: (r.FechaEmision, r.IDCuentaCorrientePlanillas, r.PKID),
+)
+
 @router.get("/", dependencies=[Depends(get_current_user)])
-def listar(empresaId: Optional[int] = Query(None)):
+def listar(
+    empresaId: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Con cursor o limit devuelve {items, next_cursor, limit}"),
+    formato: Optional[Literal["columnar"]] = Query(None, alias="format", description="columnar: nombres una vez y un arreglo por columna"),
+):
     try:
         conn = get_connection()
         cur = conn.cursor()
@@ -61,38 +77,23 @@ def listar(empresaId: Optional[int] = Query(None)):
         if empresaId:
             sql += " WHERE t.PKIDEmpresa = ?"
             params = (empresaId,)
+        if cursor is not None or limit is not None:
+            limit = limit or DEFAULT_LIMIT
+            params = list(params)
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                sql += (" AND " if empresaId else " WHERE ") + cond
+            sql += KEYSET.order_by() + KEYSET.fetch(params, limit)
+            cur.execute(sql, params)
+            if formato == "columnar":
+                rows, next_cursor = KEYSET.split(cur.fetchall(), limit)
+                return COLUMNAR.response(cur.description, rows, next_cursor=next_cursor, limit=limit)
+            return json_response(KEYSET.page(cur.fetchall(), limit, serializer(cur.description).dict))
         sql += " ORDER BY c.FechaEmision DESC, c.IDCuentaCorrientePlanillas DESC"
         cur.execute(sql, params)
-        rows = cur.fetchall()
-        out = []
-        for r in rows:
-            out.append({
-                "PKID": r.PKID,
-                "IDCuentaCorrientePlanillas": r.IDCuentaCorrientePlanillas,
-                "PKIDTrabajador": r.PKIDTrabajador,
-                "Trabajador": r.Trabajador,
-                "DocumentoReferencia": r.DocumentoReferencia,   # <- corregido
-                "GlosaReferencia": r.GlosaReferencia,
-                "FechaEmision": r.FechaEmision.isoformat() if r.FechaEmision else None,
-                "FechaVencimiento": r.FechaVencimiento.isoformat() if r.FechaVencimiento else None,
-                "PKIDMoneda": r.PKIDMoneda,
-                "Moneda": r.Moneda,
-                "ImporteDocumento": float(r.ImporteDocumento) if r.ImporteDocumento is not None else None,
-                "ImporteAbono": float(r.ImporteAbono) if r.ImporteAbono is not None else None,
-                "ImporteSaldo": float(r.ImporteSaldo) if r.ImporteSaldo is not None else None,
-                "NumeroCuotas": r.NumeroCuotas,
-                "TasaInteres": float(r.TasaInteres) if r.TasaInteres is not None else None,
-                "IndicadorControlCheck": bool(r.IndicadorControlCheck) if r.IndicadorControlCheck is not None else None,
-                "PKIDSituacionRegistro": r.PKIDSituacionRegistro,
-                "SituacionRegistro": r.SituacionRegistro,
-                "PKIDConceptoPlanilla": r.PKIDConceptoPlanilla,
-                "ConceptoPlanilla": r.ConceptoPlanilla,
-                "PKIDCuentaContable": r.PKIDCuentaContable,
-                "CuentaContable": r.CuentaContable,
-                "PKIDTipoComprobante": r.PKIDTipoComprobante,
-                "TipoComprobante": r.TipoComprobante,
-            })
-        return out
+        if formato == "columnar":
+            return COLUMNAR.response(cur.description, cur.fetchall())
+        return rows_response(cur)
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
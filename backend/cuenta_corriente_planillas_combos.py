@@ -4,10 +4,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/ccp-combos", tags=["CuentaCorrientePlanillas-Combos"])
 
 @router.get("/trabajador/", dependencies=[Depends(get_current_user)])
+@ref_cached("Trabajador")
 def combo_trabajador(empresaId: int = Query(...)):
     try:
         conn = get_connection()
@@ -23,6 +25,7 @@ def combo_trabajador(empresaId: int = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/moneda/", dependencies=[Depends(get_current_user)])
+@ref_cached("Moneda")
 def combo_moneda():
     try:
         conn = get_connection()
@@ -33,6 +36,7 @@ def combo_moneda():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
@@ -43,6 +47,7 @@ def combo_situacion():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/concepto-planilla/", dependencies=[Depends(get_current_user)])
+@ref_cached("ConceptoPlanilla")
 def combo_concepto_planilla():
     try:
         conn = get_connection()
@@ -53,6 +58,7 @@ def combo_concepto_planilla():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/cuenta-contable/", dependencies=[Depends(get_current_user)])
+@ref_cached("CuentaContable")
 def combo_cuenta_contable():
     try:
         conn = get_connection()
@@ -63,6 +69,7 @@ def combo_cuenta_contable():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tipo-comprobante/", dependencies=[Depends(get_current_user)])
+@ref_cached("TipoComprobante")
 def combo_tipo_comprobante():
     try:
         conn = get_connection()
@@ -73,6 +80,7 @@ def combo_tipo_comprobante():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tipo-planilla/", dependencies=[Depends(get_current_user)])
+@ref_cached("TipoPlanilla")
 def combo_tipo_planilla():
     try:
         conn = get_connection()
@@ -83,6 +91,7 @@ def combo_tipo_planilla():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/nomina/", dependencies=[Depends(get_current_user)])
+@ref_cached("Nomina")
 def combo_nomina():
     try:
         conn = get_connection()
@@ -1,11 +1,13 @@
 # backend/cuenta_corriente_planillas_cuotas.py
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
+from datetime import date
 import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import ccp_cuotas
 
 router = APIRouter(prefix="/ccp-cuotas", tags=["CuentaCorrientePlanillasCuotas"])
 
@@ -31,6 +33,31 @@ class CCPCreate(BaseModel):
 class CCPEdit(CCPCreate):
     PKID: int
 
+class GenerarCuotas(BaseModel):
+    # vacíos: se toman de las cuotas que ya tiene el préstamo (ver services/ccp_cuotas.py)
+    PKIDNomina: Optional[int] = None
+    PKIDTipoPlanilla: Optional[int] = None
+    Frecuencia: Optional[Literal["mensual", "semanal"]] = None
+    FechaInicio: Optional[date] = None      # fecha de la primera cuota nueva
+    PKIDSituacionRegistro: Optional[int] = None
+    Simular: bool = False
+
+class RegenerarCuotas(GenerarCuotas):
+    PKIDs: Optional[List[int]] = None       # préstamos; o todos los que tienen saldo en empresaId
+    empresaId: Optional[int] = None
+    TasaInteres: Optional[float] = None     # nueva tasa (%), se graba en la cabecera
+
+class AplicarCuotas(BaseModel):
+    PKIDEmpresa: int
+    PKIDNomina: int
+    ano: int
+    mes: int
+    Semana: Optional[int] = None            # con Semana: cuotas semanales hasta esa semana
+    PKIDTipoPlanilla: Optional[int] = None
+    RespetarNeto: bool = True               # tope: neto del trabajador en la planilla del periodo
+    TipoPago: Optional[str] = None          # char(3)
+    Simular: bool = False
+
 @router.get("/", dependencies=[Depends(get_current_user)])
 def listar(ccId: int = Query(...)):
     try:
@@ -112,6 +139,68 @@ def crear(payload: CCPCreate):
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generar/{ccId}", dependencies=[Depends(get_current_user)])
+def generar(ccId: int, payload: GenerarCuotas):
+    """Cronograma completo del préstamo; reemplaza sus cuotas pendientes salvo con Simular."""
+    try:
+        conn = get_connection()
+        out = ccp_cuotas.regenerate(
+            conn, [ccId], nomina=payload.PKIDNomina, tipo_planilla=payload.PKIDTipoPlanilla,
+            frecuencia=payload.Frecuencia, fecha_inicio=payload.FechaInicio,
+            situacion=payload.PKIDSituacionRegistro, simular=payload.Simular, detalle=True,
+        )
+        if out["omitidos"]:
+            motivo = out["omitidos"][0]["motivo"]
+            raise HTTPException(status_code=404 if motivo == "No existe" else 400, detail=motivo)
+        return {"cuotas": out["detalle"], "segundos": out["segundos"]}
+    except HTTPException:
+        raise
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/regenerar", dependencies=[Depends(get_current_user)])
+def regenerar(payload: RegenerarCuotas):
+    """Regeneración masiva (p. ej. tras un cambio de tasa); devuelve totales y omitidos."""
+    if not payload.PKIDs and not payload.empresaId:
+        raise HTTPException(status_code=400, detail="Indique PKIDs o empresaId.")
+    try:
+        conn = get_connection()
+        ids = payload.PKIDs
+        if not ids:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT c.PKID
+                FROM CuentaCorrientePlanillas c
+                INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
+                WHERE t.PKIDEmpresa = ?
+                  AND ISNULL(c.ImporteSaldo, c.ImporteDocumento - ISNULL(c.ImporteAbono, 0)) > 0
+            """, (payload.empresaId,))
+            ids = [r[0] for r in cur.fetchall()]
+            cur.close()
+        return ccp_cuotas.regenerate(
+            conn, ids, tasa=payload.TasaInteres, nomina=payload.PKIDNomina,
+            tipo_planilla=payload.PKIDTipoPlanilla, frecuencia=payload.Frecuencia,
+            fecha_inicio=payload.FechaInicio, situacion=payload.PKIDSituacionRegistro,
+            simular=payload.Simular,
+        )
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/aplicar", dependencies=[Depends(get_current_user)])
+def aplicar(payload: AplicarCuotas):
+    """Aplica todas las cuotas vencidas del periodo y actualiza abono/saldo de los préstamos."""
+    try:
+        conn = get_connection()
+        return ccp_cuotas.apply_period(
+            conn, payload.PKIDEmpresa, payload.PKIDNomina, payload.ano, payload.mes,
+            semana=payload.Semana, tipo_planilla=payload.PKIDTipoPlanilla,
+            respetar_neto=payload.RespetarNeto, tipo_pago=payload.TipoPago, simular=payload.Simular,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{pkid}", dependencies=[Depends(get_current_user)])
 def actualizar(pkid: int, payload: CCPEdit):
     try:
@@ -1,43 +1,50 @@
 # backend/dashboard.py
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import numpy as np
 import pyodbc
-from database import get_connection
 from security import get_current_user
+from services.dashboard_aggregates import dashboard_aggregates
+from services.pivot import pivot, top_n
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-def fetch(query: str, params: tuple) -> List[dict]:
-    conn = get_connection(); cur = conn.cursor()
-    try:
-        cur.execute(query, params)
-        cols = [c[0] for c in cur.description]
-        return [dict(zip(cols, r)) for r in cur.fetchall()]
-    finally:
-        cur.close(); conn.close()
+MAX_ANOS = 10
 
-def build_series(rows: List[dict], key_field: str, value_field: str) -> Dict[str, Any]:
+def build_series(rows: List[dict], key_field: str, value_field: str, top: Optional[int] = None) -> Dict[str, Any]:
     """
     Estructura para gráficos apilados: labels = meses, series = [{label, data[mes]}]
-    rows: [{Ano, Mes, key_field, value_field}]
+    rows: [{mes, key_field, value_field}]
+    Pivot vectorizado (services/pivot.py); con top se dejan los N labels de mayor suma.
     """
-    # Meses presentes (1..12, ordenados)
-    months = sorted(sorted({int(r["mes"]) for r in rows}))
-    # Agrupar por key_field (ConceptoPlanilla o NombreCompleto)
-    groups: Dict[str, Dict[int, float]] = {}
-    for r in rows:
-        key = str(r[key_field])
-        mes = int(r["mes"])
-        valor = float(r[value_field] or 0)
-        groups.setdefault(key, {})
-        groups[key][mes] = groups[key].get(mes, 0) + valor
-
-    series = []
-    for key, per_month in groups.items():
-        data = [per_month.get(m, 0.0) for m in months]
-        series.append({"label": key, "data": data})
+    labels, (months,), matrix = pivot(
+        [str(r[key_field]) for r in rows],
+        [float(r[value_field] or 0) for r in rows],
+        [int(r["mes"]) for r in rows],
+    )
+    keep = top_n(matrix, top) if top is not None else slice(None)
+    series = [{"label": k, "data": d} for k, d in zip(labels[keep].tolist(), matrix[keep].tolist())]
+    return {"labels": months.tolist(), "series": series}
 
-    return {"labels": months, "series": series}
+def build_multi_year_series(rows: List[dict], top: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Varios años lado a lado: labels = meses, anos = años,
+    series = [{label, ano, data[mes]}] sobre una matriz label x año x mes.
+    """
+    labels, (anos, months), cube = pivot(
+        [r["label"] for r in rows],
+        [r["valor"] for r in rows],
+        [r["ano"] for r in rows],
+        [r["mes"] for r in rows],
+    )
+    keep = top_n(cube, top) if top is not None else np.arange(len(labels))
+    anos_l, labels_l = anos.tolist(), labels.tolist()
+    series = [
+        {"label": labels_l[i], "ano": ano, "data": cube[i, j].tolist()}
+        for i in keep.tolist() for j, ano in enumerate(anos_l)
+    ]
+    totales = cube.sum(axis=(0, 2)).tolist()
+    return {"labels": months.tolist(), "anos": anos_l, "totales": dict(zip(anos_l, totales)), "series": series}
 
 @router.get("/ingresos-por-concepto")
 def ingresos_por_concepto(
@@ -47,19 +54,11 @@ def ingresos_por_concepto(
 ):
     """
     Gráfico 1: Ingreso Mensual por Conceptos
-    """
-    q = """
-    SELECT ano, mes, ConceptoPlanilla, SUM(Trabajador) AS Ingresos
-    FROM RevisaPlanillaCalculada
-    WHERE IdEmpresa = ? AND Ano = ?
-      AND IDConceptoPlanilla BETWEEN 1000 AND 2999
-      AND IDTrabajador <> 9999999
-    GROUP BY ano, mes, ConceptoPlanilla
-    ORDER BY ano, mes, ConceptoPlanilla
+    (desde los agregados mensuales en memoria; ver services/dashboard_aggregates.py)
     """
     try:
-        rows = fetch(q, (empresa, ano))
-        return build_series(rows, key_field="ConceptoPlanilla", value_field="Ingresos")
+        rows = dashboard_aggregates.conceptos_rows(empresa, ano)
+        return build_series(rows, key_field="label", value_field="valor")
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -72,25 +71,49 @@ def ingresos_por_trabajador(
 ):
     """
     Gráfico 2: Ingreso Mensual por Trabajador (top N por suma anual)
+    El ranking anual se mantiene al refrescar cada mes; aquí solo se toma el top N.
     """
-    q = """
-    SELECT ano, mes, NombreCompleto, SUM(Trabajador) AS Ingresos
-    FROM RevisaPlanillaCalculada
-    WHERE IdEmpresa = ? AND Ano = ?
-      AND IDConceptoPlanilla BETWEEN 1000 AND 2999
-      AND IDTrabajador <> 9999999
-    GROUP BY ano, mes, NombreCompleto
-    ORDER BY ano, mes, NombreCompleto
-    """
     try:
-        rows = fetch(q, (empresa, ano))
-        # Top N por total anual
-        totales: Dict[str, float] = {}
-        for r in rows:
-            k = str(r["NombreCompleto"])
-            totales[k] = totales.get(k, 0.0) + float(r["Ingresos"] or 0)
-        top_keys = {k for k, _ in sorted(totales.items(), key=lambda x: x[1], reverse=True)[:top]}
-        rows_top = [r for r in rows if r["NombreCompleto"] in top_keys]
-        return build_series(rows_top, key_field="NombreCompleto", value_field="Ingresos")
+        rows = dashboard_aggregates.trabajadores_rows(empresa, ano, top)
+        return build_series(rows, key_field="label", value_field="valor")
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/aggregates-stats")
+def aggregates_stats(user: dict = Depends(get_current_user)):
+    return dashboard_aggregates.stats()
+
+
+# ---------------------------
+# Comparativo multi-año (una consulta para todos los años que falten)
+# ---------------------------
+def _anos(anos: List[int]) -> List[int]:
+    anos = sorted(set(anos))
+    if len(anos) > MAX_ANOS:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_ANOS} años por consulta")
+    return anos
+
+@router.get("/ingresos-por-concepto/multi-ano")
+def ingresos_por_concepto_multi_ano(
+    empresa: int = Query(..., alias="IDEmpresa"),
+    anos: List[int] = Query(..., alias="Ano", description="Repetir: ?Ano=2023&Ano=2024"),
+    user: dict = Depends(get_current_user)
+):
+    try:
+        rows = dashboard_aggregates.multi_year_rows(empresa, _anos(anos), "conceptos")
+        return build_multi_year_series(rows)
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingresos-por-trabajador/multi-ano")
+def ingresos_por_trabajador_multi_ano(
+    empresa: int = Query(..., alias="IDEmpresa"),
+    anos: List[int] = Query(..., alias="Ano", description="Repetir: ?Ano=2023&Ano=2024"),
+    top: int = Query(10, ge=1, le=50, description="Top N por suma de los años pedidos"),
+    user: dict = Depends(get_current_user)
+):
+    try:
+        rows = dashboard_aggregates.multi_year_rows(empresa, _anos(anos), "trabajadores")
+        return build_multi_year_series(rows, top=top)
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
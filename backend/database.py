@@ -1,11 +1,313 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 
 import pyodbc
 
+CONNECTION_STRING = os.getenv(
+    "DB_CONNECTION_STRING",
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=MORTY\MSSQLSERVER2025;"
+    "DATABASE=dbone;"
+    "UID=sa;"
+    "PWD=coder"
+)
+
+# ---------------------------
+# Configuración del pool
+# ---------------------------
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "15"))            # segundos esperando una conexión libre
+POOL_MAX_USES = int(os.getenv("DB_POOL_MAX_USES", "500"))           # reciclar tras N préstamos
+POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))  # reciclar tras N segundos
+POOL_HEALTH_CHECK = "SELECT 1"
+
+
+class PoolTimeout(pyodbc.OperationalError):
+    """No hubo conexión libre dentro de POOL_TIMEOUT (los routers ya mapean pyodbc.Error)."""
+
+
+class _Slot:
+    __slots__ = ("raw", "created_at", "uses", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """
+    Envoltura de la conexión pyodbc prestada por el pool.
+    close() la devuelve al pool en lugar de cerrarla; también funciona como
+    context manager. Si un router olvida cerrar, el GC la devuelve igualmente.
+    """
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+        self._borrowed_at = time.monotonic()
+
+    def __getattr__(self, name):
+        slot = self.__dict__.get("_slot")
+        if slot is None:
+            raise pyodbc.ProgrammingError("La conexión ya fue devuelta al pool.")
+        return getattr(slot.raw, name)
+
+    def close(self):
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._pool._release(slot, time.monotonic() - self._borrowed_at)
+
+    def invalidate(self):
+        """Descarta la conexión física (p. ej. tras un error de comunicación)."""
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._pool._release(slot, time.monotonic() - self._borrowed_at, broken=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        factory,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        timeout=POOL_TIMEOUT,
+        max_uses=POOL_MAX_USES,
+        max_lifetime=POOL_MAX_LIFETIME,
+        health_check=POOL_HEALTH_CHECK,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Tamaños de pool inválidos")
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # LIFO: la conexión más caliente sale primero
+        self._size = 0            # conexiones físicas abiertas (idle + en uso)
+        self._in_use = 0
+        self._waiting = 0
+
+        # métricas
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._broken = 0
+        self._wait_total = 0.0
+        self._wait_samples = deque(maxlen=2048)
+        self._hold_samples = deque(maxlen=2048)
+
+        for _ in range(min_size):
+            try:
+                self._idle.append(_Slot(self._factory()))
+                self._size += 1
+            except pyodbc.Error:
+                break  # el servidor puede no estar disponible al arrancar; se reintenta al pedir
+
+    # ---------- préstamo ----------
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            slot = None
+            create = False
+            with self._cond:
+                while True:
+                    if self._idle:
+                        slot = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Pool de conexiones agotado ({self.max_size} en uso) tras {timeout:.1f}s"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                self._in_use += 1
+
+            if create:
+                try:
+                    slot = _Slot(self._factory())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(slot):
+                self._discard(slot)
+                continue
+
+            slot.uses += 1
+            waited = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_samples.append(waited)
+            return PooledConnection(self, slot)
+
+    def _is_usable(self, slot):
+        now = time.monotonic()
+        if (self.max_lifetime and now - slot.created_at > self.max_lifetime) or \
+                (self.max_uses and slot.uses >= self.max_uses):
+            with self._cond:
+                self._recycled += 1
+            return False
+        if self.health_check:
+            try:
+                cur = slot.raw.cursor()
+                cur.execute(self.health_check)
+                cur.fetchall()
+                cur.close()
+            except pyodbc.Error:
+                with self._cond:
+                    self._broken += 1
+                return False
+        return True
+
+    def _discard(self, slot):
+        try:
+            slot.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    # ---------- devolución ----------
+    def _release(self, slot, held, broken=False):
+        if not broken:
+            try:
+                # Deja la conexión limpia: lo no confirmado se descarta, igual que al cerrar.
+                slot.raw.rollback()
+            except pyodbc.Error:
+                broken = True
+        if broken:
+            with self._cond:
+                self._broken += 1
+            self._discard(slot)
+        else:
+            slot.last_used = time.monotonic()
+            with self._cond:
+                self._in_use -= 1
+                self._idle.append(slot)
+                self._cond.notify()
+        with self._cond:
+            self._hold_samples.append(held)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for slot in idle:
+            try:
+                slot.raw.close()
+            except Exception:
+                pass
+
+    # ---------- métricas ----------
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def stats(self):
+        with self._cond:
+            waits = list(self._wait_samples)
+            holds = list(self._hold_samples)
+            checkouts = self._checkouts
+            data = {
+                "size": self._size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "broken": self._broken,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+            }
+        data["wait_time_avg_ms"] = round(self._wait_total * 1000 / checkouts, 3) if checkouts else 0.0
+        data["checkout_p50_ms"] = round(self._percentile(waits, 50) * 1000, 3)
+        data["checkout_p99_ms"] = round(self._percentile(waits, 99) * 1000, 3)
+        data["hold_p99_ms"] = round(self._percentile(holds, 99) * 1000, 3)
+        return data
+
+
+def _connect():
+    return pyodbc.connect(CONNECTION_STRING)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect)
+    return _pool
+
+
 def get_connection():
-    return pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=MORTY\MSSQLSERVER2025;"
-        "DATABASE=dbone;"
-        "UID=sa;"
-        "PWD=coder"
-    )
+    """Conexión prestada por el pool; conn.close() la devuelve."""
+    return get_pool().acquire()
+
+
+@contextmanager
+def connection(timeout=None):
+    """
+    with connection() as conn:
+        cur = conn.cursor()
+        ...
+    La conexión vuelve al pool aunque el bloque lance una excepción.
+    """
+    conn = get_pool().acquire(timeout)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    return get_pool().stats()
@@ -4,10 +4,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/deduccion-periodo-combos", tags=["DeduccionPeriodo-Combos"])
 
 @router.get("/concepto/", dependencies=[Depends(get_current_user)])
+@ref_cached("ConceptoPlanilla")
 def combo_concepto():
     try:
         conn = get_connection()
@@ -22,6 +24,7 @@ def combo_concepto():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/moneda/", dependencies=[Depends(get_current_user)])
+@ref_cached("Moneda")
 def combo_moneda():
     try:
         conn = get_connection()
@@ -32,6 +35,7 @@ def combo_moneda():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/hora/", dependencies=[Depends(get_current_user)])
+@ref_cached("HoraPlanilla")
 def combo_hora():
     try:
         conn = get_connection()
@@ -42,6 +46,7 @@ def combo_hora():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/", dependencies=[Depends(get_current_user)])
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
@@ -53,6 +58,7 @@ def combo_situacion():
 
 # ------- Hijo 1: Familia -------
 @router.get("/familia/", dependencies=[Depends(get_current_user)])
+@ref_cached("Familia")
 def combo_familia():
     try:
         conn = get_connection()
@@ -64,6 +70,7 @@ def combo_familia():
 
 # ------- Hijo 2: Nómina & Cuentas -------
 @router.get("/nomina/", dependencies=[Depends(get_current_user)])
+@ref_cached("Nomina")
 def combo_nomina():
     try:
         conn = get_connection()
@@ -78,6 +85,7 @@ def combo_nomina():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/cuenta-contable/", dependencies=[Depends(get_current_user)])
+@ref_cached("CuentaContable")
 def combo_cuenta_contable(empresaId: int = Query(...)):
     try:
         conn = get_connection()
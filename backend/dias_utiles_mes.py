@@ -6,9 +6,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.id_allocator import IdSequence
 
 router = APIRouter(prefix="/dias-utiles-mes", tags=["DiasUtilesMes"])
 
+PKID_SEQ = IdSequence("DiasUtilesMes", "PKID")
+
 # ---------- Schemas ----------
 class DiasUtilesMesBase(BaseModel):
     PKIDEmpresa: int
@@ -75,8 +78,7 @@ def crear(body: DiasUtilesMesCreate):
             raise HTTPException(status_code=400, detail="Ya existe un registro para esa empresa/año/mes.")
 
         # Generar PKID (la tabla no es IDENTITY)
-        cur.execute("SELECT ISNULL(MAX(PKID), 0) + 1 FROM DiasUtilesMes")
-        next_id = cur.fetchone()[0]
+        next_id = PKID_SEQ.next()
 
         cur.execute("""
             INSERT INTO DiasUtilesMes (
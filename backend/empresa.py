@@ -4,6 +4,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/empresa", tags=["Empresa"], dependencies=[Depends(get_current_user)])
 
@@ -107,6 +108,7 @@ def create_empresa(payload: dict):
             (str(payload["Siglas"]).strip() if payload.get("Siglas") not in (None, "") else None),
         ))
         conn.commit()
+        ref_cache.invalidate("Empresa")
         return {"detail": "Creado"}
 
     except HTTPException:
@@ -171,6 +173,7 @@ def update_empresa(pkid: int, payload: dict):
             pkid
         ))
         conn.commit()
+        ref_cache.invalidate("Empresa")
         return {"detail": "Actualizado"}
     except HTTPException:
         raise
@@ -190,6 +193,7 @@ def delete_empresa(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Empresa no encontrada.")
         conn.commit()
+        ref_cache.invalidate("Empresa")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
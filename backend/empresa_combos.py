@@ -4,10 +4,12 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(prefix="/empresa-combos", tags=["Empresa-Combos"], dependencies=[Depends(get_current_user)])
 
 @router.get("/regimen/")
+@ref_cached("RegimenTributario")
 def combo_regimen():
     try:
         conn = get_connection()
@@ -18,6 +20,7 @@ def combo_regimen():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sector/")
+@ref_cached("SectorEconomico")
 def combo_sector():
     try:
         conn = get_connection()
@@ -28,6 +31,7 @@ def combo_sector():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/")
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
@@ -38,6 +42,7 @@ def combo_situacion():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/otra-empresa/")
+@ref_cached("Empresa")
 def combo_otra_empresa(exclude_id: int | None = Query(default=None)):
     """
     Devuelve empresas para 'PKIDOtraEmpresa'. Si exclude_id viene,
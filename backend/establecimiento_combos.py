@@ -4,6 +4,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(
     prefix="/establecimiento-combos",
@@ -12,6 +13,7 @@ router = APIRouter(
 )
 
 @router.get("/empresa/")
+@ref_cached("Empresa")
 def combo_empresa():
     try:
         conn = get_connection()
@@ -22,6 +24,7 @@ def combo_empresa():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tipo-establecimiento/")
+@ref_cached("TipoEstablecimiento")
 def combo_tipo_establecimiento():
     try:
         conn = get_connection()
@@ -32,6 +35,7 @@ def combo_tipo_establecimiento():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/situacion/")
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
@@ -1,17 +1,14 @@
 # archivo: familia.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 
 from database import get_connection
 from security import get_current_user
+from services import count_cache, ref_cache
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
 
-# NUEVO: XLSX
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 router = APIRouter(
     prefix="/familia",
@@ -51,28 +48,19 @@ def list_familias(
     situacion_id: int | None = Query(default=None, description="Filtra por PKIDSituacionRegistro exacto"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
 ):
     try:
         conn = get_connection()
         cur = conn.cursor()
 
-        # Total
-        params_total = []
-        where_total = _build_where(params_total, id_familia, nombre, situacion_id)
-        sql_total = f"""
-            SELECT COUNT(1) AS total
-            FROM Familia f
-            LEFT JOIN SituacionRegistro sr ON f.PKIDSituacionRegistro = sr.PKID
-            {where_total}
-        """
-        cur.execute(sql_total, params_total)
-        total_row = cur.fetchone()
-        total = int(total_row.total) if total_row else 0
+        params = []
+        where = _build_where(params, id_familia, nombre, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "Familia", f"FROM Familia f {where}", params, count)
 
         # Página
         offset = (page - 1) * page_size
-        params = []
-        where = _build_where(params, id_familia, nombre, situacion_id)
         sql = f"""
             SELECT f.PKID, f.IDFamilia, f.Familia,
                    f.AcumulativaCheck, f.FijaCheck, f.CompuestaCheck,
@@ -83,11 +71,12 @@ def list_familias(
             ORDER BY f.IDFamilia
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
         """
-        params += [offset, page_size]
+        params += [offset, page_size + 1]
         cur.execute(sql, params)
-        items = [_row_to_dict(r) for r in cur.fetchall()]
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
 
-        return {"items": items, "total": total}
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,6 +116,8 @@ def create_familia(payload: dict):
             int(payload["PKIDSituacionRegistro"]),
         ))
         conn.commit()
+        count_cache.invalidate("Familia")
+        ref_cache.invalidate("Familia")
         return {"detail": "Creado"}
     except HTTPException:
         raise
@@ -175,6 +166,8 @@ def update_familia(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("Familia")
+        ref_cache.invalidate("Familia")
         return {"detail": "Actualizado"}
     except HTTPException:
         raise
@@ -195,6 +188,8 @@ def delete_familia(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Familia no encontrada.")
         conn.commit()
+        count_cache.invalidate("Familia")
+        ref_cache.invalidate("Familia")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -214,9 +209,6 @@ def export_familias_csv(
     Exporta los datos filtrados a CSV (Excel-compatible).
     """
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
         params = []
         where = _build_where(params, id_familia, nombre, situacion_id)
         sql = f"""
@@ -228,27 +220,19 @@ def export_familias_csv(
             {where}
             ORDER BY f.IDFamilia
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        # CSV en memoria
-        si = io.StringIO()
-        writer = csv.writer(si)
-        writer.writerow(["IDFamilia", "Familia", "Acumulativa", "Fija", "Compuesta", "Situacion"])
-        for r in rows:
-            writer.writerow([
+        # CSV en streaming (fetchmany + codificación por bloques)
+        return csv_response(
+            sql, params, "familias.csv",
+            header=["IDFamilia", "Familia", "Acumulativa", "Fija", "Compuesta", "Situacion"],
+            row=lambda r: [
                 r.IDFamilia,
                 r.Familia,
                 1 if r.AcumulativaCheck else 0,
                 1 if r.FijaCheck else 0,
                 1 if r.CompuestaCheck else 0,
                 r.SituacionRegistro,
-            ])
-        out = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {
-            "Content-Disposition": 'attachment; filename="familias.csv"'
-        }
-        return StreamingResponse(out, media_type="text/csv", headers=headers)
+            ],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -263,9 +247,6 @@ def export_familias_xlsx(
     Exporta los datos filtrados a XLSX (Excel nativo).
     """
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
         params = []
         where = _build_where(params, id_familia, nombre, situacion_id)
         sql = f"""
@@ -277,65 +258,17 @@ def export_familias_xlsx(
             {where}
             ORDER BY f.IDFamilia
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        # Construir XLSX con openpyxl
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Familias"
-
-        headers = ["IDFamilia", "Familia", "Acumulativa", "Fija", "Compuesta", "Situación"]
-        ws.append(headers)
-
-        # Estilos de encabezado
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="4F46E5")  # Indigo
-        center = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="CCCCCC")
-
-        for col_idx, _ in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col_idx)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center
-            cell.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        # Data
-        for r in rows:
-            ws.append([
+        return xlsx_response(
+            sql, params, "familias.xlsx", "Familias",
+            header=["IDFamilia", "Familia", "Acumulativa", "Fija", "Compuesta", "Situación"],
+            row=lambda r: [
                 r.IDFamilia,
                 r.Familia,
                 "Sí" if r.AcumulativaCheck else "No",
                 "Sí" if r.FijaCheck else "No",
                 "Sí" if r.CompuestaCheck else "No",
                 r.SituacionRegistro,
-            ])
-
-        # Auto ancho columnas
-        for col_idx in range(1, ws.max_column + 1):
-            col_letter = get_column_letter(col_idx)
-            max_len = 0
-            for row_idx in range(1, ws.max_row + 1):
-                val = ws.cell(row=row_idx, column=col_idx).value
-                ln = len(str(val)) if val is not None else 0
-                max_len = max(max_len, ln)
-            ws.column_dimensions[col_letter].width = min(max_len + 2, 40)
-
-        ws.freeze_panes = "A2"
-
-        # Output
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-
-        headers_resp = {
-            "Content-Disposition": 'attachment; filename="familias.xlsx"'
-        }
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers_resp
+            ],
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
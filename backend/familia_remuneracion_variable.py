@@ -1,17 +1,14 @@
 # archivo: familia_remuneracion_variable.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 
 from database import get_connection
 from security import get_current_user
+from services import count_cache
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
 
-# XLSX
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 router = APIRouter(
     prefix="/familia-remuneracion-variable",
@@ -77,27 +74,19 @@ def list_familia_rem_var(
     situacion_id: int | None = Query(default=None, description="Filtra por PKIDSituacionRegistro exacto"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
 ):
     try:
         conn = get_connection()
         cur = conn.cursor()
 
-        # total
-        params_total = []
-        where_total = _build_where(params_total, id_codigo, nombre, situacion_id)
-        sql_total = f"""
-            SELECT COUNT(1) AS total
-            FROM FamiliaRemuneracionVariable frv
-            LEFT JOIN SituacionRegistro sr ON frv.PKIDSituacionRegistro = sr.PKID
-            {where_total}
-        """
-        cur.execute(sql_total, params_total)
-        total = int(cur.fetchone().total)
+        params = []
+        where = _build_where(params, id_codigo, nombre, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "FamiliaRemuneracionVariable", f"FROM FamiliaRemuneracionVariable frv {where}", params, count)
 
         # page
         offset = (page - 1) * page_size
-        params = []
-        where = _build_where(params, id_codigo, nombre, situacion_id)
         sql = f"""
             SELECT frv.PKID, frv.IDFamiliaRemuneracionVariable, frv.FamiliaRemuneracionVariable,
                    frv.PKIDSituacionRegistro, sr.SituacionRegistro
@@ -107,10 +96,11 @@ def list_familia_rem_var(
             ORDER BY frv.IDFamiliaRemuneracionVariable
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
         """
-        params += [offset, page_size]
+        params += [offset, page_size + 1]
         cur.execute(sql, params)
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-        return {"items": items, "total": total}
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -141,6 +131,7 @@ def create_familia_rem_var(payload: dict):
             int(payload["PKIDSituacionRegistro"]) if payload.get("PKIDSituacionRegistro") not in (None, "",) else None,
         ))
         conn.commit()
+        count_cache.invalidate("FamiliaRemuneracionVariable")
         return {"detail": "Creado"}
     except HTTPException:
         raise
@@ -187,6 +178,7 @@ def update_familia_rem_var(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("FamiliaRemuneracionVariable")
         return {"detail": "Actualizado"}
     except HTTPException:
         raise
@@ -208,6 +200,7 @@ def delete_familia_rem_var(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No encontrado.")
         conn.commit()
+        count_cache.invalidate("FamiliaRemuneracionVariable")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -225,9 +218,6 @@ def export_csv(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
         params = []
         where = _build_where(params, id_codigo, nombre, situacion_id)
         sql = f"""
@@ -237,18 +227,11 @@ def export_csv(
             {where}
             ORDER BY frv.IDFamiliaRemuneracionVariable
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        si = io.StringIO()
-        w = csv.writer(si)
-        w.writerow(["ID", "Nombre", "Situación"])
-        for r in rows:
-            w.writerow([r.IDFamiliaRemuneracionVariable, r.FamiliaRemuneracionVariable, r.SituacionRegistro])
-
-        out = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {"Content-Disposition": 'attachment; filename="familia_remuneracion_variable.csv"'}
-        return StreamingResponse(out, media_type="text/csv", headers=headers)
+        return csv_response(
+            sql, params, "familia_remuneracion_variable.csv",
+            header=["ID", "Nombre", "Situación"],
+            row=lambda r: [r.IDFamiliaRemuneracionVariable, r.FamiliaRemuneracionVariable, r.SituacionRegistro],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -261,9 +244,6 @@ def export_xlsx(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-
         params = []
         where = _build_where(params, id_codigo, nombre, situacion_id)
         sql = f"""
@@ -273,47 +253,10 @@ def export_xlsx(
             {where}
             ORDER BY frv.IDFamiliaRemuneracionVariable
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "FamiliaRemVar"
-        headers = ["ID", "Nombre", "Situación"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="4F46E5")
-        center = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="CCCCCC")
-
-        for col_idx in range(1, len(headers) + 1):
-            c = ws.cell(row=1, column=col_idx)
-            c.font = header_font
-            c.fill = header_fill
-            c.alignment = center
-            c.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for r in rows:
-            ws.append([r.IDFamiliaRemuneracionVariable, r.FamiliaRemuneracionVariable, r.SituacionRegistro])
-
-        for col_idx in range(1, ws.max_column + 1):
-            col_letter = get_column_letter(col_idx)
-            max_len = 0
-            for row_idx in range(1, ws.max_row + 1):
-                val = ws.cell(row=row_idx, column=col_idx).value
-                max_len = max(max_len, len(str(val)) if val is not None else 0)
-            ws.column_dimensions[col_letter].width = min(max_len + 2, 40)
-        ws.freeze_panes = "A2"
-
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="familia_remuneracion_variable.xlsx"'}
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+        return xlsx_response(
+            sql, params, "familia_remuneracion_variable.xlsx", "FamiliaRemVar",
+            header=["ID", "Nombre", "Situación"],
+            row=lambda r: [r.IDFamiliaRemuneracionVariable, r.FamiliaRemuneracionVariable, r.SituacionRegistro],
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,16 @@
 # archivo: fecha_vigencia_impuesto.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 from datetime import date
 
 from database import get_connection
 from security import get_current_user
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
+from services import count_cache, tax_rates
+from services.keyset import Keyset
 
-# XLSX
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 router = APIRouter(
     prefix="/fecha-vigencia-impuesto",
@@ -93,6 +91,12 @@ def _validate_payload(p: dict, updating: bool = False):
 
 # --------------------- list ---------------------
 
+# orden del listado + PKID para que la clave sea única
+KEYSET = Keyset(
+    [("fvi.FechaVigencia", True), ("fvi.IDTipoImpuesto", False), ("fvi.PKID", False)],
+    key=lambda r: (r.FechaVigencia, r.IDTipoImpuesto, r.PKID),
+)
+
 @router.get("/")
 def list_fvi(
     idtipo: str | None = Query(default=None, description="Filtra por IDTipoImpuesto (contiene)"),
@@ -101,25 +105,39 @@ def list_fvi(
     situacion_id: int | None = Query(default=None, description="PKIDSituacionRegistro"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
+    cursor: str | None = Query(default=None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
 ):
+    """
+    Con page: {items, total} (OFFSET + COUNT). Con cursor: {items, next_cursor, limit}
+    con page_size como límite; no hace COUNT y cada página cuesta lo mismo.
+    """
     try:
         conn = get_connection()
         cur = conn.cursor()
 
-        params_total = []
-        where_total = _build_where(params_total, idtipo, fecha_desde, fecha_hasta, situacion_id)
-        sql_total = f"""
-            SELECT COUNT(1) AS total
-            FROM FechaVigenciaImpuesto fvi
-            LEFT JOIN SituacionRegistro sr ON fvi.PKIDSituacionRegistro = sr.PKID
-            {where_total}
-        """
-        cur.execute(sql_total, params_total)
-        total = int(cur.fetchone().total)
+        if cursor is not None:
+            params = []
+            where = _build_where(params, idtipo, fecha_desde, fecha_hasta, situacion_id)
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                where += " AND " + cond
+            sql = f"""
+                SELECT fvi.PKID, fvi.IDTipoImpuesto, fvi.FechaVigencia, fvi.TasaImpuesto,
+                       fvi.ImporteBase, fvi.PKIDSituacionRegistro, sr.SituacionRegistro
+                FROM FechaVigenciaImpuesto fvi
+                LEFT JOIN SituacionRegistro sr ON fvi.PKIDSituacionRegistro = sr.PKID
+                {where}
+            """ + KEYSET.order_by() + KEYSET.fetch(params, page_size)
+            cur.execute(sql, params)
+            return KEYSET.page(cur.fetchall(), page_size, _row_to_dict)
 
-        offset = (page - 1) * page_size
         params = []
         where = _build_where(params, idtipo, fecha_desde, fecha_hasta, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "FechaVigenciaImpuesto", f"FROM FechaVigenciaImpuesto fvi {where}", params, count)
+
+        offset = (page - 1) * page_size
         sql = f"""
             SELECT fvi.PKID, fvi.IDTipoImpuesto, fvi.FechaVigencia, fvi.TasaImpuesto,
                    fvi.ImporteBase, fvi.PKIDSituacionRegistro, sr.SituacionRegistro
@@ -129,12 +147,75 @@ def list_fvi(
             ORDER BY fvi.FechaVigencia DESC, fvi.IDTipoImpuesto ASC
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
         """
-        params += [offset, page_size]
+        params += [offset, page_size + 1]
         cur.execute(sql, params)
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-        return {"items": items, "total": total}
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# --------------------- resolve (tasa vigente) ---------------------
+
+def _resolve_payload(tipo: str, fechas, bases):
+    try:
+        idx = tax_rates.get_index()
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    try:
+        r = idx.resolve(tipo, fechas, bases)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Fecha inválida (use YYYY-MM-DD)")
+    def num(a):
+        return [None if v != v else float(v) for v in a.tolist()]
+    return {
+        "IDTipoImpuesto": tipo.strip().upper(),
+        "found": r["found"].tolist(),
+        "FechaVigencia": r["fecha_vigencia"].tolist(),
+        "TasaImpuesto": num(r["tasa"]),
+        "Impuesto": num(r["impuesto"]),
+    }
+
+@router.get("/resolve")
+def resolve_fvi(
+    idtipo: str = Query(..., description="IDTipoImpuesto"),
+    fecha: date = Query(..., description="YYYY-MM-DD"),
+    base: float | None = Query(default=None, description="Base imponible (opcional)"),
+):
+    """
+    Tasa/tramos vigentes de IDTipoImpuesto a la fecha y, si viene base, el impuesto.
+    """
+    try:
+        vig = tax_rates.get_index().as_of(idtipo, fecha)
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if vig is None:
+        raise HTTPException(status_code=404, detail="No hay tasa vigente para ese tipo y fecha.")
+    out = _resolve_payload(idtipo, [fecha], [base or 0.0])
+    vig["TasaImpuesto"] = out["TasaImpuesto"][0]
+    vig["Impuesto"] = out["Impuesto"][0] if base is not None else None
+    return vig
+
+@router.post("/resolve")
+def resolve_fvi_batch(payload: dict):
+    """
+    Lote: {"IDTipoImpuesto": "REN", "fechas": ["2025-01-31", ...], "bases": [1500.0, ...]}
+    Devuelve arreglos alineados con la entrada.
+    """
+    tipo = (payload.get("IDTipoImpuesto") or "").strip()
+    fechas = payload.get("fechas") or []
+    bases = payload.get("bases")
+    if not tipo:
+        raise HTTPException(status_code=422, detail="Falta campo requerido: IDTipoImpuesto")
+    if bases is not None and len(bases) != len(fechas):
+        raise HTTPException(status_code=422, detail="fechas y bases deben tener el mismo largo")
+    if not fechas:
+        return {"IDTipoImpuesto": tipo.upper(), "found": [], "FechaVigencia": [], "TasaImpuesto": [], "Impuesto": []}
+    try:
+        bases = [float(b or 0) for b in bases] if bases is not None else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="bases debe ser numérico")
+    return _resolve_payload(tipo, fechas, bases)
 
 # --------------------- create ---------------------
 
@@ -156,6 +237,8 @@ def create_fvi(payload: dict):
             payload["PKIDSituacionRegistro"],
         ))
         conn.commit()
+        count_cache.invalidate("FechaVigenciaImpuesto")
+        tax_rates.invalidate()
         return {"detail": "Creado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -194,6 +277,8 @@ def update_fvi(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("FechaVigenciaImpuesto")
+        tax_rates.invalidate()
         return {"detail": "Actualizado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -213,6 +298,8 @@ def delete_fvi(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No encontrado.")
         conn.commit()
+        count_cache.invalidate("FechaVigenciaImpuesto")
+        tax_rates.invalidate()
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -231,8 +318,6 @@ def export_csv(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idtipo, fecha_desde, fecha_hasta, situacion_id)
         sql = f"""
@@ -243,24 +328,17 @@ def export_csv(
             {where}
             ORDER BY fvi.FechaVigencia DESC, fvi.IDTipoImpuesto ASC
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        si = io.StringIO()
-        w = csv.writer(si)
-        w.writerow(["IDTipoImpuesto", "FechaVigencia", "TasaImpuesto", "ImporteBase", "Situacion"])
-        for r in rows:
-            w.writerow([
+        return csv_response(
+            sql, params, "fecha_vigencia_impuesto.csv",
+            header=["IDTipoImpuesto", "FechaVigencia", "TasaImpuesto", "ImporteBase", "Situacion"],
+            row=lambda r: [
                 r.IDTipoImpuesto,
                 r.FechaVigencia.strftime("%Y-%m-%d") if r.FechaVigencia else "",
                 float(r.TasaImpuesto) if r.TasaImpuesto is not None else "",
                 float(r.ImporteBase) if r.ImporteBase is not None else "",
                 r.SituacionRegistro or "",
-            ])
-
-        out = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {"Content-Disposition": 'attachment; filename="fecha_vigencia_impuesto.csv"'}
-        return StreamingResponse(out, media_type="text/csv", headers=headers)
+            ],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -274,8 +352,6 @@ def export_xlsx(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idtipo, fecha_desde, fecha_hasta, situacion_id)
         sql = f"""
@@ -286,53 +362,16 @@ def export_xlsx(
             {where}
             ORDER BY fvi.FechaVigencia DESC, fvi.IDTipoImpuesto ASC
         """
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "FechaVigencia"
-        headers = ["IDTipoImpuesto", "FechaVigencia", "TasaImpuesto", "ImporteBase", "Situación"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="4F46E5")
-        center = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="CCCCCC")
-
-        for col_idx in range(1, len(headers) + 1):
-            c = ws.cell(row=1, column=col_idx)
-            c.font = header_font
-            c.fill = header_fill
-            c.alignment = center
-            c.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for r in rows:
-            ws.append([
+        return xlsx_response(
+            sql, params, "fecha_vigencia_impuesto.xlsx", "FechaVigencia",
+            header=["IDTipoImpuesto", "FechaVigencia", "TasaImpuesto", "ImporteBase", "Situación"],
+            row=lambda r: [
                 r.IDTipoImpuesto,
                 r.FechaVigencia.strftime("%Y-%m-%d") if r.FechaVigencia else "",
                 float(r.TasaImpuesto) if r.TasaImpuesto is not None else "",
                 float(r.ImporteBase) if r.ImporteBase is not None else "",
                 r.SituacionRegistro or "",
-            ])
-
-        # auto-width
-        for col_idx in range(1, ws.max_column + 1):
-            max_len = 0
-            for row_idx in range(1, ws.max_row + 1):
-                val = ws.cell(row=row_idx, column=col_idx).value
-                max_len = max(max_len, len(str(val)) if val is not None else 0)
-            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 40)
-        ws.freeze_panes = "A2"
-
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="fecha_vigencia_impuesto.xlsx"'}
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+            ],
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,6 +4,7 @@ import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.ref_cache import ref_cached
 
 router = APIRouter(
     prefix="/fecha-vigencia-impuesto-combos",
@@ -12,6 +13,7 @@ router = APIRouter(
 )
 
 @router.get("/situacion")
+@ref_cached("SituacionRegistro")
 def combo_situacion():
     try:
         conn = get_connection()
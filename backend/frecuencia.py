@@ -1,17 +1,14 @@
 # archivo: frecuencia.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 
 from database import get_connection
 from security import get_current_user
+from services import count_cache
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
 
-# XLSX
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 router = APIRouter(
     prefix="/frecuencia",
@@ -101,24 +98,18 @@ def list_frecuencia(
     situacion_id: int | None = Query(default=None, description="PKIDSituacionRegistro"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
 ):
     try:
         conn = get_connection()
         cur = conn.cursor()
 
-        params_total = []
-        where_total = _build_where(params_total, idfrecuencia, nombre, situacion_id)
-        cur.execute(f"""
-            SELECT COUNT(1) AS total
-            FROM Frecuencia f
-            LEFT JOIN SituacionRegistro sr ON f.PKIDSituacionRegistro = sr.PKID
-            {where_total}
-        """, params_total)
-        total = int(cur.fetchone().total)
-
-        offset = (page - 1) * page_size
         params = []
         where = _build_where(params, idfrecuencia, nombre, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "Frecuencia", f"FROM Frecuencia f {where}", params, count)
+
+        offset = (page - 1) * page_size
         cur.execute(f"""
             SELECT f.PKID, f.IDFrecuencia, f.Frecuencia, f.NumeroDias, f.NumeroHoras,
                    f.PKIDSituacionRegistro, sr.SituacionRegistro
@@ -127,9 +118,10 @@ def list_frecuencia(
             {where}
             ORDER BY f.IDFrecuencia ASC, f.Frecuencia ASC
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
-        """, params + [offset, page_size])
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-        return {"items": items, "total": total}
+        """, params + [offset, page_size + 1])
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -153,6 +145,7 @@ def create_frecuencia(payload: dict):
             payload["PKIDSituacionRegistro"],
         ))
         conn.commit()
+        count_cache.invalidate("Frecuencia")
         return {"detail": "Creado"}
     except pyodbc.IntegrityError as e:
         conn.rollback()
@@ -191,6 +184,7 @@ def update_frecuencia(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("Frecuencia")
         return {"detail": "Actualizado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -210,6 +204,7 @@ def delete_frecuencia(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No encontrado.")
         conn.commit()
+        count_cache.invalidate("Frecuencia")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -227,28 +222,18 @@ def export_csv(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idfrecuencia, nombre, situacion_id)
-        cur.execute(f"""
+        return csv_response(f"""
             SELECT f.IDFrecuencia, f.Frecuencia, f.NumeroDias, f.NumeroHoras, sr.SituacionRegistro
             FROM Frecuencia f
             LEFT JOIN SituacionRegistro sr ON f.PKIDSituacionRegistro = sr.PKID
             {where}
             ORDER BY f.IDFrecuencia ASC, f.Frecuencia ASC
-        """, params)
-        rows = cur.fetchall()
-
-        si = io.StringIO()
-        w = csv.writer(si)
-        w.writerow(["IDFrecuencia", "Frecuencia", "NumeroDias", "NumeroHoras", "Situacion"])
-        for r in rows:
-            w.writerow([r.IDFrecuencia, r.Frecuencia, r.NumeroDias, r.NumeroHoras, r.SituacionRegistro or ""])
-
-        out = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {"Content-Disposition": 'attachment; filename="frecuencia.csv"'}
-        return StreamingResponse(out, media_type="text/csv", headers=headers)
+        """, params, "frecuencia.csv",
+            header=["IDFrecuencia", "Frecuencia", "NumeroDias", "NumeroHoras", "Situacion"],
+            row=lambda r: [r.IDFrecuencia, r.Frecuencia, r.NumeroDias, r.NumeroHoras, r.SituacionRegistro or ""],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -261,58 +246,19 @@ def export_xlsx(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idfrecuencia, nombre, situacion_id)
-        cur.execute(f"""
+        sql = f"""
             SELECT f.IDFrecuencia, f.Frecuencia, f.NumeroDias, f.NumeroHoras, sr.SituacionRegistro
             FROM Frecuencia f
             LEFT JOIN SituacionRegistro sr ON f.PKIDSituacionRegistro = sr.PKID
             {where}
             ORDER BY f.IDFrecuencia ASC, f.Frecuencia ASC
-        """, params)
-        rows = cur.fetchall()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Frecuencia"
-        headers = ["IDFrecuencia", "Frecuencia", "NumeroDias", "NumeroHoras", "Situación"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="4F46E5")
-        center = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="CCCCCC")
-
-        for col_idx in range(1, len(headers) + 1):
-            c = ws.cell(row=1, column=col_idx)
-            c.font = header_font
-            c.fill = header_fill
-            c.alignment = center
-            c.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for r in rows:
-            ws.append([r.IDFrecuencia, r.Frecuencia, r.NumeroDias, r.NumeroHoras, r.SituacionRegistro or ""])
-
-        # auto-width
-        from openpyxl.utils import get_column_letter
-        for col_idx in range(1, ws.max_column + 1):
-            max_len = 0
-            for row_idx in range(1, ws.max_row + 1):
-                val = ws.cell(row=row_idx, column=col_idx).value
-                max_len = max(max_len, len(str(val)) if val is not None else 0)
-            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 40)
-        ws.freeze_panes = "A2"
-
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="frecuencia.xlsx"'}
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+        """
+        return xlsx_response(
+            sql, params, "frecuencia.xlsx", "Frecuencia",
+            header=["IDFrecuencia", "Frecuencia", "NumeroDias", "NumeroHoras", "Situación"],
+            row=lambda r: [r.IDFrecuencia, r.Frecuencia, r.NumeroDias, r.NumeroHoras, r.SituacionRegistro or ""],
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,14 @@
 # archivo: grado_academico.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 
 from database import get_connection
 from security import get_current_user
+from services import count_cache, ref_cache
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 router = APIRouter(
     prefix="/grado-academico",
@@ -75,24 +74,18 @@ def list_grado_academico(
     situacion_id: int | None = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
 ):
     try:
         conn = get_connection()
         cur = conn.cursor()
 
-        params_total = []
-        where_total = _build_where(params_total, idgrado, nombre, situacion_id)
-        cur.execute(f"""
-            SELECT COUNT(1) AS total
-            FROM GradoAcademico g
-            LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
-            {where_total}
-        """, params_total)
-        total = int(cur.fetchone().total)
-
-        offset = (page - 1) * page_size
         params = []
         where = _build_where(params, idgrado, nombre, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "GradoAcademico", f"FROM GradoAcademico g {where}", params, count)
+
+        offset = (page - 1) * page_size
         cur.execute(f"""
             SELECT g.PKID, g.IDGradoAcademico, g.GradoAcademico,
                    g.PKIDSituacionRegistro, s.SituacionRegistro
@@ -101,9 +94,10 @@ def list_grado_academico(
             {where}
             ORDER BY g.IDGradoAcademico ASC, g.GradoAcademico ASC
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
-        """, params + [offset, page_size])
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-        return {"items": items, "total": total}
+        """, params + [offset, page_size + 1])
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -124,6 +118,8 @@ def create_grado_academico(payload: dict):
             payload["PKIDSituacionRegistro"],
         ))
         conn.commit()
+        count_cache.invalidate("GradoAcademico")
+        ref_cache.invalidate("GradoAcademico")
         return {"detail": "Creado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -157,6 +153,8 @@ def update_grado_academico(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("GradoAcademico")
+        ref_cache.invalidate("GradoAcademico")
         return {"detail": "Actualizado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -175,6 +173,8 @@ def delete_grado_academico(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No encontrado.")
         conn.commit()
+        count_cache.invalidate("GradoAcademico")
+        ref_cache.invalidate("GradoAcademico")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -191,28 +191,18 @@ def export_csv(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idgrado, nombre, situacion_id)
-        cur.execute(f"""
+        return csv_response(f"""
             SELECT g.IDGradoAcademico, g.GradoAcademico, s.SituacionRegistro
             FROM GradoAcademico g
             LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
             {where}
             ORDER BY g.IDGradoAcademico ASC, g.GradoAcademico ASC
-        """, params)
-        rows = cur.fetchall()
-
-        si = io.StringIO()
-        w = csv.writer(si)
-        w.writerow(["IDGradoAcademico", "GradoAcademico", "Situacion"])
-        for r in rows:
-            w.writerow([r.IDGradoAcademico, r.GradoAcademico, r.SituacionRegistro or ""])
-
-        bio = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {"Content-Disposition": 'attachment; filename="grado_academico.csv"'}
-        return StreamingResponse(bio, media_type="text/csv", headers=headers)
+        """, params, "grado_academico.csv",
+            header=["IDGradoAcademico", "GradoAcademico", "Situacion"],
+            row=lambda r: [r.IDGradoAcademico, r.GradoAcademico, r.SituacionRegistro or ""],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -224,57 +214,22 @@ def export_xlsx(
     situacion_id: int | None = Query(default=None),
 ):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idgrado, nombre, situacion_id)
-        cur.execute(f"""
+        sql = f"""
             SELECT g.IDGradoAcademico, g.GradoAcademico, s.SituacionRegistro
             FROM GradoAcademico g
             LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
             {where}
             ORDER BY g.IDGradoAcademico ASC, g.GradoAcademico ASC
-        """, params)
-        rows = cur.fetchall()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "GradoAcadémico"
-        headers = ["IDGradoAcademico", "GradoAcademico", "Situación"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="2563EB")
-        align = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="DDDDDD")
-
-        for col in range(1, len(headers) + 1):
-            c = ws.cell(row=1, column=col)
-            c.font = header_font
-            c.fill = header_fill
-            c.alignment = align
-            c.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for r in rows:
-            ws.append([r.IDGradoAcademico, r.GradoAcademico, r.SituacionRegistro or ""])
-
-        # Auto ancho
-        from openpyxl.utils import get_column_letter
-        for col in range(1, ws.max_column + 1):
-            max_len = 0
-            for row in range(1, ws.max_row + 1):
-                val = ws.cell(row=row, column=col).value
-                max_len = max(max_len, len(str(val)) if val else 0)
-            ws.column_dimensions[get_column_letter(col)].width = min(max_len + 2, 40)
-
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="grado_academico.xlsx"'}
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+        """
+        return xlsx_response(
+            sql, params, "grado_academico.xlsx", "GradoAcadémico",
+            header=["IDGradoAcademico", "GradoAcademico", "Situación"],
+            row=lambda r: [r.IDGradoAcademico, r.GradoAcademico, r.SituacionRegistro or ""],
+            header_color="2563EB",
+            border_color="DDDDDD",
+            freeze=False,
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,14 @@
 # archivo: grupo_gasto.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import StreamingResponse
 import pyodbc
-import io
-import csv
 
 from database import get_connection
 from security import get_current_user
+from services import count_cache
+from services.count_cache import CountMode
+from services.csv_export import csv_response
+from services.xlsx_export import xlsx_response
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 router = APIRouter(
     prefix="/grupo-gasto",
@@ -78,6 +77,7 @@ def list_grupo_gasto(
     situacion_id: int | None = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
+    count: CountMode = Query(default="exact", description="exact | approx | none (sin total, usar has_more)"),
 ):
     """
     Lista con paginación y filtros.
@@ -86,19 +86,12 @@ def list_grupo_gasto(
         conn = get_connection()
         cur = conn.cursor()
 
-        params_total = []
-        where_total = _build_where(params_total, idgrupo, nombre, situacion_id)
-        cur.execute(f"""
-            SELECT COUNT(1) AS total
-            FROM GrupoGasto g
-            LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
-            {where_total}
-        """, params_total)
-        total = int(cur.fetchone().total)
-
-        offset = (page - 1) * page_size
         params = []
         where = _build_where(params, idgrupo, nombre, situacion_id)
+        # el LEFT JOIN a SituacionRegistro (por PK) no cambia el conteo
+        total = count_cache.total(cur, "GrupoGasto", f"FROM GrupoGasto g {where}", params, count)
+
+        offset = (page - 1) * page_size
         cur.execute(f"""
             SELECT g.PKID, g.PKIDGrupoGasto, g.GrupoGasto,
                    g.PKIDSituacionRegistro, s.SituacionRegistro
@@ -107,9 +100,10 @@ def list_grupo_gasto(
             {where}
             ORDER BY g.PKIDGrupoGasto ASC, g.GrupoGasto ASC
             OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
-        """, params + [offset, page_size])
-        items = [_row_to_dict(r) for r in cur.fetchall()]
-        return {"items": items, "total": total}
+        """, params + [offset, page_size + 1])
+        rows = cur.fetchall()
+        items = [_row_to_dict(r) for r in rows[:page_size]]
+        return {"items": items, "total": total, "has_more": len(rows) > page_size}
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -130,6 +124,7 @@ def create_grupo_gasto(payload: dict):
             payload["PKIDSituacionRegistro"],
         ))
         conn.commit()
+        count_cache.invalidate("GrupoGasto")
         return {"detail": "Creado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -164,6 +159,7 @@ def update_grupo_gasto(pkid: int, payload: dict):
             pkid,
         ))
         conn.commit()
+        count_cache.invalidate("GrupoGasto")
         return {"detail": "Actualizado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -182,6 +178,7 @@ def delete_grupo_gasto(pkid: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="No encontrado.")
         conn.commit()
+        count_cache.invalidate("GrupoGasto")
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError:
         conn.rollback()
@@ -201,28 +198,18 @@ def export_csv(
     Exporta CSV con los filtros.
     """
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idgrupo, nombre, situacion_id)
-        cur.execute(f"""
+        return csv_response(f"""
             SELECT g.PKIDGrupoGasto, g.GrupoGasto, s.SituacionRegistro
             FROM GrupoGasto g
             LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
             {where}
             ORDER BY g.PKIDGrupoGasto ASC, g.GrupoGasto ASC
-        """, params)
-        rows = cur.fetchall()
-
-        si = io.StringIO()
-        w = csv.writer(si)
-        w.writerow(["PKIDGrupoGasto", "GrupoGasto", "Situacion"])
-        for r in rows:
-            w.writerow([r.PKIDGrupoGasto, r.GrupoGasto, r.SituacionRegistro or ""])
-
-        bio = io.BytesIO(si.getvalue().encode("utf-8-sig"))
-        headers = {"Content-Disposition": 'attachment; filename="grupo_gasto.csv"'}
-        return StreamingResponse(bio, media_type="text/csv", headers=headers)
+        """, params, "grupo_gasto.csv",
+            header=["PKIDGrupoGasto", "GrupoGasto", "Situacion"],
+            row=lambda r: [r.PKIDGrupoGasto, r.GrupoGasto, r.SituacionRegistro or ""],
+        )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -237,56 +224,22 @@ def export_xlsx(
     Exporta XLSX con los filtros.
     """
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         params = []
         where = _build_where(params, idgrupo, nombre, situacion_id)
-        cur.execute(f"""
+        sql = f"""
             SELECT g.PKIDGrupoGasto, g.GrupoGasto, s.SituacionRegistro
             FROM GrupoGasto g
             LEFT JOIN SituacionRegistro s ON g.PKIDSituacionRegistro = s.PKID
             {where}
             ORDER BY g.PKIDGrupoGasto ASC, g.GrupoGasto ASC
-        """, params)
-        rows = cur.fetchall()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "GrupoGasto"
-        headers = ["PKIDGrupoGasto", "GrupoGasto", "Situación"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill("solid", fgColor="2563EB")
-        align = Alignment(horizontal="center", vertical="center")
-        thin = Side(style="thin", color="DDDDDD")
-
-        for col in range(1, len(headers) + 1):
-            c = ws.cell(row=1, column=col)
-            c.font = header_font
-            c.fill = header_fill
-            c.alignment = align
-            c.border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for r in rows:
-            ws.append([r.PKIDGrupoGasto, r.GrupoGasto, r.SituacionRegistro or ""])
-
-        from openpyxl.utils import get_column_letter
-        for col in range(1, ws.max_column + 1):
-            max_len = 0
-            for row in range(1, ws.max_row + 1):
-                val = ws.cell(row=row, column=col).value
-                max_len = max(max_len, len(str(val)) if val else 0)
-            ws.column_dimensions[get_column_letter(col)].width = min(max_len + 2, 40)
-
-        bio = io.BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="grupo_gasto.xlsx"'}
-        return StreamingResponse(
-            bio,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
+        """
+        return xlsx_response(
+            sql, params, "grupo_gasto.xlsx", "GrupoGasto",
+            header=["PKIDGrupoGasto", "GrupoGasto", "Situación"],
+            row=lambda r: [r.PKIDGrupoGasto, r.GrupoGasto, r.SituacionRegistro or ""],
+            header_color="2563EB",
+            border_color="DDDDDD",
+            freeze=False,
         )
     except pyodbc.Error as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,10 +114,19 @@ from grupo_operativo_combos import router as grupo_operativo_combos_router
 from test_db import router as test_db_router
 
 from trabajador import router as trabajador_router
+from trabajador_combos import router as trabajador_combos_router
+
+from services.person_search import person_search
 
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def cargar_indices():
+    # índice de búsqueda de PersonaNatural en segundo plano: no retrasa el arranque
+    person_search.start_background_load()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -133,6 +142,7 @@ app.add_middleware(
 app.include_router(test_db_router, prefix="/debug")
 
 app.include_router(trabajador_router)
+app.include_router(trabajador_combos_router)
 
 app.include_router(auth_router)
 app.include_router(payroll_router)
@@ -231,6 +241,9 @@ app.include_router(familia_combos_router)
 app.include_router(frv_router)
 app.include_router(frv_combo_router)
 
+app.include_router(fvi_router)
+app.include_router(fvi_combo_router)
+
 app.include_router(frecuencia_router)
 app.include_router(frecuencia_combo_router)
 
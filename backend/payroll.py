@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.payroll_service import execute_stored_procedure  # Importas desde services
+from services.payroll_service import execute_stored_procedure, stream_ndjson, stream_json  # Importas desde services
+from services.payroll_jobs import payroll_jobs, JobQueueFull, FINISHED, DONE
+from services import payroll_engine
+from services.dashboard_aggregates import on_payroll_done
+from database import connection
 from security import get_current_user
 
 router = APIRouter(prefix="/payroll")
@@ -13,6 +18,13 @@ class PayrollInput(BaseModel):
     PPE_CORPPE: int
     P_CODAUX: int
 
+def refresh_dashboard(params: dict):
+    # el resultado del SP ya se devolvió bien; un fallo al refrescar el dashboard no lo invalida
+    try:
+        on_payroll_done(params)
+    except Exception:
+        pass
+
 @router.post("/video")
 def execute_payroll(input: PayrollInput, user: dict = Depends(get_current_user)):
     try:
@@ -24,6 +36,115 @@ def execute_payroll(input: PayrollInput, user: dict = Depends(get_current_user))
             input.PPE_CORPPE,
             input.P_CODAUX
         )
+        refresh_dashboard(input.dict())
         return {"data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/video/stream")
+def execute_payroll_stream(
+    input: PayrollInput,
+    formato: str = Query("ndjson", enum=["ndjson", "json"]),
+    chunk_size: int = Query(2000, ge=100, le=20000),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Devuelve todos los result sets del SP (no solo el primero con filas),
+    leídos con fetchmany y enviados a medida que llegan.
+    """
+    params = (
+        input.CIA_CODCIA,
+        input.ANO_CODANO,
+        input.MES_CODMES,
+        input.TPL_CODTPL,
+        input.PPE_CORPPE,
+        input.P_CODAUX
+    )
+    # la conexión del SP ya se devolvió al pool cuando se llama on_done
+    on_done = lambda: refresh_dashboard(input.dict())
+    if formato == "ndjson":
+        return StreamingResponse(stream_ndjson(*params, chunk_size=chunk_size, on_done=on_done),
+                                 media_type="application/x-ndjson")
+    return StreamingResponse(stream_json(*params, chunk_size=chunk_size, on_done=on_done),
+                             media_type="application/json")
+
+# ---------------------------
+# Corridas asíncronas (jobs)
+# ---------------------------
+def _get_job(job_id: str):
+    job = payroll_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+@router.post("/jobs", status_code=202)
+def submit_payroll_job(input: PayrollInput, user: dict = Depends(get_current_user)):
+    """
+    Encola SP_PAYROLL_VIDEO y devuelve el job_id de inmediato.
+    Si ya hay una corrida pendiente con los mismos CIA/ANO/MES/TPL/PPE se devuelve esa.
+    """
+    try:
+        job, created = payroll_jobs.submit(input.dict())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    data = job.to_dict()
+    data["deduplicated"] = not created
+    return data
+
+@router.get("/jobs/{job_id}")
+def payroll_job_status(job_id: str, user: dict = Depends(get_current_user)):
+    return _get_job(job_id).to_dict()
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_payroll_job(job_id: str, user: dict = Depends(get_current_user)):
+    job = _get_job(job_id)
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"El job ya terminó ({job.status})")
+    return payroll_jobs.cancel(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/result")
+def payroll_job_result(
+    job_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(500, ge=1, le=5000),
+    user: dict = Depends(get_current_user)
+):
+    job = _get_job(job_id)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"El job no tiene resultado ({job.status})")
+    return payroll_jobs.page(job, page, page_size)
+
+# ---------------------------
+# Motor NumPy: paridad contra el SP
+# ---------------------------
+@router.get("/engine/parity")
+def payroll_engine_parity(
+    empresaId: int = Query(..., description="PKID de Empresa"),
+    ano: int = Query(...),
+    mes: int = Query(..., ge=1, le=12),
+    tol: float = Query(0.01, ge=0),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Recalcula el periodo con services.payroll_engine y lo compara con
+    RevisaPlanillaCalculada (salida del SP) sin escribir nada.
+    """
+    try:
+        with connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT IDEmpresa FROM Empresa WHERE PKID = ?", (empresaId,))
+                row = cur.fetchone()
+            finally:
+                cur.close()
+            if not row:
+                raise ValueError("Empresa no encontrada")
+            # una sola lectura del SP: insumos y comparación usan las mismas filas
+            reference = payroll_engine.load_reference(conn, int(row[0]), ano, mes)
+            inputs = payroll_engine.load_period_inputs(conn, empresaId, ano, mes, reference=reference)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    result = payroll_engine.compute(inputs)
+    return payroll_engine.parity_check(result, reference, tol=tol)
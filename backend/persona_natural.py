@@ -1,11 +1,16 @@
 # backend/persona_natural.py
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Union
 import pyodbc
 
 from database import get_connection
 from security import get_current_user
+from services.bulk_import import RowError, check_date, check_fk, iter_records, load_keys, parse, run_import
+from services.keyset import Keyset, MAX_LIMIT
+from services.serialize import json_response, row_dict, rows_response, serializer
+from services.person_search import person_search
+from services.worker_typeahead import worker_typeahead
 
 router = APIRouter(prefix="/persona-natural", tags=["PersonaNatural"])
 
@@ -54,22 +59,39 @@ class PersonaNaturalOut(PersonaNaturalIn):
 
 # ----- Helpers -----
 
-def row_to_dict(cursor, row) -> Dict[str, Any]:
-    cols = [c[0] for c in cursor.description]
-    return dict(zip(cols, row))
+def _search_row(pkid: int, data: PersonaNaturalIn):
+    return (pkid, data.NumeroDocumentoIdentidad, data.PrimerNombre, data.SegundoNombre,
+            data.ApellidoPaterno, data.ApellidoMaterno)
+
+# mismo orden que el listado; PKID desempata
+KEYSET = Keyset(
+    [("p.ApellidoPaterno", False), ("ISNULL(p.ApellidoMaterno, '')", False),
+     ("p.PrimerNombre", False), ("p.PKID", False)],
+    key=lambda r: (r.ApellidoPaterno, r.ApellidoMaterno or "", r.PrimerNombre, r.PKID),
+)
 
 # ----- Endpoints -----
 
-@router.get("/", response_model=List[Dict[str, Any]])
+@router.get("/", response_model=Union[List[Dict[str, Any]], Dict[str, Any]])
 def listar_personas(
     q: Optional[str] = Query(None, description="Texto para búsqueda básica (nombres/apellidos/documento)"),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Paginación por cursor: vacío para la primera página, luego next_cursor"),
     user: dict = Depends(get_current_user)
 ):
     """
     Lista personas (con nombres de combos resueltos para ver en tabla).
+    Con cursor devuelve {items, next_cursor, limit} y skip se ignora.
+    Con q (sin cursor) busca en el índice en memoria (services/person_search.py):
+    resultados por relevancia, hidratados por PKID; mientras el índice carga
+    se usa el LIKE de siempre.
     """
+    pkids = None
+    if q and cursor is None and person_search.ready:
+        pkids = person_search.search(q, max(1, min(limit, MAX_LIMIT)), skip)
+        if not pkids:
+            return []
     conn = get_connection()
     cur = conn.cursor()
     try:
@@ -97,6 +119,12 @@ def listar_personas(
         INNER JOIN dbo.SituacionRegistro sr ON sr.PKID = p.PKIDSituacionRegistro
         """
         params = []
+        if pkids is not None:
+            base_sql += f" WHERE p.PKID IN ({', '.join('?' * len(pkids))})"
+            cur.execute(base_sql, pkids)
+            ser = serializer(cur.description)
+            por_pkid = {r.PKID: ser.dict(r) for r in cur.fetchall()}
+            return json_response([por_pkid[k] for k in pkids if k in por_pkid])
         if q:
             base_sql += """
             WHERE (p.PrimerNombre LIKE ? OR p.SegundoNombre LIKE ? OR
@@ -106,12 +134,20 @@ def listar_personas(
             like = f"%{q}%"
             params += [like, like, like, like, like]
 
+        if cursor is not None:
+            limit = max(1, min(limit, MAX_LIMIT))
+            cond = KEYSET.where(cursor, params)
+            if cond:
+                base_sql += (" AND " if q else " WHERE ") + cond
+            base_sql += KEYSET.order_by() + KEYSET.fetch(params, limit)
+            cur.execute(base_sql, params)
+            return json_response(KEYSET.page(cur.fetchall(), limit, serializer(cur.description).dict))
+
         base_sql += " ORDER BY p.ApellidoPaterno, p.ApellidoMaterno, p.PrimerNombre OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
         params += [skip, limit]
 
         cur.execute(base_sql, params)
-        rows = cur.fetchall()
-        return [row_to_dict(cur, r) for r in rows]
+        return rows_response(cur)
     finally:
         cur.close()
         conn.close()
@@ -126,7 +162,7 @@ def obtener_persona(pkid: int, user: dict = Depends(get_current_user)):
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Persona no encontrada")
-        return row_to_dict(cur, row)
+        return row_dict(cur, row)
     finally:
         cur.close()
         conn.close()
@@ -204,10 +240,11 @@ def crear_persona(data: PersonaNaturalIn, user: dict = Depends(get_current_user)
         cur.execute(insert_sql, params)
         new_pkid = cur.fetchone()[0]
         conn.commit()
+        person_search.upsert(_search_row(new_pkid, data))
 
         cur.execute("SELECT * FROM dbo.PersonaNatural WHERE PKID = ?", new_pkid)
         row = cur.fetchone()
-        return row_to_dict(cur, row)
+        return row_dict(cur, row)
     except pyodbc.IntegrityError as e:
         conn.rollback()
         raise HTTPException(status_code=400, detail=f"Violación de integridad referencial o unicidad: {str(e)}")
@@ -216,6 +253,95 @@ def crear_persona(data: PersonaNaturalIn, user: dict = Depends(get_current_user)
         conn.close()
 
 
+# ----- Importación masiva -----
+
+# columnas del INSERT en el orden del modelo
+_COLUMNAS = list(PersonaNaturalIn.model_fields)
+_BULK_INSERT_SQL = (
+    f"INSERT INTO dbo.PersonaNatural ({', '.join(_COLUMNAS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUMNAS))})"
+)
+# FKs obligatorias que el listado resuelve con INNER JOIN
+_FK_TABLAS = {
+    "PKIDTipoDocumentoIdentidad": "TipoDocumentoIdentidad",
+    "PKIDSexo": "Sexo",
+    "PKIDNivelInstruccion": "NivelInstruccion",
+    "PKIDProfesion": "Profesion",
+    "PKIDGradoAcademico": "GradoAcademico",
+    "PKIDNacionalidad": "Nacionalidad",
+    "PKIDPais": "Pais",
+    "PKIDSituacionRegistro": "SituacionRegistro",
+    "PKIDEstadoCivil": "EstadoCivil",
+}
+_FECHAS = ("FechaNacimiento", "FechaAfiliacionAFP", "BreveteFechaCaducidad",
+           "PasaporteCaducidad", "FechaEgresoFormativa")
+
+
+def _bulk_validator(cur):
+    """Precarga FKs y claves únicas; devuelve (validate, on_reject) para run_import."""
+    fks = {campo: load_keys(cur, f"SELECT PKID FROM dbo.{tabla}") for campo, tabla in _FK_TABLAS.items()}
+    docs = {(t, (n or "").strip()) for t, n in load_keys(
+        cur, "SELECT PKIDTipoDocumentoIdentidad, NumeroDocumentoIdentidad FROM dbo.PersonaNatural")}
+    ids = load_keys(cur, "SELECT IDPersonaNatural FROM dbo.PersonaNatural")
+
+    def validate(raw):
+        data = parse(PersonaNaturalIn, raw)
+        for campo, keys in fks.items():
+            check_fk(getattr(data, campo), keys, campo)
+        for campo in _FECHAS:
+            check_date(getattr(data, campo), campo)
+        doc = (data.PKIDTipoDocumentoIdentidad, data.NumeroDocumentoIdentidad.strip())
+        if doc in docs:
+            raise RowError("Ya existe una persona con el mismo tipo y número de documento.")
+        if data.IDPersonaNatural in ids:
+            raise RowError("IDPersonaNatural ya existe.")
+        # también cuenta para las filas siguientes del mismo archivo
+        docs.add(doc)
+        ids.add(data.IDPersonaNatural)
+        return tuple(getattr(data, c) for c in _COLUMNAS), (doc, data.IDPersonaNatural)
+
+    def on_reject(key):
+        docs.discard(key[0])
+        ids.discard(key[1])
+
+    return validate, on_reject
+
+
+@router.post("/importar", response_model=Dict[str, Any])
+def importar_personas(
+    archivo: UploadFile = File(..., description="CSV (, o ;), XLSX o NDJSON con los campos de PersonaNaturalIn"),
+    formato: Optional[str] = Query(None, description="csv | xlsx | ndjson (por defecto según la extensión)"),
+    validar: bool = Query(False, description="Solo validar, sin insertar"),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Alta masiva: valida en una pasada contra claves precargadas, inserta por
+    lotes (fast_executemany, un commit por lote) y devuelve el informe por fila.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        validate, on_reject = _bulk_validator(cur)
+        cur.execute("SELECT ISNULL(MAX(PKID), 0) FROM dbo.PersonaNatural")
+        desde = cur.fetchone()[0]
+        report = run_import(conn, iter_records(archivo, formato), validate, _BULK_INSERT_SQL,
+                            dry_run=validar, on_reject=on_reject)
+        if report.insertados:
+            # PKID es identidad: lo nuevo queda por encima del máximo previo
+            cur.execute("""
+                SELECT PKID, NumeroDocumentoIdentidad, PrimerNombre, SegundoNombre,
+                       ApellidoPaterno, ApellidoMaterno
+                FROM dbo.PersonaNatural WHERE PKID > ?
+            """, desde)
+            person_search.upsert_many([tuple(r) for r in cur.fetchall()])
+        return report.as_dict()
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cur.close()
+        conn.close()
+
+
 @router.put("/{pkid}", response_model=Dict[str, Any])
 def actualizar_persona(pkid: int, data: PersonaNaturalIn, user: dict = Depends(get_current_user)):
     conn = get_connection()
@@ -282,10 +408,12 @@ def actualizar_persona(pkid: int, data: PersonaNaturalIn, user: dict = Depends(g
         )
         cur.execute(update_sql, params)
         conn.commit()
+        person_search.upsert(_search_row(pkid, data))
+        worker_typeahead.invalidate()   # el documento también se busca en el autocompletado
 
         cur.execute("SELECT * FROM dbo.PersonaNatural WHERE PKID = ?", pkid)
         row = cur.fetchone()
-        return row_to_dict(cur, row)
+        return row_dict(cur, row)
     except pyodbc.IntegrityError as e:
         conn.rollback()
         raise HTTPException(status_code=400, detail=f"Violación de integridad: {str(e)}")
@@ -305,6 +433,7 @@ def eliminar_persona(pkid: int, user: dict = Depends(get_current_user)):
 
         cur.execute("DELETE FROM dbo.PersonaNatural WHERE PKID = ?", pkid)
         conn.commit()
+        person_search.remove(pkid)
         return {"detail": "Eliminado"}
     except pyodbc.IntegrityError as e:
         conn.rollback()
@@ -0,0 +1,193 @@
+# backend/services/afp_rates.py
+"""
+Índice en memoria de tasas AfpPeriodo con vigencia por fecha.
+
+Cada fila de AfpPeriodo rige desde su (Ano, Mes) hasta la siguiente fila
+de la misma (PKIDAfp, PKIDConceptoPlanilla). El índice guarda todas las
+filas ordenadas por una clave compuesta (afp, concepto, periodo), así que
+"tasa vigente a (año, mes)" es un searchsorted O(log n), y el lote se
+resuelve en una sola pasada NumPy.
+
+afp.py llama invalidate() al crear/actualizar/eliminar periodos.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from database import connection
+
+_PERIOD_BITS = 20
+_CONCEPT_BITS = 20
+_GROUP_SHIFT = _PERIOD_BITS
+
+
+def _period(ano, mes):
+    return np.asarray(ano, dtype=np.int64) * 12 + (np.asarray(mes, dtype=np.int64) - 1)
+
+
+def _group(afp, concepto):
+    return (np.asarray(afp, dtype=np.int64) << _CONCEPT_BITS) | np.asarray(concepto, dtype=np.int64)
+
+
+class AfpRateIndex:
+    def __init__(self, rows: Iterable[dict]):
+        rows = list(rows)
+        n = len(rows)
+        afp = np.fromiter((r["PKIDAfp"] for r in rows), dtype=np.int64, count=n)
+        concepto = np.fromiter((r["PKIDConceptoPlanilla"] for r in rows), dtype=np.int64, count=n)
+        periodo = _period(
+            np.fromiter((r["Ano"] for r in rows), dtype=np.int64, count=n),
+            np.fromiter((r["Mes"] for r in rows), dtype=np.int64, count=n),
+        )
+        keys = (_group(afp, concepto) << _GROUP_SHIFT) | periodo
+        order = np.argsort(keys, kind="stable")
+
+        def col(name):
+            return np.array(
+                [np.nan if r.get(name) is None else float(r[name]) for r in rows], dtype=np.float64
+            )[order] if n else np.empty(0)
+
+        self.keys = keys[order]
+        self.afp = afp[order]
+        self.concepto = concepto[order]
+        self.ano = (periodo[order] // 12)
+        self.mes = (periodo[order] % 12) + 1
+        self.pkid = np.fromiter((r["PKID"] for r in rows), dtype=np.int64, count=n)[order]
+        self.porcentaje_trabajador = col("PorcentajeTrabajador")
+        self.porcentaje_mixta = col("PorcentajeMixta")
+        self.tope_afp = col("TopeAfp")
+        # grupos (afp, concepto) -> rango [ini, fin) en los arreglos ordenados
+        self._groups: Dict[int, tuple] = {}
+        grupos = self.keys >> _GROUP_SHIFT
+        if n:
+            cortes = np.flatnonzero(np.diff(grupos)) + 1
+            inicios = np.concatenate(([0], cortes))
+            fines = np.concatenate((cortes, [n]))
+            for ini, fin in zip(inicios.tolist(), fines.tolist()):
+                self._groups[int(grupos[ini])] = (ini, fin)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _row(self, i: int) -> dict:
+        def f(v):
+            return None if np.isnan(v) else float(v)
+        return {
+            "PKID": int(self.pkid[i]),
+            "PKIDAfp": int(self.afp[i]),
+            "PKIDConceptoPlanilla": int(self.concepto[i]),
+            "Ano": int(self.ano[i]),
+            "Mes": int(self.mes[i]),
+            "PorcentajeTrabajador": f(self.porcentaje_trabajador[i]),
+            "PorcentajeMixta": f(self.porcentaje_mixta[i]),
+            "TopeAfp": f(self.tope_afp[i]),
+        }
+
+    def _locate(self, afp, concepto, ano, mes) -> int:
+        q = (int(_group(afp, concepto)) << _GROUP_SHIFT) | int(_period(ano, mes))
+        i = int(np.searchsorted(self.keys, q, side="right")) - 1
+        if i < 0 or (self.keys[i] >> _GROUP_SHIFT) != (q >> _GROUP_SHIFT):
+            return -1
+        return i
+
+    def as_of(self, afp: int, ano: int, mes: int, concepto: Optional[int] = None):
+        """
+        Con concepto: fila vigente (dict) o None.
+        Sin concepto: lista con la fila vigente de cada concepto de esa AFP.
+        """
+        if concepto is not None:
+            i = self._locate(afp, concepto, ano, mes)
+            return self._row(i) if i >= 0 else None
+        out: List[dict] = []
+        for g in self._groups:
+            if (g >> _CONCEPT_BITS) == afp:
+                i = self._locate(afp, g & ((1 << _CONCEPT_BITS) - 1), ano, mes)
+                if i >= 0:
+                    out.append(self._row(i))
+        return out
+
+    def lookup(self, afp, ano, mes, concepto) -> Dict[str, np.ndarray]:
+        """
+        Lote: arreglos del mismo largo (afp, ano, mes, concepto).
+        Devuelve arreglos de tasas (NaN donde no hay tasa vigente) y la máscara found.
+        """
+        q = (_group(afp, concepto) << _GROUP_SHIFT) | _period(ano, mes)
+        q = np.atleast_1d(q)
+        idx = np.searchsorted(self.keys, q, side="right") - 1
+        safe = np.clip(idx, 0, max(len(self.keys) - 1, 0))
+        if len(self.keys):
+            found = (idx >= 0) & ((self.keys[safe] >> _GROUP_SHIFT) == (q >> _GROUP_SHIFT))
+        else:
+            found = np.zeros(len(q), dtype=bool)
+
+        def pick(arr):
+            if not len(arr):
+                return np.full(len(q), np.nan)
+            return np.where(found, arr[safe], np.nan)
+
+        return {
+            "found": found,
+            "PKID": np.where(found, self.pkid[safe] if len(self.pkid) else 0, -1),
+            "PorcentajeTrabajador": pick(self.porcentaje_trabajador),
+            "PorcentajeMixta": pick(self.porcentaje_mixta),
+            "TopeAfp": pick(self.tope_afp),
+        }
+
+    def rows_as_of(self, ano: int, mes: int) -> List[dict]:
+        """Fila vigente de cada (AFP, concepto) al periodo."""
+        out = []
+        for g in self._groups:
+            i = self._locate(g >> _CONCEPT_BITS, g & ((1 << _CONCEPT_BITS) - 1), ano, mes)
+            if i >= 0:
+                out.append(self._row(i))
+        return out
+
+
+def load_rows(conn) -> List[dict]:
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT PKID, PKIDAfp, Ano, Mes, PKIDConceptoPlanilla,
+                   PorcentajeTrabajador, PorcentajeMixta, TopeAfp
+            FROM AfpPeriodo
+        """)
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+_index: Optional[AfpRateIndex] = None
+_version = 0
+_lock = threading.Lock()
+
+
+def get_index(conn=None) -> AfpRateIndex:
+    """
+    Índice vigente; se reconstruye en la primera consulta tras invalidate().
+    conn: conexión que el llamador ya tiene abierta, para no pedir otra al pool.
+    """
+    global _index
+    idx = _index
+    if idx is not None:
+        return idx
+    with _lock:
+        if _index is None:
+            version = _version
+            if conn is not None:
+                built = AfpRateIndex(load_rows(conn))
+            else:
+                with connection() as own:
+                    built = AfpRateIndex(load_rows(own))
+            # si hubo una escritura mientras se cargaba, no publicar datos viejos
+            if version == _version:
+                _index = built
+            return built
+        return _index
+
+
+def invalidate():
+    global _index, _version
+    _version += 1
+    _index = None
@@ -0,0 +1,104 @@
+# backend/services/amortization.py
+"""
+Cronograma de cuotas (amortización francesa, cuota fija) con NumPy.
+
+schedule() recibe un préstamo por posición (saldo, tasa por periodo,
+número de cuotas, fecha de la primera cuota) y devuelve las cuotas de
+todos los préstamos como columnas planas, sin bucles por préstamo:
+
+  cuota = P·r / (1 - (1 + r)^-n)         (P / n si r = 0)
+
+El interés de cada cuota se calcula sobre el saldo redondeado a céntimos
+(igual que un cronograma hecho a mano) y la última cuota absorbe la
+diferencia de redondeo, así el capital suma exactamente el saldo. El
+avance es por número de cuota sobre todos los préstamos a la vez: a lo
+más max(n) pasos de NumPy, no préstamos × cuotas.
+
+Fechas: mensual -> último día de cada mes desde el mes de inicio;
+semanal -> inicio + 7 días por cuota, con su semana ISO; ano y mes son
+los del jueves de esa semana (año ISO), así el 2024-12-30 es 2025, semana 1.
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+def _iso_week(d: np.ndarray):
+    """(año ISO, mes del jueves, semana ISO) de cada fecha."""
+    days = d.astype(np.int64)
+    weekday = (days + 3) % 7                  # 1970-01-01 fue jueves; lunes = 0
+    jueves = (days - weekday + 3).astype("datetime64[D]")
+    inicio_ano = jueves.astype("datetime64[Y]")
+    semana = ((jueves - inicio_ano.astype("datetime64[D]")).astype(np.int64) // 7 + 1).astype(np.int64)
+    meses = jueves.astype("datetime64[M]").astype(np.int64)
+    return inicio_ano.astype(np.int64) + 1970, meses % 12 + 1, semana
+
+
+def schedule(principal: Sequence[float], rate: Sequence[float], n: Sequence[int],
+             start: Sequence, weekly: Sequence[bool]) -> Dict[str, np.ndarray]:
+    """
+    principal: saldo a amortizar; rate: tasa por periodo (0.015 = 1.5 %);
+    n: cuotas (> 0); start: fecha de la primera cuota (datetime64[D] o ISO);
+    weekly: True para cuotas semanales.
+
+    -> columnas de igual largo: loan (índice del préstamo), numero (1..n),
+       cuota, capital, interes, saldo (después de pagar), fecha, ano, mes,
+       semana (0 en mensuales).
+    """
+    P0 = np.asarray(principal, dtype=np.float64)
+    r0 = np.asarray(rate, dtype=np.float64)
+    n0 = np.asarray(n, dtype=np.int64)
+    start0 = np.asarray(start, dtype="datetime64[D]")
+    weekly0 = np.asarray(weekly, dtype=bool)
+    if not len(n0):
+        empty = np.empty(0)
+        return {k: empty for k in ("loan", "numero", "cuota", "capital", "interes",
+                                   "saldo", "fecha", "ano", "mes", "semana")}
+
+    firsts = np.cumsum(n0) - n0
+    loan = np.repeat(np.arange(len(n0)), n0)
+    k = np.arange(int(n0.sum()), dtype=np.int64) - firsts[loan]      # 0 .. n-1
+
+    # cuota fija por préstamo (redondeada a céntimos)
+    con_tasa = r0 > 0
+    r_safe = np.where(con_tasa, r0, 1.0)
+    g = (1.0 + r0) ** n0
+    cuota0 = np.round(np.where(con_tasa, P0 * r_safe * g / np.where(con_tasa, g - 1.0, 1.0), P0 / n0), 2)
+
+    # interés sobre el saldo ya redondeado de la cuota anterior: se avanza
+    # cuota a cuota (a lo más max(n) pasos) pero sobre todos los préstamos a la vez
+    interes = np.empty(len(loan))
+    capital = np.empty(len(loan))
+    saldo = np.empty(len(loan))
+    b = np.round(P0, 2)
+    for j in range(int(n0.max())):
+        vivos = np.nonzero(n0 > j)[0]
+        pos = firsts[vivos] + j
+        bj = b[vivos]
+        it = np.round(bj * r0[vivos], 2)
+        cap = np.where(j == n0[vivos] - 1, bj, np.round(cuota0[vivos] - it, 2))   # la última cierra el saldo
+        bj = np.round(bj - cap, 2)
+        interes[pos], capital[pos], saldo[pos] = it, cap, bj
+        b[vivos] = bj
+    cuota = np.round(capital + interes, 2)
+
+    # fechas
+    w = weekly0[loan]
+    s = start0[loan]
+    mes_idx = s.astype("datetime64[M]") + k                             # mensual: mes de la cuota
+    fin_mes = (mes_idx + 1).astype("datetime64[D]") - 1
+    fecha = np.where(w, s + 7 * k, fin_mes)
+    meses = fecha.astype("datetime64[M]").astype(np.int64)
+    iso_ano, iso_mes, iso_semana = _iso_week(fecha)
+    return {
+        "loan": loan,
+        "numero": k + 1,
+        "cuota": cuota,
+        "capital": capital,
+        "interes": interes,
+        "saldo": saldo,
+        "fecha": fecha,
+        "ano": np.where(w, iso_ano, meses // 12 + 1970),
+        "mes": np.where(w, iso_mes, meses % 12 + 1),
+        "semana": np.where(w, iso_semana, 0),
+    }
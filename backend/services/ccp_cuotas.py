@@ -0,0 +1,453 @@
+# backend/services/ccp_cuotas.py
+"""
+Cuotas de CuentaCorrientePlanillas en bloque.
+
+regenerate() arma el cronograma de uno o miles de préstamos con
+amortization.schedule (una pasada NumPy para todos) y lo escribe con
+fast_executemany: por cada lote de préstamos, un DELETE de las cuotas
+pendientes y un INSERT masivo, en una transacción.
+
+Reglas:
+  - Una cuota está pendiente mientras ImporteCuota - ImporteAplicado > 0
+    (_PENDIENTE, la misma regla en regenerate() y apply_period()).
+  - Solo se reemplazan las cuotas sin abono; las aplicadas se conservan y
+    la numeración sigue después de ellas. Una cuota parcial se cierra en lo
+    abonado (ImporteCuota = ImporteAplicado) y su remanente, que sigue en
+    ImporteSaldo, entra al nuevo cronograma.
+  - Saldo a amortizar: ImporteSaldo de la cabecera (o ImporteDocumento -
+    ImporteAbono si está vacío).
+  - Cuotas a generar: NumeroCuotas - cuotas con abono; al menos una si
+    queda saldo.
+  - TasaInteres es el % por periodo de cuota (mensual o semanal).
+  - Primera cuota: el periodo siguiente a la última cuota aplicada, o al
+    de FechaEmision si no hay ninguna aplicada.
+  - PKIDNomina, PKIDTipoPlanilla y la frecuencia salen de las cuotas que
+    ya tiene el préstamo (semanal si tienen Semana); el tipo de planilla,
+    si no hay cuotas, de CuentaCorrientePlanillasAplicacion.
+
+Los préstamos que no se pueden generar vuelven en "omitidos" con el motivo.
+
+apply_period() aplica en bloque las cuotas vencidas de un periodo de
+planilla (empresa, nómina, año, mes[, semana]): una consulta sobre
+IX_CCPCuotas_NominaPeriodo, el tope contra el neto de cada trabajador en
+NumPy, y dos UPDATE set-based (cuotas y cabeceras) desde una tabla
+temporal, en una transacción.
+"""
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pyodbc
+
+from services.amortization import schedule
+from services.payroll_engine import INGRESO_MAX, INGRESO_MIN, TOTAL_TRABAJADOR_ID
+
+CHUNK = 1000        # préstamos por IN (...) y por transacción; SQL Server admite 2100 parámetros
+
+# cuota con importe por aplicar (sin abono o con abono parcial)
+_PENDIENTE = "q.ImporteCuota - ISNULL(q.ImporteAplicado, 0) > 0"
+
+_INSERT_SQL = """
+    INSERT INTO CuentaCorrientePlanillasCuotas (
+        PKIDCuentaCorrientePlanillas, NumeroCuota, ano, mes, PKIDTipoPlanilla, Semana,
+        FechaCuotaEstimada, ImporteCuota, PKIDNomina, PKIDSituacionRegistro
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _marks(n: int) -> str:
+    return ",".join("?" * n)
+
+
+def _load(cur, ids: Sequence[int]) -> Dict[int, dict]:
+    """Cabecera + resumen de cuotas + tipo de planilla por defecto, en tres consultas."""
+    m = _marks(len(ids))
+    cur.execute(f"""
+        SELECT c.PKID, c.ImporteDocumento, c.ImporteAbono, c.ImporteSaldo,
+               c.NumeroCuotas, c.TasaInteres, c.FechaEmision, c.PKIDSituacionRegistro
+        FROM CuentaCorrientePlanillas c
+        WHERE c.PKID IN ({m})
+    """, list(ids))
+    loans = {r.PKID: {
+        "saldo": float(r.ImporteSaldo) if r.ImporteSaldo is not None
+        else float(r.ImporteDocumento or 0) - float(r.ImporteAbono or 0),
+        "cuotas": r.NumeroCuotas,
+        "tasa": float(r.TasaInteres or 0),
+        "emision": r.FechaEmision,
+        "situacion": r.PKIDSituacionRegistro,
+        "aplicadas": 0, "ultima": 0, "fecha_ultima": None,
+        "nomina": None, "tipo_planilla": None, "semanal": False,
+    } for r in cur.fetchall()}
+
+    # cuotas con abono (completas o parciales): son las que regenerate() conserva
+    cur.execute(f"""
+        SELECT q.PKIDCuentaCorrientePlanillas AS PKID,
+               SUM(CASE WHEN ISNULL(q.ImporteAplicado, 0) <> 0 THEN 1 ELSE 0 END) AS Aplicadas,
+               MAX(CASE WHEN ISNULL(q.ImporteAplicado, 0) <> 0 THEN q.NumeroCuota END) AS Ultima,
+               MAX(CASE WHEN ISNULL(q.ImporteAplicado, 0) <> 0 THEN q.FechaCuotaEstimada END) AS FechaUltima,
+               MAX(q.PKIDNomina) AS PKIDNomina, MAX(q.PKIDTipoPlanilla) AS PKIDTipoPlanilla,
+               MAX(CASE WHEN q.Semana IS NOT NULL THEN 1 ELSE 0 END) AS Semanal
+        FROM CuentaCorrientePlanillasCuotas q
+        WHERE q.PKIDCuentaCorrientePlanillas IN ({m})
+        GROUP BY q.PKIDCuentaCorrientePlanillas
+    """, list(ids))
+    for r in cur.fetchall():
+        ln = loans.get(r.PKID)
+        if ln is not None:
+            ln.update(aplicadas=r.Aplicadas or 0, ultima=r.Ultima or 0, fecha_ultima=r.FechaUltima,
+                      nomina=r.PKIDNomina, tipo_planilla=r.PKIDTipoPlanilla, semanal=bool(r.Semanal))
+
+    cur.execute(f"""
+        SELECT a.PKIDCuentaCorrientePlanillas AS PKID, MIN(a.PKIDTipoPlanilla) AS PKIDTipoPlanilla
+        FROM CuentaCorrientePlanillasAplicacion a
+        WHERE a.PKIDCuentaCorrientePlanillas IN ({m})
+        GROUP BY a.PKIDCuentaCorrientePlanillas
+    """, list(ids))
+    for r in cur.fetchall():
+        ln = loans.get(r.PKID)
+        if ln is not None and ln["tipo_planilla"] is None:
+            ln["tipo_planilla"] = r.PKIDTipoPlanilla
+    return loans
+
+
+def _first_due(ref: date, semanal: bool) -> np.datetime64:
+    d = np.datetime64(ref, "D")
+    if semanal:
+        return d + 7
+    # mensual: schedule() toma el mes; el día es el último del mes
+    return (d.astype("datetime64[M]") + 1).astype("datetime64[D]")
+
+
+def regenerate(
+    conn,
+    ids: Sequence[int],
+    tasa: Optional[float] = None,
+    nomina: Optional[int] = None,
+    tipo_planilla: Optional[int] = None,
+    frecuencia: Optional[str] = None,
+    fecha_inicio: Optional[date] = None,
+    situacion: Optional[int] = None,
+    simular: bool = False,
+    detalle: bool = False,
+) -> dict:
+    """
+    Regenera las cuotas pendientes de ids. tasa (en %) también se graba en la
+    cabecera. Con simular no escribe nada; con detalle devuelve las cuotas
+    (con capital, interés y saldo, que la tabla no guarda).
+    """
+    t0 = time.perf_counter()
+    prestamos = cuotas = 0
+    omitidos: List[dict] = []
+    filas: List[dict] = []
+    ids = list(dict.fromkeys(ids))
+    cur = conn.cursor()
+    try:
+        for i in range(0, len(ids), CHUNK):
+            chunk = ids[i:i + CHUNK]
+            loans = _load(cur, chunk)
+            sel, P, r, n, start, weekly, base, nom, tpl, sit = ([] for _ in range(10))
+            for pk in chunk:
+                ln = loans.get(pk)
+                if ln is None:
+                    omitidos.append({"PKID": pk, "motivo": "No existe"})
+                    continue
+                # si ya no quedan cuotas por número pero sí saldo (p. ej. la
+                # última quedó parcial), el remanente va en una cuota más
+                pendientes = max((ln["cuotas"] or 0) - ln["aplicadas"], 1)
+                motivo = None
+                if not ln["cuotas"]:
+                    motivo = "Sin NumeroCuotas"
+                elif ln["saldo"] <= 0:
+                    motivo = "Sin saldo"
+                elif (nomina or ln["nomina"]) is None:
+                    motivo = "Sin PKIDNomina"
+                elif (tipo_planilla or ln["tipo_planilla"]) is None:
+                    motivo = "Sin PKIDTipoPlanilla"
+                if motivo:
+                    omitidos.append({"PKID": pk, "motivo": motivo})
+                    continue
+                semanal = frecuencia == "semanal" if frecuencia else ln["semanal"]
+                if fecha_inicio is not None:
+                    inicio = np.datetime64(fecha_inicio, "D")
+                else:
+                    inicio = _first_due(ln["fecha_ultima"] or ln["emision"] or date.today(), semanal)
+                sel.append(pk)
+                P.append(ln["saldo"])
+                r.append((tasa if tasa is not None else ln["tasa"]) / 100.0)
+                n.append(pendientes)
+                start.append(inicio)
+                weekly.append(semanal)
+                base.append(ln["ultima"])
+                nom.append(nomina or ln["nomina"])
+                tpl.append(tipo_planilla or ln["tipo_planilla"])
+                sit.append(situacion or ln["situacion"])
+            if not sel:
+                continue
+
+            s = schedule(P, r, n, np.array(start, dtype="datetime64[D]"), weekly)
+            loan = s["loan"]
+            pkid = np.asarray(sel)[loan].tolist()
+            numero = (np.asarray(base)[loan] + s["numero"]).tolist()
+            ano, mes = s["ano"].tolist(), s["mes"].tolist()
+            semana = [w if w else None for w in s["semana"].tolist()]
+            fecha = s["fecha"].tolist()                       # datetime.date
+            importe = s["cuota"].tolist()
+            nom_l = [nom[j] for j in loan.tolist()]
+            tpl_l = [tpl[j] for j in loan.tolist()]
+            sit_l = [sit[j] for j in loan.tolist()]
+            params = list(zip(pkid, numero, ano, mes, tpl_l, semana, fecha, importe, nom_l, sit_l))
+
+            if detalle:
+                cap, inte, sal = s["capital"].tolist(), s["interes"].tolist(), s["saldo"].tolist()
+                filas.extend({
+                    "PKIDCuentaCorrientePlanillas": p[0], "NumeroCuota": p[1], "ano": p[2], "mes": p[3],
+                    "PKIDTipoPlanilla": p[4], "Semana": p[5], "FechaCuotaEstimada": p[6],
+                    "ImporteCuota": p[7], "Capital": cap[j], "Interes": inte[j], "Saldo": sal[j],
+                    "PKIDNomina": p[8], "PKIDSituacionRegistro": p[9],
+                } for j, p in enumerate(params))
+
+            if not simular:
+                try:
+                    m = _marks(len(sel))
+                    if tasa is not None:
+                        cur.execute(f"UPDATE CuentaCorrientePlanillas SET TasaInteres = ? WHERE PKID IN ({m})",
+                                    [tasa] + sel)
+                    # parciales: se cierran en lo abonado; el remanente está en el saldo
+                    cur.execute(f"""
+                        UPDATE q SET ImporteCuota = q.ImporteAplicado
+                        FROM CuentaCorrientePlanillasCuotas q
+                        WHERE q.PKIDCuentaCorrientePlanillas IN ({m})
+                          AND ISNULL(q.ImporteAplicado, 0) > 0 AND {_PENDIENTE}
+                    """, sel)
+                    cur.execute(f"""
+                        DELETE q FROM CuentaCorrientePlanillasCuotas q
+                        WHERE q.PKIDCuentaCorrientePlanillas IN ({m}) AND {_PENDIENTE}
+                    """, sel)
+                    cur.fast_executemany = True
+                    cur.executemany(_INSERT_SQL, params)
+                    cur.fast_executemany = False
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            prestamos += len(sel)
+            cuotas += len(params)
+    finally:
+        cur.close()
+
+    out = {
+        "prestamos": prestamos,
+        "cuotas": cuotas,
+        "omitidos": omitidos,
+        "segundos": round(time.perf_counter() - t0, 2),
+    }
+    if detalle:
+        out["detalle"] = filas
+    return out
+
+
+# ---------- aplicación por periodo ----------
+_INDEX_SQL = """
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+               WHERE name = 'IX_CCPCuotas_NominaPeriodo'
+                 AND object_id = OBJECT_ID('dbo.CuentaCorrientePlanillasCuotas'))
+CREATE INDEX IX_CCPCuotas_NominaPeriodo
+    ON dbo.CuentaCorrientePlanillasCuotas (PKIDNomina, ano, mes, Semana)
+    INCLUDE (PKIDCuentaCorrientePlanillas, NumeroCuota, ImporteCuota, ImporteAplicado, PKIDTipoPlanilla)
+"""
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def _ensure_index(conn, cur):
+    """Índice para la selección de cuotas por periodo; si no hay permisos se sigue sin él."""
+    global _index_ready
+    if _index_ready:
+        return
+    with _index_lock:
+        if _index_ready:
+            return
+        try:
+            cur.execute(_INDEX_SQL)
+            conn.commit()
+        except pyodbc.Error:
+            conn.rollback()
+        _index_ready = True
+
+
+def _net_pay(cur, empresa: int, ano: int, mes: int) -> Optional[Dict[int, float]]:
+    """
+    Neto por IDTrabajador según RevisaPlanillaCalculada: ingresos menos los
+    demás conceptos del trabajador, sin contar los de cuenta corriente (las
+    propias cuotas). None si la planilla del periodo no está calculada.
+    """
+    cur.execute("""
+        SELECT r.IDTrabajador,
+               SUM(CASE WHEN r.IDConceptoPlanilla BETWEEN ? AND ? THEN r.Trabajador ELSE 0 END)
+             - SUM(CASE WHEN r.IDConceptoPlanilla BETWEEN ? AND ?
+                          OR ISNULL(cp.IndicadorCuentaCorrienteCheck, 0) = 1
+                        THEN 0 ELSE r.Trabajador END) AS Neto
+        FROM RevisaPlanillaCalculada r
+        INNER JOIN Empresa e ON e.IDEmpresa = r.IdEmpresa
+        LEFT JOIN ConceptoPlanilla cp ON cp.IDConceptoPlanilla = r.IDConceptoPlanilla
+        WHERE e.PKID = ? AND r.Ano = ? AND r.Mes = ? AND r.IDTrabajador <> ?
+        GROUP BY r.IDTrabajador
+    """, (INGRESO_MIN, INGRESO_MAX, INGRESO_MIN, INGRESO_MAX, empresa, ano, mes, TOTAL_TRABAJADOR_ID))
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    return {int(r[0]): float(r[1] or 0) for r in rows}
+
+
+def allocate(worker: np.ndarray, cuota: np.ndarray, neto: np.ndarray) -> np.ndarray:
+    """
+    Importe a aplicar por cuota. worker: índice del trabajador de cada cuota
+    (cuotas agrupadas por trabajador, en orden de prioridad); neto: disponible
+    por trabajador. Cada cuota toma lo que deja la anterior, sin bucles.
+    """
+    if not len(cuota):
+        return np.empty(0)
+    acum = np.cumsum(cuota)
+    inicio = np.r_[True, worker[1:] != worker[:-1]]
+    previo = acum - cuota                                  # acumulado antes de la cuota
+    previo -= np.maximum.accumulate(np.where(inicio, previo, 0.0))
+    libre = np.maximum(neto[worker] - previo, 0.0)
+    return np.round(np.minimum(cuota, libre), 2)
+
+
+def apply_period(
+    conn,
+    empresa: int,
+    nomina: int,
+    ano: int,
+    mes: int,
+    semana: Optional[int] = None,
+    tipo_planilla: Optional[int] = None,
+    respetar_neto: bool = True,
+    tipo_pago: Optional[str] = None,
+    simular: bool = False,
+) -> dict:
+    """
+    Aplica las cuotas vencidas al periodo (las de periodos anteriores aún
+    pendientes incluidas). Con semana se toman las cuotas semanales hasta esa
+    semana; sin ella, las mensuales hasta ano/mes.
+
+    Con respetar_neto cada trabajador paga sus cuotas, de la más antigua a
+    la más nueva, hasta agotar el neto de la planilla; la última puede quedar
+    parcial y lo que no alcanza queda pendiente. De una cuota parcial solo
+    se toma el remanente, que se suma a su ImporteAplicado.
+    """
+    t0 = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        _ensure_index(conn, cur)
+        if semana is None:
+            periodo = "q.Semana IS NULL AND (q.ano < ? OR (q.ano = ? AND q.mes <= ?))"
+            pparams = [ano, ano, mes]
+        else:
+            periodo = "q.Semana IS NOT NULL AND (q.ano < ? OR (q.ano = ? AND q.Semana <= ?))"
+            pparams = [ano, ano, semana]
+        filtro_tp = " AND q.PKIDTipoPlanilla = ?" if tipo_planilla else ""
+        cur.execute(f"""
+            SELECT q.PKID, q.PKIDCuentaCorrientePlanillas, q.ImporteCuota, t.IDTrabajador,
+                   ISNULL(q.ImporteAplicado, 0) AS ImporteAplicado
+            FROM CuentaCorrientePlanillasCuotas q
+            INNER JOIN CuentaCorrientePlanillas c ON c.PKID = q.PKIDCuentaCorrientePlanillas
+            INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
+            WHERE q.PKIDNomina = ? AND {periodo}{filtro_tp}
+              AND {_PENDIENTE}
+              AND t.PKIDEmpresa = ?
+            ORDER BY t.IDTrabajador, q.ano, q.mes, q.Semana, q.NumeroCuota, q.PKID
+        """, [nomina] + pparams + ([tipo_planilla] if tipo_planilla else []) + [empresa])
+        rows = cur.fetchall()
+
+        n = len(rows)
+        pkid = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        previo = np.fromiter((float(r[4] or 0) for r in rows), dtype=np.float64, count=n)
+        # solo lo que falta de cada cuota (toda, o el remanente de una parcial)
+        cuota = np.round(np.fromiter((float(r[2] or 0) for r in rows), dtype=np.float64, count=n) - previo, 2)
+        trab_ids = np.fromiter((r[3] for r in rows), dtype=np.int64, count=n)
+        if respetar_neto:
+            netos = _net_pay(cur, empresa, ano, mes) if n else {}
+            if netos is None:
+                raise ValueError("La planilla del periodo no está calculada (use RespetarNeto=false).")
+            unicos, worker = np.unique(trab_ids, return_inverse=True)
+            neto = np.array([max(netos.get(int(t), 0.0), 0.0) for t in unicos])
+            importe = allocate(worker, cuota, neto)
+        else:
+            importe = cuota
+
+        aplica = importe > 0
+        out = {
+            "cuotas": n,
+            "aplicadas": int(aplica.sum()),
+            "parciales": int((aplica & (importe < cuota)).sum()),
+            "pendientes": int((~aplica).sum()),
+            "importe": round(float(importe.sum()), 2),
+            "prestamos": len({rows[i][1] for i in np.nonzero(aplica)[0].tolist()}),
+        }
+        if simular or not aplica.any():
+            out["segundos"] = round(time.perf_counter() - t0, 2)
+            return out
+
+        # escritura: lote en #CuotaAplica y dos UPDATE set-based
+        secuencia = ano * 100 + mes
+        try:
+            cur.execute("""
+                IF OBJECT_ID('tempdb..#CuotaAplica') IS NOT NULL DROP TABLE #CuotaAplica;
+                CREATE TABLE #CuotaAplica (PKID INT PRIMARY KEY, Previo DECIMAL(18, 2) NOT NULL,
+                                           Importe DECIMAL(18, 2) NOT NULL);
+                IF OBJECT_ID('tempdb..#CuotaHecha') IS NOT NULL DROP TABLE #CuotaHecha;
+                CREATE TABLE #CuotaHecha (PKIDCuentaCorrientePlanillas INT NOT NULL, Importe DECIMAL(18, 2) NOT NULL);
+            """)
+            cur.fast_executemany = True
+            cur.executemany("INSERT INTO #CuotaAplica (PKID, Previo, Importe) VALUES (?, ?, ?)",
+                            list(zip(pkid[aplica].tolist(), previo[aplica].tolist(), importe[aplica].tolist())))
+            cur.fast_executemany = False
+            # se suma a lo ya abonado; si otra aplicación concurrente cambió
+            # ImporteAplicado desde la lectura, esa cuota no se toca
+            cur.execute("""
+                UPDATE q
+                SET ImporteAplicado = ISNULL(q.ImporteAplicado, 0) + a.Importe,
+                    anoaplicacion = ?, mesaplicacion = ?, semanaaplicacion = ?,
+                    SecuenciaAnoMesAplicacion = ?,
+                    TipoPago = COALESCE(?, q.TipoPago),
+                    IndicadorProceso = 1
+                OUTPUT inserted.PKIDCuentaCorrientePlanillas, a.Importe INTO #CuotaHecha
+                FROM CuentaCorrientePlanillasCuotas q
+                INNER JOIN #CuotaAplica a ON a.PKID = q.PKID
+                WHERE ISNULL(q.ImporteAplicado, 0) = a.Previo
+            """, (ano, mes, semana, secuencia, tipo_pago))
+            # cabecera: se suma lo aplicado en esta corrida, sin volver a sumar todas las cuotas
+            cur.execute("""
+                UPDATE c
+                SET ImporteAbono = ISNULL(c.ImporteAbono, 0) + h.Total,
+                    ImporteSaldo = ISNULL(c.ImporteSaldo, c.ImporteDocumento - ISNULL(c.ImporteAbono, 0)) - h.Total
+                FROM CuentaCorrientePlanillas c
+                INNER JOIN (SELECT PKIDCuentaCorrientePlanillas, SUM(Importe) AS Total
+                            FROM #CuotaHecha GROUP BY PKIDCuentaCorrientePlanillas) h
+                        ON h.PKIDCuentaCorrientePlanillas = c.PKID
+            """)
+            cur.execute("SELECT COUNT(*), ISNULL(SUM(Importe), 0) FROM #CuotaHecha")
+            hechas, total = cur.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # la conexión vuelve al pool: no dejar las temporales en la sesión
+            cur.execute("""
+                IF OBJECT_ID('tempdb..#CuotaAplica') IS NOT NULL DROP TABLE #CuotaAplica;
+                IF OBJECT_ID('tempdb..#CuotaHecha') IS NOT NULL DROP TABLE #CuotaHecha;
+            """)
+
+        out["aplicadas"] = int(hechas)
+        out["importe"] = round(float(total), 2)
+        out["segundos"] = round(time.perf_counter() - t0, 2)
+        return out
+    finally:
+        cur.close()
@@ -0,0 +1,124 @@
+# backend/services/columnar.py
+"""
+Respuesta columnar para listados grandes (?format=columnar).
+
+En vez de una lista de dicts (los mismos ~30 nombres repetidos por fila),
+devuelve los nombres una sola vez y un arreglo por columna:
+
+    {"columns": ["PKID", "Ano", ...], "types": ["int", "int", ...],
+     "data": [[1, 2, ...], [2024, 2024, ...], ...], "rows": 2}
+
+El convertidor se compila una vez por consulta a partir de
+cursor.description (Decimal -> float, fecha -> ISO, bit -> bool) y se
+aplica columna por columna sobre zip(*rows), sin crear un dict por fila.
+Las fechas repetidas se formatean una sola vez.
+
+    COLUMNAR = Columnar(drop=("PKIDEmpresa",))
+    return COLUMNAR.response(cur.description, cur.fetchall())
+"""
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.responses import Response
+
+from services.serialize import json_response
+
+# tipo de pyodbc (description[i][1]) -> nombre en "types"
+_KINDS = {
+    int: "int",
+    float: "float",
+    Decimal: "float",
+    bool: "bool",
+    str: "str",
+    date: "date",
+    datetime: "datetime",
+    time: "time",
+}
+
+
+def _identity(col):
+    return list(col)
+
+
+def _to_float(col):
+    return [None if v is None else float(v) for v in col]
+
+
+def _to_bool(col):
+    return [None if v is None else bool(v) for v in col]
+
+
+def _to_iso(col):
+    memo: Dict[Any, str] = {}
+    out = []
+    for v in col:
+        if v is None:
+            out.append(None)
+            continue
+        s = memo.get(v)
+        if s is None:
+            s = memo[v] = v.isoformat()
+        out.append(s)
+    return out
+
+
+def _to_str(col):
+    return [None if v is None else str(v) for v in col]
+
+
+_CONVERT: Dict[str, Callable[[Sequence[Any]], List[Any]]] = {
+    "int": _identity,
+    "str": _identity,
+    "float": _to_float,
+    "bool": _to_bool,
+    "date": _to_iso,
+    "datetime": _to_iso,
+    "time": _to_iso,
+}
+
+
+class _Plan:
+    def __init__(self, description, drop: Sequence[str]):
+        self.index, self.columns, self.types, self.convert = [], [], [], []
+        for i, d in enumerate(description):
+            if d[0] in drop:
+                continue
+            kind = _KINDS.get(d[1])
+            self.index.append(i)
+            self.columns.append(d[0])
+            # tipos no previstos (binarios, GUID...) salen como texto
+            self.types.append(kind or "str")
+            self.convert.append(_CONVERT[kind] if kind else _to_str)
+
+
+class Columnar:
+    def __init__(self, drop: Sequence[str] = ()):
+        """drop: columnas del SELECT que no van en la respuesta (p. ej. las que solo sirven de filtro)."""
+        self._drop = frozenset(drop)
+        self._plans: Dict[Tuple, _Plan] = {}
+        self._lock = threading.Lock()
+
+    def _plan(self, description) -> _Plan:
+        key = tuple((d[0], d[1]) for d in description)
+        plan = self._plans.get(key)
+        if plan is None:
+            with self._lock:
+                plan = self._plans.setdefault(key, _Plan(description, self._drop))
+        return plan
+
+    def encode(self, description, rows: Sequence[Sequence[Any]]) -> dict:
+        plan = self._plan(description)
+        if rows:
+            cols = list(zip(*rows))
+            data = [conv(cols[i]) for i, conv in zip(plan.index, plan.convert)]
+        else:
+            data = [[] for _ in plan.columns]
+        return {"columns": plan.columns, "types": plan.types, "data": data, "rows": len(rows)}
+
+    def response(self, description, rows: Sequence[Sequence[Any]], **extra: Optional[Any]) -> Response:
+        """Respuesta ya codificada; extra se agrega al cuerpo (next_cursor, limit)."""
+        body = self.encode(description, rows)
+        body.update(extra)
+        return json_response(body)
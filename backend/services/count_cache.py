@@ -0,0 +1,128 @@
+# backend/services/count_cache.py
+"""
+Caché de totales (COUNT) para los listados paginados con _build_where.
+
+La clave es la tabla + el FROM/WHERE normalizado + sus parámetros, así que
+dos peticiones con los mismos filtros (cualquier página) comparten el total.
+Los routers llaman invalidate("Tabla") después de cada commit; el TTL cubre
+escrituras hechas por otro proceso.
+
+Modos (?count=):
+  exact   total exacto: caché vigente o COUNT(1).
+  approx  acepta un total en caché aunque esté invalidado (hasta
+          APPROX_MAX_AGE); sin filtros usa el conteo de filas de los
+          metadatos (sys.dm_db_partition_stats), sin recorrer la tabla.
+  none    no cuenta; el listado informa has_more (scroll infinito).
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Literal, Optional, Sequence, Tuple
+
+import pyodbc
+
+COUNT_TTL = float(os.getenv("COUNT_CACHE_TTL", "120"))
+APPROX_MAX_AGE = float(os.getenv("COUNT_CACHE_APPROX_MAX_AGE", "1800"))
+MAX_ENTRIES = 5000
+
+CountMode = Literal["exact", "approx", "none"]
+
+_ROWS_SQL = """
+    SELECT SUM(row_count) FROM sys.dm_db_partition_stats
+    WHERE object_id = OBJECT_ID(?) AND index_id IN (0, 1)
+"""
+
+
+@dataclass
+class _Entry:
+    total: int
+    at: float
+    version: int
+
+
+class CountCache:
+    def __init__(self, ttl: float = COUNT_TTL, approx_max_age: float = APPROX_MAX_AGE):
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._approx_max_age = approx_max_age
+        self.hits = 0
+        self.misses = 0
+        self.approx = 0
+        self.skipped = 0
+
+    def total(self, cur, table: str, from_where: str, params: Sequence, mode: CountMode = "exact") -> Optional[int]:
+        """
+        Total de "SELECT COUNT(1) " + from_where con params según el modo
+        (None con count=none). from_where es "FROM Tabla t ... WHERE ...".
+        """
+        if mode == "none":
+            with self._lock:
+                self.skipped += 1
+            return None
+        key = (table, " ".join(from_where.split()), tuple(params))
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(table, 0)
+            e = self._entries.get(key)
+            if e is not None:
+                edad = now - e.at
+                if (e.version == version and edad < self._ttl) or (mode == "approx" and edad < self._approx_max_age):
+                    self.hits += 1
+                    return e.total
+        if mode == "approx" and not params:
+            n = self._table_rows(cur, table)
+            if n is not None:
+                with self._lock:
+                    self.approx += 1
+                return n
+        with self._lock:
+            self.misses += 1
+        cur.execute("SELECT COUNT(1) " + from_where, list(params))
+        total = int(cur.fetchone()[0])
+        with self._lock:
+            # si hubo una escritura mientras se contaba, no guardar
+            if self._versions.get(table, 0) == version:
+                if len(self._entries) >= MAX_ENTRIES:
+                    self._entries.clear()
+                self._entries[key] = _Entry(total, now, version)
+        return total
+
+    @staticmethod
+    def _table_rows(cur, table: str) -> Optional[int]:
+        # requiere VIEW DATABASE STATE; sin permiso se cae al COUNT exacto
+        try:
+            cur.execute(_ROWS_SQL, ("dbo." + table,))
+            row = cur.fetchone()
+        except pyodbc.Error:
+            return None
+        return int(row[0]) if row and row[0] is not None else None
+
+    def invalidate(self, *tables: str):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "approx": self.approx,
+                "skipped": self.skipped,
+                "versions": dict(self._versions),
+            }
+
+
+count_cache = CountCache()
+
+
+def total(cur, table: str, from_where: str, params: Sequence, mode: CountMode = "exact") -> Optional[int]:
+    return count_cache.total(cur, table, from_where, params, mode)
+
+
+def invalidate(*tables: str):
+    count_cache.invalidate(*tables)
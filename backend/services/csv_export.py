@@ -0,0 +1,82 @@
+# backend/services/csv_export.py
+"""
+Exportación CSV en streaming.
+
+La consulta se ejecuta antes de devolver la respuesta (un error SQL sigue
+saliendo como 500), y luego las filas se leen con fetchmany, se escriben
+con csv.writer y se codifican por bloques: el BOM utf-8-sig va una sola
+vez al inicio. Ni la memoria ni el primer byte dependen del tamaño de la
+tabla. La conexión vuelve al pool al terminar o si el cliente corta.
+"""
+import codecs
+import csv
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from starlette.responses import StreamingResponse
+
+from database import get_connection
+
+CHUNK_SIZE = 2000
+
+
+class _Buffer:
+    """Destino de csv.writer que acumula el texto del bloque actual."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def write(self, s: str):
+        self.parts.append(s)
+
+    def take(self) -> str:
+        s = "".join(self.parts)
+        self.parts.clear()
+        return s
+
+
+def iter_csv(cursor, header: Optional[Sequence[str]] = None,
+             row: Optional[Callable] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Recorre un cursor ya ejecutado y produce bytes CSV (utf-8-sig).
+    header: encabezados; por defecto los nombres de cursor.description.
+    row(r): convierte cada fila pyodbc en la lista a escribir.
+    """
+    encoder = codecs.getincrementalencoder("utf-8-sig")()
+    buf = _Buffer()
+    writer = csv.writer(buf)
+    writer.writerow(header if header is not None else [c[0] for c in cursor.description])
+    yield encoder.encode(buf.take())
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        writer.writerows(map(row, chunk) if row else chunk)
+        yield encoder.encode(buf.take())
+    tail = encoder.encode("", final=True)
+    if tail:
+        yield tail
+
+
+def csv_response(sql: str, params, filename: str, header: Optional[Sequence[str]] = None,
+                 row: Optional[Callable] = None, chunk_size: int = CHUNK_SIZE) -> StreamingResponse:
+    """
+    Ejecuta sql y devuelve un StreamingResponse text/csv que lee por bloques.
+    Los errores al ejecutar se propagan aquí (antes de enviar cabeceras).
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+    except Exception:
+        conn.close()
+        raise
+
+    def body():
+        try:
+            yield from iter_csv(cur, header, row, chunk_size)
+        finally:
+            cur.close()
+            conn.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body(), media_type="text/csv", headers=headers)
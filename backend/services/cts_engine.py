@@ -0,0 +1,416 @@
+# backend/services/cts_engine.py
+"""
+Motor de CTS por PeriodoCTS (NumPy).
+
+Calcula en una pasada la CTSCalculada de todos los trabajadores de la
+empresa con contrato en el semestre del periodo:
+
+  semestre        PeriodoCTS mayo -> nov..abr; noviembre -> may..oct
+  tiempo          del inicio de contrato (o del semestre) al cese (o fin
+                  del semestre), en meses y días de 30, menos los días
+                  no computables
+  remuneración    por concepto de ingreso del semestre (RevisaPlanillaCalculada):
+                    G  gratificación (conceptos indicados)     suma / 6
+                    F  pagado todos los meses en servicio       último mes
+                    V  pagado en 3 o más meses                  suma / 6
+                  el resto (y los subsidios) va a ImporteNoComputable
+  CTS             base · días liquidados / 360 · PorcentajeCTS del régimen
+
+Las entradas se cargan en bloque (load_inputs) y save() hace el upsert de
+CTSCalculada y CTSCalculadaConcepto con tablas temporales y sentencias
+set-based, en una transacción. No hay bucles por trabajador en compute().
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.payroll_engine import INGRESO_MAX, INGRESO_MIN, TOTAL_TRABAJADOR_ID
+
+MESES = 6
+MIN_MESES_VARIABLE = 3
+REGIMEN_PORCENTAJE = {1: 100.0, 2: 50.0}      # 1 regular, 2 régimen especial (media CTS)
+FACTOR_SEXTO = round(1 / MESES, 6)
+NAT = np.datetime64("NaT", "D")
+
+
+@dataclass
+class CTSInputs:
+    periodo: int                     # PKID de PeriodoCTS
+    ano: int
+    mes: int
+    trabajadores: np.ndarray         # (N,) PKID de Trabajador
+    inicio: np.ndarray               # (N,) datetime64[D] inicio del contrato vigente
+    cese: np.ndarray                 # (N,) datetime64[D] fin de contrato, NaT = indefinido
+    ingreso: np.ndarray              # (N,) datetime64[D] primer contrato (FechaIngresoTrabajador)
+    concepto_ids: np.ndarray         # (K,) PKID de ConceptoPlanilla
+    montos: np.ndarray               # (N, K, 6) ingresos por mes del semestre
+    gratificacion: np.ndarray        # (K,) bool
+    no_computable: np.ndarray        # (K,) bool (subsidios)
+    regimen: np.ndarray              # (N,) 1 o 2
+    dias_no_computables: np.ndarray  # (N,)
+    tipo_cambio: Optional[float] = None
+    porcentajes: Dict[int, float] = field(default_factory=lambda: dict(REGIMEN_PORCENTAJE))
+
+
+def semester(ano: int, mes: int):
+    """(primer día, último día) del semestre que se deposita en ano/mes."""
+    fin_m = np.datetime64(f"{ano:04d}-{mes:02d}", "M")
+    return (fin_m - MESES).astype("datetime64[D]"), fin_m.astype("datetime64[D]") - 1
+
+
+def _dias_mes(m: np.ndarray) -> np.ndarray:
+    return ((m + 1).astype("datetime64[D]") - m.astype("datetime64[D]")).astype(np.int64)
+
+
+def service_time(desde: np.ndarray, hasta: np.ndarray):
+    """
+    Meses y días (mes de 30) entre desde y hasta inclusive: el primer y el
+    último mes incompletos cuentan sus días, los demás como meses enteros.
+    """
+    sM, eM = desde.astype("datetime64[M]"), hasta.astype("datetime64[M]")
+    s_dia = (desde - sM.astype("datetime64[D]")).astype(np.int64) + 1
+    e_dia = (hasta - eM.astype("datetime64[D]")).astype(np.int64) + 1
+    primero = s_dia == 1
+    ultimo = e_dia == _dias_mes(eM)
+    mismo = sM == eM
+    entre = (eM - sM).astype(np.int64) - 1
+    meses = np.where(mismo, (primero & ultimo).astype(np.int64),
+                     entre + primero + ultimo)
+    dias = np.where(
+        mismo,
+        np.where(primero & ultimo, 0, np.minimum(30, e_dia - s_dia + 1)),
+        np.where(primero, 0, np.minimum(30, _dias_mes(sM) - s_dia + 1))
+        + np.where(ultimo, 0, np.minimum(30, e_dia)),
+    )
+    total = np.maximum(meses * 30 + dias, 0)
+    return total // 30, total % 30
+
+
+def years_months_days(desde: np.ndarray, hasta: np.ndarray):
+    """Tiempo de servicio calendario (años, meses, días) de desde a hasta inclusive."""
+    e1 = hasta + 1
+    sM = desde.astype("datetime64[M]")
+    s_dia = (desde - sM.astype("datetime64[D]")).astype(np.int64)
+    e_dia = (e1 - e1.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)
+    meses = (e1.astype("datetime64[M]") - sM).astype(np.int64) - (e_dia < s_dia)
+    ancla = (sM + meses).astype("datetime64[D]") + s_dia
+    dias = np.maximum((e1 - ancla).astype(np.int64), 0)
+    meses = np.maximum(meses, 0)
+    return meses // 12, meses % 12, dias
+
+
+class CTSResult:
+    def __init__(self, inputs: CTSInputs, elegible: np.ndarray, columnas: Dict[str, np.ndarray],
+                 tipo: np.ndarray, base_concepto: np.ndarray):
+        self.inputs = inputs
+        self.elegible = elegible              # (N,) bool
+        self.columnas = columnas              # columnas de CTSCalculada, (N,)
+        self.tipo = tipo                      # (N, K) 'F' / 'V' / 'G' / ''
+        self.base_concepto = base_concepto    # (N, K) remuneración computable por concepto
+
+    def rows(self) -> List[dict]:
+        idx = np.nonzero(self.elegible)[0]
+        names = list(self.columnas)
+        lists = [self.columnas[k][idx].tolist() for k in names]
+        return [dict(zip(names, vals)) for vals in zip(*lists)]
+
+    def concept_rows(self) -> List[tuple]:
+        """(PKIDTrabajador, PKIDConceptoPlanilla, BaseImponibleCTS, FactorCTS, ImporteCTS, TipoCalculoCTS)."""
+        inp = self.inputs
+        wi, ci = np.nonzero((self.tipo != "") & self.elegible[:, None])
+        factor = np.where(self.tipo[wi, ci] == "F", 1.0, FACTOR_SEXTO)
+        base = self.base_concepto[wi, ci]
+        dias = self.columnas["DiasLiquidados"][wi]
+        pct = self.columnas["PorcentajeCTS"][wi]
+        importe = np.round(base * dias / 360.0 * pct / 100.0, 2)
+        return list(zip(inp.trabajadores[wi].tolist(), inp.concepto_ids[ci].tolist(),
+                        np.round(base, 2).tolist(), factor.tolist(), importe.tolist(),
+                        self.tipo[wi, ci].tolist()))
+
+
+def compute(inputs: CTSInputs) -> CTSResult:
+    inp = inputs
+    n = len(inp.trabajadores)
+    s_ini, s_fin = semester(inp.ano, inp.mes)
+
+    # ---- tiempo en el semestre ----
+    desde = np.maximum(inp.inicio, s_ini)
+    hasta = np.where(np.isnat(inp.cese), s_fin, np.minimum(inp.cese, s_fin))
+    con_tiempo = hasta >= desde
+    hasta = np.where(con_tiempo, hasta, desde)
+    meses, dias = service_time(desde, hasta)
+    liquidados = np.where(con_tiempo, np.maximum(meses * 30 + dias - inp.dias_no_computables, 0), 0)
+
+    # ---- remuneración computable por concepto ----
+    montos = inp.montos
+    k = len(inp.concepto_ids)
+    mes_ini = (desde.astype("datetime64[M]") - s_ini.astype("datetime64[M]")).astype(np.int64)
+    mes_fin = np.clip((hasta.astype("datetime64[M]") - s_ini.astype("datetime64[M]")).astype(np.int64), 0, MESES - 1)
+    m = np.arange(MESES)
+    en_servicio = (m[None, :] >= mes_ini[:, None]) & (m[None, :] <= mes_fin[:, None])    # (N, 6)
+    pagado = montos > 0                                                                   # (N, K, 6)
+    veces = pagado.sum(axis=2)
+    suma = montos.sum(axis=2)
+    fijo = (pagado | ~en_servicio[:, None, :]).all(axis=2) & (veces > 0)
+    ultimo = np.take_along_axis(montos, np.broadcast_to(mes_fin[:, None, None], (n, k, 1)), axis=2)[:, :, 0]
+
+    grati = np.broadcast_to(inp.gratificacion[None, :], (n, k))
+    excluido = np.broadcast_to(inp.no_computable[None, :], (n, k))
+    tipo = np.full((n, k), "", dtype="<U1")
+    tipo[(veces >= MIN_MESES_VARIABLE) & ~excluido] = "V"
+    tipo[fijo & ~excluido] = "F"
+    tipo[grati & (veces > 0)] = "G"
+    base_concepto = np.where(tipo == "F", ultimo, np.where(tipo != "", suma / MESES, 0.0))
+    no_computable = np.where(tipo == "", suma, 0.0).sum(axis=1)
+
+    base = np.round(base_concepto.sum(axis=1), 2)
+    pct = np.array([inp.porcentajes.get(int(r), REGIMEN_PORCENTAJE[1]) for r in inp.regimen]) if n else np.empty(0)
+    cts = np.round(base * liquidados / 360.0 * pct / 100.0, 2)
+    usd = np.round(cts / inp.tipo_cambio, 2) if inp.tipo_cambio else np.full(n, None, dtype=object)
+
+    ingreso = np.where(np.isnat(inp.ingreso), inp.inicio, inp.ingreso)
+    anos, meses_srv, dias_srv = years_months_days(ingreso, hasta)
+    elegible = con_tiempo & (liquidados > 0) & (base > 0)
+
+    columnas = {
+        "PKIDTrabajador": inp.trabajadores,
+        "BaseImponibleCTS": base,
+        "ImportesCTSSoles": cts,
+        "ImporteCTSUSD": usd,
+        "TipoCambioUSD": np.full(n, inp.tipo_cambio, dtype=object),
+        "FechaInicio": desde.astype(object),
+        "FechaTermino": hasta.astype(object),
+        "AnoTiempoServicio": anos,
+        "MesTiempoServicio": meses_srv,
+        "DiaTiempServicio": dias_srv,
+        "DiasLiquidados": liquidados,
+        "Regimen": inp.regimen,
+        "PorcentajeCTS": pct,
+        "ImporteNoComputable": np.round(no_computable, 2),
+        "FechaIngresoTrabajador": ingreso.astype(object),
+        "DiasNoComputables": inp.dias_no_computables,
+    }
+    return CTSResult(inp, elegible, columnas, tipo, base_concepto)
+
+
+# ---------------------------
+# Carga en bloque desde SQL Server
+# ---------------------------
+def _dt(values) -> np.ndarray:
+    return np.array([np.datetime64(v, "D") if v is not None else NAT for v in values], dtype="datetime64[D]")
+
+
+def load_inputs(conn, periodo: int, gratificacion: Sequence[int] = (), tipo_cambio: Optional[float] = None,
+                regimen: int = 1, dias_no_computables: Optional[Dict[int, int]] = None,
+                porcentajes: Optional[Dict[int, float]] = None):
+    """
+    -> (CTSInputs, PKIDEmpresa, {PKIDTrabajador: (PKIDBanco, CuentaBancariaCTS, PKIDMoneda)}).
+    gratificacion: IDConceptoPlanilla de las gratificaciones. El régimen,
+    banco, cuenta y moneda de cada trabajador se toman de su última
+    CTSCalculada; regimen es el valor para quien no tiene ninguna.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT p.Ano, p.Mes, p.PKIDEmpresa, e.IDEmpresa
+            FROM PeriodoCTS p
+            INNER JOIN Empresa e ON e.PKID = p.PKIDEmpresa
+            WHERE p.PKID = ?
+        """, (periodo,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("PeriodoCTS no encontrado")
+        ano, mes, empresa, id_empresa = int(row[0]), int(row[1]), int(row[2]), int(row[3])
+        s_ini, s_fin = semester(ano, mes)
+        d_ini, d_fin = s_ini.item(), s_fin.item()
+
+        # contratos que tocan el semestre: inicio del vigente, cese y primer ingreso
+        cur.execute("""
+            SELECT t.PKID, t.IDTrabajador,
+                   MIN(c.FechaInicioContrato) AS Inicio,
+                   MAX(ISNULL(c.FechaFinContrato, '9999-12-31')) AS Cese,
+                   (SELECT MIN(c2.FechaInicioContrato) FROM ContratoLaboral c2
+                     WHERE c2.PKIDTrabajador = t.PKID) AS Ingreso
+            FROM Trabajador t
+            INNER JOIN ContratoLaboral c ON c.PKIDTrabajador = t.PKID
+            WHERE t.PKIDEmpresa = ?
+              AND c.FechaInicioContrato <= ?
+              AND (c.FechaFinContrato IS NULL OR c.FechaFinContrato >= ?)
+            GROUP BY t.PKID, t.IDTrabajador
+            ORDER BY t.PKID
+        """, (empresa, d_fin, d_ini))
+        contratos = cur.fetchall()
+        trab = np.array([r[0] for r in contratos], dtype=np.int64)
+        id_trab = {int(r[1]): i for i, r in enumerate(contratos)}
+        cese = _dt(r[3] for r in contratos)
+        cese[cese >= np.datetime64("9999-01-01")] = NAT
+
+        cur.execute("SELECT PKID, IDConceptoPlanilla, IndicadorSubsidioCheck FROM ConceptoPlanilla")
+        concepto_pk, subsidio = {}, {}
+        for pk, cid, sub in cur.fetchall():
+            concepto_pk[int(cid)] = int(pk)
+            subsidio[int(pk)] = bool(sub)
+
+        # ingresos del semestre por trabajador, concepto y mes: una consulta
+        anos = sorted({d_ini.year, d_fin.year})
+        cur.execute(f"""
+            SELECT IDTrabajador, Ano, Mes, IDConceptoPlanilla, SUM(Trabajador)
+            FROM RevisaPlanillaCalculada
+            WHERE IdEmpresa = ? AND Ano IN ({", ".join("?" * len(anos))})
+              AND Ano * 12 + Mes BETWEEN ? AND ?
+              AND IDConceptoPlanilla BETWEEN ? AND ?
+              AND IDTrabajador <> ?
+            GROUP BY IDTrabajador, Ano, Mes, IDConceptoPlanilla
+        """, [id_empresa, *anos, d_ini.year * 12 + d_ini.month, d_fin.year * 12 + d_fin.month,
+              INGRESO_MIN, INGRESO_MAX, TOTAL_TRABAJADOR_ID])
+        planilla = cur.fetchall()
+        pks = sorted({concepto_pk[int(r[3])] for r in planilla if int(r[3]) in concepto_pk})
+        c_pos = {pk: i for i, pk in enumerate(pks)}
+        montos = np.zeros((len(trab), len(pks), MESES))
+        wi, ci, mi, val = [], [], [], []
+        base_mes = d_ini.year * 12 + d_ini.month
+        for id_t, a, m, cid, v in planilla:
+            w = id_trab.get(int(id_t))
+            pk = concepto_pk.get(int(cid))
+            if w is None or pk is None:
+                continue
+            wi.append(w)
+            ci.append(c_pos[pk])
+            mi.append(int(a) * 12 + int(m) - base_mes)
+            val.append(float(v or 0))
+        if wi:
+            np.add.at(montos, (np.array(wi), np.array(ci), np.array(mi)), np.array(val))
+
+        # última CTS de cada trabajador: régimen, banco, cuenta y moneda
+        cur.execute("""
+            SELECT x.PKIDTrabajador, x.Regimen, x.PKIDBanco, x.CuentaBancariaCTS, x.PKIDMoneda
+            FROM (
+                SELECT c.PKIDTrabajador, c.Regimen, c.PKIDBanco, c.CuentaBancariaCTS, c.PKIDMoneda,
+                       ROW_NUMBER() OVER (PARTITION BY c.PKIDTrabajador ORDER BY p.Ano DESC, p.Mes DESC) AS rn
+                FROM CTSCalculada c
+                INNER JOIN PeriodoCTS p ON p.PKID = c.PKIDPeriodoCTS
+                WHERE p.PKIDEmpresa = ? AND c.PKIDPeriodoCTS <> ?
+            ) x
+            WHERE x.rn = 1
+        """, (empresa, periodo))
+        previo = {int(r[0]): r for r in cur.fetchall()}
+    finally:
+        cur.close()
+
+    grati_pk = {concepto_pk[c] for c in gratificacion if c in concepto_pk}
+    nc = dias_no_computables or {}
+    reg = np.array([int(previo[t][1]) if t in previo and previo[t][1] in (1, 2) else regimen
+                    for t in trab.tolist()], dtype=np.int64)
+    inputs = CTSInputs(
+        periodo=periodo, ano=ano, mes=mes,
+        trabajadores=trab,
+        inicio=_dt(r[2] for r in contratos),
+        cese=cese,
+        ingreso=_dt(r[4] for r in contratos),
+        concepto_ids=np.array(pks, dtype=np.int64),
+        montos=montos,
+        gratificacion=np.array([pk in grati_pk for pk in pks], dtype=bool),
+        no_computable=np.array([subsidio.get(pk, False) for pk in pks], dtype=bool),
+        regimen=reg,
+        dias_no_computables=np.array([int(nc.get(t, 0)) for t in trab.tolist()], dtype=np.int64),
+        tipo_cambio=tipo_cambio,
+        porcentajes=dict(REGIMEN_PORCENTAJE, **(porcentajes or {})),
+    )
+    bancos = {t: (r[2], r[3], r[4]) for t, r in previo.items()}
+    return inputs, empresa, bancos
+
+
+# ---------------------------
+# Upsert en bloque
+# ---------------------------
+_COLS = [
+    "PKIDPeriodoCTS", "PKIDTrabajador", "PKIDBanco", "CuentaBancariaCTS",
+    "BaseImponibleCTS", "ImportesCTSSoles", "ImporteCTSUSD", "PKIDMoneda", "TipoCambioUSD",
+    "FechaInicio", "FechaTermino",
+    "AnoTiempoServicio", "MesTiempoServicio", "DiaTiempServicio", "DiasLiquidados", "Regimen",
+    "PorcentajeCTS", "ImporteNoComputable", "FechaIngresoTrabajador",
+    "DiasNoComputables", "PKIDSituacionRegistro",
+]
+_CONCEPTO_COLS = ["PKIDConceptoPlanilla", "BaseImponibleCTS", "FactorCTS", "ImporteCTS",
+                  "TipoCalculoCTS", "PKIDSituacionRegistro"]
+
+
+def save(conn, result: CTSResult, bancos: Dict[int, tuple], banco: Optional[int], moneda: Optional[int],
+         situacion: int) -> dict:
+    """
+    Upsert por (PKIDPeriodoCTS, PKIDTrabajador). Los conceptos de los
+    trabajadores recalculados se reemplazan. Quien no tiene banco (ni en su
+    última CTS ni por defecto) queda en "omitidos".
+    """
+    periodo = result.inputs.periodo
+    filas, omitidos = [], []
+    for r in result.rows():
+        t = r["PKIDTrabajador"]
+        b_banco, b_cuenta, b_moneda = bancos.get(t, (None, None, None))
+        pk_banco = b_banco or banco
+        if pk_banco is None:
+            omitidos.append({"PKIDTrabajador": t, "motivo": "Sin banco CTS"})
+            continue
+        r.update(PKIDPeriodoCTS=periodo, PKIDBanco=pk_banco, CuentaBancariaCTS=b_cuenta,
+                 PKIDMoneda=b_moneda or moneda, PKIDSituacionRegistro=situacion)
+        filas.append(tuple(r[c] for c in _COLS))
+    con_banco = {f[1] for f in filas}
+    conceptos = [c + (situacion,) for c in result.concept_rows() if c[0] in con_banco]
+
+    cols = ", ".join(_COLS)
+    sets = ", ".join(f"{c} = t.{c}" for c in _COLS[2:])
+    ccols = ", ".join(_CONCEPTO_COLS)
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            IF OBJECT_ID('tempdb..#CTS') IS NOT NULL DROP TABLE #CTS;
+            SELECT TOP 0 {cols} INTO #CTS FROM CTSCalculada;
+            IF OBJECT_ID('tempdb..#CTSConcepto') IS NOT NULL DROP TABLE #CTSConcepto;
+            SELECT TOP 0 CAST(0 AS INT) AS PKIDTrabajador, {ccols} INTO #CTSConcepto FROM CTSCalculadaConcepto;
+        """)
+        cur.fast_executemany = True
+        if filas:
+            cur.executemany(f"INSERT INTO #CTS ({cols}) VALUES ({', '.join('?' * len(_COLS))})", filas)
+        if conceptos:
+            cur.executemany(f"INSERT INTO #CTSConcepto (PKIDTrabajador, {ccols}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            conceptos)
+        cur.fast_executemany = False
+
+        cur.execute(f"""
+            UPDATE c SET {sets}
+            FROM CTSCalculada c
+            INNER JOIN #CTS t ON t.PKIDPeriodoCTS = c.PKIDPeriodoCTS AND t.PKIDTrabajador = c.PKIDTrabajador
+        """)
+        actualizados = cur.rowcount
+        cur.execute(f"""
+            INSERT INTO CTSCalculada ({cols})
+            SELECT {cols} FROM #CTS t
+            WHERE NOT EXISTS (SELECT 1 FROM CTSCalculada c
+                              WHERE c.PKIDPeriodoCTS = t.PKIDPeriodoCTS AND c.PKIDTrabajador = t.PKIDTrabajador)
+        """)
+        insertados = cur.rowcount
+        cur.execute("""
+            DELETE cc
+            FROM CTSCalculadaConcepto cc
+            INNER JOIN CTSCalculada c ON c.PKID = cc.PKIDCTSCalculada
+            INNER JOIN #CTS t ON t.PKIDPeriodoCTS = c.PKIDPeriodoCTS AND t.PKIDTrabajador = c.PKIDTrabajador
+        """)
+        cur.execute(f"""
+            INSERT INTO CTSCalculadaConcepto (PKIDCTSCalculada, {ccols})
+            SELECT c.PKID, {", ".join("x." + c for c in _CONCEPTO_COLS)}
+            FROM #CTSConcepto x
+            INNER JOIN CTSCalculada c ON c.PKIDPeriodoCTS = ? AND c.PKIDTrabajador = x.PKIDTrabajador
+        """, (periodo,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("""
+            IF OBJECT_ID('tempdb..#CTS') IS NOT NULL DROP TABLE #CTS;
+            IF OBJECT_ID('tempdb..#CTSConcepto') IS NOT NULL DROP TABLE #CTSConcepto;
+        """)
+        cur.close()
+    return {"insertados": insertados, "actualizados": actualizados, "conceptos": len(conceptos),
+            "omitidos": omitidos}
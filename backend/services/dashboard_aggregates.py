@@ -0,0 +1,302 @@
+# backend/services/dashboard_aggregates.py
+"""
+Agregados mensuales de ingresos para el dashboard.
+
+Por (empresa, año) se guardan en memoria dos tablas ya agregadas:
+  conceptos[mes][ConceptoPlanilla]   = SUM(Trabajador)
+  trabajadores[mes][NombreCompleto]  = SUM(Trabajador)
+más el total anual por trabajador y un ranking ordenado que se mantiene
+con bisect, así el top-N es un slice y no un sort de toda la planilla.
+
+Carga perezosa: la primera consulta de un (empresa, año) hace los dos
+GROUP BY del año (en modo multi-año, los años faltantes van juntos en
+la misma consulta con Ano IN (...)). Después, cuando termina una corrida de planilla
+(payroll_jobs, /payroll/video o /payroll/video/stream) se recalcula solo ese mes y se ajustan
+totales y ranking con la diferencia.
+
+Con el cierre de mes muchas personas abren el mismo (empresa, año) a la
+vez: las cargas concurrentes de un mismo año comparten una sola consulta
+(services/single_flight.py). MAX_AGE es un TTL blando: pasado ese tiempo
+se sigue sirviendo el año en memoria y una sola recarga corre en segundo
+plano (p. ej. para recoger corridas hechas por otro proceso). Pasado
+HARD_MAX_AGE ya no se sirve y la petición espera la recarga.
+"""
+import bisect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database import connection
+from services.payroll_engine import INGRESO_MAX, INGRESO_MIN, TOTAL_TRABAJADOR_ID
+from services.payroll_jobs import payroll_jobs
+from services.single_flight import SingleFlight
+
+MAX_AGE = float(os.getenv("DASHBOARD_AGG_MAX_AGE", "900"))            # TTL blando
+HARD_MAX_AGE = float(os.getenv("DASHBOARD_AGG_HARD_MAX_AGE", "3600"))  # TTL duro
+REFRESH_WORKERS = 2
+
+_QUERY = """
+    SELECT Ano, Mes, {campo}, SUM(Trabajador)
+    FROM RevisaPlanillaCalculada
+    WHERE IdEmpresa = ? AND Ano IN ({anos}){filtro_mes}
+      AND IDConceptoPlanilla BETWEEN ? AND ?
+      AND IDTrabajador <> ?
+    GROUP BY Ano, Mes, {campo}
+"""
+
+
+def _load(conn, campo: str, empresa: int, anos: Sequence[int],
+          mes: Optional[int] = None) -> Dict[int, Dict[int, Dict[str, float]]]:
+    """{ano: {mes: {label: total}}} para todos los años pedidos en una sola consulta."""
+    params = [empresa, *anos]
+    if mes is not None:
+        params.append(mes)
+    params += [INGRESO_MIN, INGRESO_MAX, TOTAL_TRABAJADOR_ID]
+    sql = _QUERY.format(campo=campo, anos=", ".join("?" * len(anos)),
+                        filtro_mes=" AND Mes = ?" if mes is not None else "")
+    out: Dict[int, Dict[int, Dict[str, float]]] = {int(a): {} for a in anos}
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        for a, m, label, valor in cur.fetchall():
+            por_mes = out.setdefault(int(a), {}).setdefault(int(m), {})
+            k = str(label)
+            por_mes[k] = por_mes.get(k, 0.0) + float(valor or 0)
+    finally:
+        cur.close()
+    return out
+
+
+class YearAggregate:
+    """Agregados de un (empresa, año)."""
+
+    def __init__(self, conceptos: Dict[int, Dict[str, float]], trabajadores: Dict[int, Dict[str, float]]):
+        self.conceptos = conceptos
+        self.trabajadores = trabajadores
+        self.totales: Dict[str, float] = {}
+        for por_mes in trabajadores.values():
+            for k, v in por_mes.items():
+                self.totales[k] = self.totales.get(k, 0.0) + v
+        # (-total, nombre) ascendente == mayor ingreso primero
+        self.ranking: List[Tuple[float, str]] = sorted((-v, k) for k, v in self.totales.items())
+        self.loaded_at = time.monotonic()
+
+    def replace_month(self, mes: int, conceptos: Dict[str, float], trabajadores: Dict[str, float]):
+        """Sustituye un mes y ajusta totales/ranking solo para los trabajadores afectados."""
+        self.conceptos[mes] = conceptos
+        antes = self.trabajadores.get(mes, {})
+        self.trabajadores[mes] = trabajadores
+        for k in antes.keys() | trabajadores.keys():
+            delta = trabajadores.get(k, 0.0) - antes.get(k, 0.0)
+            if not delta:
+                continue
+            viejo = self.totales.get(k)
+            if viejo is not None:
+                i = bisect.bisect_left(self.ranking, (-viejo, k))
+                if i < len(self.ranking) and self.ranking[i] == (-viejo, k):
+                    del self.ranking[i]
+            nuevo = (viejo or 0.0) + delta
+            if any(k in t for t in self.trabajadores.values()):
+                self.totales[k] = nuevo
+                bisect.insort(self.ranking, (-nuevo, k))
+            else:
+                self.totales.pop(k, None)
+        if not conceptos:
+            self.conceptos.pop(mes, None)
+        if not trabajadores:
+            self.trabajadores.pop(mes, None)
+
+    def top(self, n: int) -> List[str]:
+        return [k for _, k in self.ranking[:n]]
+
+    def rows(self, cual: str, labels: Optional[List[str]] = None) -> List[dict]:
+        """Filas {mes, label, valor} ordenadas por (mes, label), como el GROUP BY original."""
+        tabla = self.conceptos if cual == "conceptos" else self.trabajadores
+        filtro = set(labels) if labels is not None else None
+        out = []
+        for mes in sorted(tabla):
+            for k in sorted(tabla[mes]):
+                if filtro is None or k in filtro:
+                    out.append({"mes": mes, "label": k, "valor": tabla[mes][k]})
+        return out
+
+
+class DashboardAggregates:
+    def __init__(self, max_age: float = MAX_AGE, hard_max_age: float = HARD_MAX_AGE):
+        self._years: Dict[Tuple[int, int], YearAggregate] = {}
+        self._gen: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="dashboard-refresh")
+        self._max_age = max_age
+        self._hard_max_age = max(hard_max_age, max_age)
+        self.loads = 0
+        self.month_refreshes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_error: Optional[str] = None
+
+    def _load_years(self, empresa: int, anos: Sequence[int]) -> Dict[int, YearAggregate]:
+        """
+        Años en memoria. Vigentes (< max_age): se devuelven. Vencidos pero dentro
+        de hard_max_age: se devuelven igual y se recargan en segundo plano.
+        Ausentes o demasiado viejos: se cargan ahora, compartiendo la consulta
+        con cualquier otra petición que ya esté cargando el mismo año.
+        """
+        now = time.monotonic()
+        out: Dict[int, YearAggregate] = {}
+        faltan, viejos = [], []
+        with self._lock:
+            for ano in anos:
+                agg = self._years.get((empresa, ano))
+                edad = now - agg.loaded_at if agg is not None else None
+                if edad is not None and edad < self._max_age:
+                    out[ano] = agg
+                    self.hits += 1
+                elif edad is not None and edad < self._hard_max_age:
+                    out[ano] = agg
+                    self.stale_hits += 1
+                    viejos.append(ano)
+                else:
+                    faltan.append(ano)
+        if viejos:
+            self._refresh_async(empresa, viejos)
+        if faltan:
+            out.update(self._fetch_years(empresa, faltan))
+        return out
+
+    def _fetch_years(self, empresa: int, anos: Sequence[int]) -> Dict[int, YearAggregate]:
+        """Carga bloqueante: los años que ya carga otro se esperan, el resto va en una consulta."""
+        propios, ajenos = [], {}
+        for ano in anos:
+            call, lider = self._flight.begin((empresa, ano))
+            if lider:
+                propios.append(ano)
+            else:
+                ajenos[ano] = call
+        with self._lock:
+            self.misses += len(propios)
+            self.coalesced += len(ajenos)
+        out = self._run_load(empresa, propios) if propios else {}
+        for ano, call in ajenos.items():
+            out[ano] = call.wait()
+        return out
+
+    def _run_load(self, empresa: int, anos: Sequence[int]) -> Dict[int, YearAggregate]:
+        """Ejecuta la carga como líder de esos años y entrega el resultado a quienes esperan."""
+        try:
+            aggs = self._query_years(empresa, anos)
+        except BaseException as e:
+            for ano in anos:
+                self._flight.finish((empresa, ano), error=e)
+            raise
+        for ano in anos:
+            self._flight.finish((empresa, ano), aggs[ano])
+        return aggs
+
+    def _query_years(self, empresa: int, anos: Sequence[int]) -> Dict[int, YearAggregate]:
+        with self._lock:
+            gens = {a: self._gen.get((empresa, a), 0) for a in anos}
+        with connection() as conn:
+            conceptos = _load(conn, "ConceptoPlanilla", empresa, anos)
+            trabajadores = _load(conn, "NombreCompleto", empresa, anos)
+        out: Dict[int, YearAggregate] = {}
+        with self._lock:
+            for ano in anos:
+                agg = YearAggregate(conceptos.get(ano, {}), trabajadores.get(ano, {}))
+                out[ano] = agg
+                self.loads += 1
+                # si terminó una corrida mientras se cargaba, no publicar datos viejos
+                if self._gen.get((empresa, ano), 0) == gens[ano]:
+                    self._years[(empresa, ano)] = agg
+        return out
+
+    def _refresh_async(self, empresa: int, anos: Sequence[int]):
+        """Agenda una recarga en segundo plano; si el año ya se está cargando no se repite."""
+        propios = [a for a in anos if self._flight.try_begin((empresa, a))]
+        if propios:
+            self._refresher.submit(self._refresh, empresa, propios)
+
+    def _refresh(self, empresa: int, anos: Sequence[int]):
+        try:
+            self._run_load(empresa, anos)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+                self.last_refresh_error = str(e)
+
+    def _year(self, empresa: int, ano: int) -> YearAggregate:
+        return self._load_years(empresa, [ano])[ano]
+
+    def conceptos_rows(self, empresa: int, ano: int) -> List[dict]:
+        agg = self._year(empresa, ano)
+        with self._lock:
+            return agg.rows("conceptos")
+
+    def trabajadores_rows(self, empresa: int, ano: int, top: int) -> List[dict]:
+        agg = self._year(empresa, ano)
+        with self._lock:
+            return agg.rows("trabajadores", agg.top(top))
+
+    def multi_year_rows(self, empresa: int, anos: Sequence[int], cual: str) -> List[dict]:
+        """Filas {ano, mes, label, valor} de varios años (los faltantes se cargan juntos)."""
+        aggs = self._load_years(empresa, anos)
+        out = []
+        with self._lock:
+            for ano in anos:
+                for r in aggs[ano].rows(cual):
+                    r["ano"] = ano
+                    out.append(r)
+        return out
+
+    def refresh_month(self, empresa: int, ano: int, mes: int):
+        """Recalcula un mes tras una corrida; si el año no está cargado solo marca la generación."""
+        key = (empresa, ano)
+        with self._lock:
+            self._gen[key] = self._gen.get(key, 0) + 1
+            if key not in self._years:
+                return
+        with connection() as conn:
+            conceptos = _load(conn, "ConceptoPlanilla", empresa, [ano], mes)[ano].get(mes, {})
+            trabajadores = _load(conn, "NombreCompleto", empresa, [ano], mes)[ano].get(mes, {})
+        with self._lock:
+            agg = self._years.get(key)
+            if agg is not None:
+                agg.replace_month(mes, conceptos, trabajadores)
+                self.month_refreshes += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "years": len(self._years),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "loads": self.loads,
+                "background_refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "last_refresh_error": self.last_refresh_error,
+                "month_refreshes": self.month_refreshes,
+                "in_flight": self._flight.stats()["in_flight"],
+            }
+
+
+dashboard_aggregates = DashboardAggregates()
+
+
+def on_payroll_done(params: dict):
+    """Llamar al terminar SP_PAYROLL_VIDEO con los parámetros de la corrida."""
+    dashboard_aggregates.refresh_month(int(params["CIA_CODCIA"]), int(params["ANO_CODANO"]),
+                                       int(params["MES_CODMES"]))
+
+
+payroll_jobs.add_listener(lambda job: on_payroll_done(job.params))
@@ -0,0 +1,29 @@
+# backend/services/file_stream.py
+"""Envío por bloques de archivos temporales generados (XLSX, PDF)."""
+import os
+
+from starlette.responses import StreamingResponse
+
+READ_SIZE = 64 * 1024
+
+
+def file_response(f, filename: str, media_type: str) -> StreamingResponse:
+    """Envía el archivo f (abierto en modo binario) y lo cierra al terminar."""
+    f.seek(0)
+    size = os.fstat(f.fileno()).st_size
+
+    def body():
+        try:
+            while True:
+                block = f.read(READ_SIZE)
+                if not block:
+                    break
+                yield block
+        finally:
+            f.close()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Length": str(size),
+    }
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
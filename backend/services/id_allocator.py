@@ -0,0 +1,186 @@
+# backend/services/id_allocator.py
+"""
+Asignación de IDs por bloques para columnas que no son IDENTITY
+(IDTrabajador por empresa, PKID de DiasUtilesMes).
+
+En vez de SELECT MAX(col) + 1 en cada alta (lectura del índice y carrera
+entre dos altas simultáneas), cada proceso reserva un bloque de IDs en
+dbo.IdSequence con un UPDLOCK y reparte ese bloque desde memoria: una
+reserva por bloque y O(1) por fila. La reserva va en su propia
+transacción, así que no queda atada al commit del alta.
+
+Las reservas usan una conexión propia, fuera del pool: next() se llama
+mientras el alta ya tiene una conexión prestada, y pedir otra al pool
+podría esperar hasta POOL_TIMEOUT si todas están ocupadas por altas.
+
+La tabla se crea sola la primera vez. Al reservar se compara con el
+MAX(col) real (una vez por bloque), de modo que filas insertadas por
+fuera del asignador no provocan duplicados.
+
+    ID_TRABAJADOR = IdSequence("Trabajador", "IDTrabajador", scope="PKIDEmpresa")
+    nuevo = ID_TRABAJADOR.next(empresa)
+
+Los IDs de un bloque no usados se pierden si el proceso se reinicia
+(huecos en la numeración); ID_BLOCK_SIZE=1 los evita a costa de una
+reserva por alta.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pyodbc
+
+from database import CONNECTION_STRING
+
+BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "20"))
+
+_CREATE_SQL = """
+IF OBJECT_ID('dbo.IdSequence', 'U') IS NULL
+CREATE TABLE dbo.IdSequence (
+    Tabla  VARCHAR(128) NOT NULL,
+    Ambito INT          NOT NULL,
+    Ultimo BIGINT       NOT NULL,
+    CONSTRAINT PK_IdSequence PRIMARY KEY (Tabla, Ambito)
+)
+"""
+
+_table_ready = False
+_table_lock = threading.Lock()
+_sequences: List["IdSequence"] = []
+
+# conexión dedicada a las reservas (una a la vez)
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def _ensure_table(conn, cur):
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        try:
+            cur.execute(_CREATE_SQL)
+            conn.commit()
+        except pyodbc.Error:
+            # otro proceso la creó al mismo tiempo
+            conn.rollback()
+            cur.execute("SELECT OBJECT_ID('dbo.IdSequence', 'U')")
+            if cur.fetchone()[0] is None:
+                raise
+        _table_ready = True
+
+
+class IdSequence:
+    def __init__(self, table: str, column: str, scope: Optional[str] = None, block: int = BLOCK_SIZE):
+        """scope: columna que separa las numeraciones (p. ej. PKIDEmpresa); None = una sola."""
+        self.table = table
+        self.column = column
+        self.scope = scope
+        self.block = max(1, block)
+        self.name = f"{table}.{column}"
+        self._blocks: Dict[int, Tuple[int, int]] = {}     # ámbito -> (siguiente, último reservado)
+        self._locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.reservations = 0
+        self.issued = 0
+        max_where = f" WHERE {scope} = ?" if scope else ""
+        self._update_sql = f"""
+            UPDATE s SET Ultimo = CASE WHEN m.mx > s.Ultimo THEN m.mx ELSE s.Ultimo END + ?
+            OUTPUT inserted.Ultimo
+            FROM dbo.IdSequence s WITH (UPDLOCK, HOLDLOCK)
+            CROSS JOIN (SELECT ISNULL(MAX({column}), 0) AS mx FROM {table}{max_where}) m
+            WHERE s.Tabla = ? AND s.Ambito = ?
+        """
+        self._insert_sql = f"""
+            INSERT INTO dbo.IdSequence (Tabla, Ambito, Ultimo)
+            OUTPUT inserted.Ultimo
+            SELECT ?, ?, ISNULL(MAX({column}), 0) + ? FROM {table}{max_where}
+        """
+        _sequences.append(self)
+
+    def _scope_lock(self, ambito: int) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(ambito)
+            if lock is None:
+                lock = self._locks[ambito] = threading.Lock()
+            return lock
+
+    def _reserve(self, ambito: int, n: int) -> int:
+        """Reserva n IDs en la BD y devuelve el último; el bloque es (último - n, último]."""
+        global _conn
+        with _conn_lock:
+            for intento in range(2):
+                if _conn is None:
+                    _conn = pyodbc.connect(CONNECTION_STRING)
+                try:
+                    return self._reserve_on(_conn, ambito, n)
+                except pyodbc.IntegrityError:
+                    raise
+                except pyodbc.Error:
+                    # conexión caída (p. ej. tras mucho tiempo sin uso): se abre otra y se reintenta una vez
+                    try:
+                        _conn.close()
+                    except pyodbc.Error:
+                        pass
+                    _conn = None
+                    if intento:
+                        raise
+
+    def _reserve_on(self, conn, ambito: int, n: int) -> int:
+        scope_params = [ambito] if self.scope else []
+        cur = conn.cursor()
+        try:
+            _ensure_table(conn, cur)
+            for _ in range(3):
+                cur.execute(self._update_sql, [n] + scope_params + [self.name, ambito])
+                row = cur.fetchone()
+                if row is None:
+                    try:
+                        cur.execute(self._insert_sql, [self.name, ambito, n] + scope_params)
+                        row = cur.fetchone()
+                    except pyodbc.IntegrityError:
+                        # otro proceso creó la fila: reintentar el UPDATE
+                        conn.rollback()
+                        continue
+                conn.commit()
+                with self._lock:
+                    self.reservations += 1
+                return int(row[0])
+            raise pyodbc.OperationalError(f"No se pudo reservar IDs para {self.name}")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def next(self, ambito: int = 0, block: Optional[int] = None) -> int:
+        """
+        Siguiente ID del ámbito. block agranda la próxima reserva (p. ej. en
+        importaciones masivas); lo que sobre se usa en las altas siguientes.
+        """
+        with self._scope_lock(ambito):
+            siguiente, ultimo = self._blocks.get(ambito, (1, 0))
+            if siguiente > ultimo:
+                n = max(self.block, block or 0)
+                ultimo = self._reserve(ambito, n)
+                siguiente = ultimo - n + 1
+            # contadores y bloques bajo _lock, el mismo que lee stats()
+            with self._lock:
+                self._blocks[ambito] = (siguiente + 1, ultimo)
+                self.issued += 1
+            return siguiente
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "block": self.block,
+                "reservations": self.reservations,
+                "issued": self.issued,
+                "scopes": {a: u - s + 1 for a, (s, u) in self._blocks.items()},   # IDs libres en memoria
+            }
+
+
+def stats() -> dict:
+    return {s.name: s.stats() for s in _sequences}
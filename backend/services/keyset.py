@@ -0,0 +1,104 @@
+# backend/services/keyset.py
+"""
+Paginación por cursor (keyset / seek) para listados grandes.
+
+En lugar de OFFSET n ROWS, cada página continúa desde la última clave
+vista: WHERE (clave) > (última clave) ORDER BY clave, así la página N
+cuesta lo mismo que la primera. La clave debe ser única (terminar en el
+PKID) y sus columnas no nulas; las nulables se envuelven en ISNULL tanto
+en la clave como en key(row).
+
+    KEYSET = Keyset([("p.ApellidoPaterno", False), ("p.PKID", False)],
+                    key=lambda r: (r.ApellidoPaterno, r.PKID))
+    cond = KEYSET.where(cursor, params)          # "" en la primera página
+    sql += (" WHERE " + cond if cond else "") + KEYSET.order_by() + KEYSET.fetch(params, limit)
+    cur.execute(sql, params)
+    return KEYSET.page(cur.fetchall(), limit, row_to_dict)
+
+El cursor es opaco para el cliente (base64 de los valores de la clave).
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _plain(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_plain(v) for v in values], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+class Keyset:
+    def __init__(self, keys: Sequence[Tuple[str, bool]], key: Callable[[Any], Sequence[Any]]):
+        """keys: [(expresión SQL, descendente)], en el orden del ORDER BY; key(row) -> sus valores."""
+        self.keys = list(keys)
+        self.key = key
+
+    def order_by(self) -> str:
+        return " ORDER BY " + ", ".join(f"{e} {'DESC' if d else 'ASC'}" for e, d in self.keys)
+
+    def where(self, cursor: Optional[str], params: list) -> str:
+        """
+        Condición "después del cursor" (sin WHERE/AND) y sus parámetros agregados
+        a params. La primera columna va también como rango simple para que el
+        optimizador pueda usar el índice.
+        """
+        if not cursor:
+            return ""
+        values = decode_cursor(cursor, len(self.keys))
+        (e0, d0) = self.keys[0]
+        sql = f"{e0} {'<=' if d0 else '>='} ? AND "
+        params.append(values[0])
+        sql += self._after(0, values, params)
+        return "(" + sql + ")"
+
+    def _after(self, i: int, values: List[Any], params: list) -> str:
+        e, d = self.keys[i]
+        op = "<" if d else ">"
+        params.append(values[i])
+        if i == len(self.keys) - 1:
+            return f"{e} {op} ?"
+        params.append(values[i])
+        return f"({e} {op} ? OR ({e} = ? AND {self._after(i + 1, values, params)}))"
+
+    @staticmethod
+    def fetch(params: list, limit: int) -> str:
+        # una fila de más para saber si hay página siguiente
+        params.append(limit + 1)
+        return " OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+
+    def split(self, rows: Sequence[Any], limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+        """-> (filas de la página, next_cursor); next_cursor es None en la última página."""
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return rows, (encode_cursor(self.key(rows[-1])) if more else None)
+
+    def page(self, rows: Sequence[Any], limit: int, to_dict: Callable[[Any], dict]) -> dict:
+        """{items, next_cursor, limit}."""
+        rows, next_cursor = self.split(rows, limit)
+        return {"items": [to_dict(r) for r in rows], "next_cursor": next_cursor, "limit": limit}
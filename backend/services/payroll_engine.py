@@ -0,0 +1,400 @@
+# backend/services/payroll_engine.py
+"""
+Motor de cálculo de planilla en proceso (NumPy).
+
+Replica la forma de RevisaPlanillaCalculada (IdEmpresa, Ano, Mes, IDTrabajador,
+NombreCompleto, IDConceptoPlanilla, ConceptoPlanilla, Trabajador, Empleador)
+a partir de los insumos de UN periodo cargados en bloque:
+
+  - ingresos por trabajador y concepto (matriz trabajadores x conceptos)
+  - indicadores de ConceptoPlanilla (qué ingresos forman cada base)
+  - tasas AfpPeriodo vigentes al periodo
+  - reglas DeduccionPeriodo de la empresa
+  - tramos de FechaVigenciaImpuesto para renta
+
+Los descuentos y aportes se calculan columna a columna sobre todos los
+trabajadores a la vez; no hay bucles por trabajador.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services import afp_rates as afp_rate_index
+from services import tax_rates as tax_rate_index
+
+INGRESO_MIN, INGRESO_MAX = 1000, 2999     # mismo rango que usa dashboard.py
+TOTAL_TRABAJADOR_ID = 9999999             # fila de totales del SP
+# IDTipoImpuesto de los tramos de renta en FechaVigenciaImpuesto
+TIPO_IMPUESTO_RENTA = os.getenv("PAYROLL_TIPO_IMPUESTO_RENTA", "REN").strip().upper()
+
+# Indicador de ConceptoPlanilla -> nombre de base imponible
+BASE_FLAGS = {
+    "afp": "IndicadorAfpCheck",
+    "scrt_salud": "IndicadorScrtSaludCheck",
+    "scrt_pension": "IndicadorScrtPensionCheck",
+    "essalud": "IndicadorAporteEssaludCheck",
+    "senati": "IndicadoAporteSenatiCheck",
+    "scrt": "IndicadorAporteSCRTCheck",
+    "vida": "IndicadorAporteVidaCheck",
+}
+
+
+@dataclass
+class PeriodInputs:
+    empresa: int                     # IDEmpresa (como en RevisaPlanillaCalculada)
+    ano: int
+    mes: int
+    trabajadores: np.ndarray         # (N,) IDTrabajador
+    nombres: List[str]               # (N,)
+    ingreso_ids: np.ndarray          # (Ki,) IDConceptoPlanilla de ingresos
+    ingresos: np.ndarray             # (N, Ki) importes
+    conceptos: Dict[int, dict]       # IDConceptoPlanilla -> fila de ConceptoPlanilla
+    afp_idx: np.ndarray              # (N,) índice en afp_pkids, -1 = sin AFP (ONP)
+    afp_pkids: List[int]             # PKIDAfp
+    afp_rates: List[dict]            # filas AfpPeriodo vigentes (con IDConceptoPlanilla)
+    deducciones: List[dict]          # filas DeduccionPeriodo (con IDConceptoPlanilla)
+    renta_tramos: List[dict] = field(default_factory=list)  # filas FechaVigenciaImpuesto
+    comision_mixta: Optional[np.ndarray] = None              # (N,) bool
+
+
+class PayrollResult:
+    def __init__(self, inputs: PeriodInputs, concepto_ids: np.ndarray,
+                 trabajador: np.ndarray, empleador: np.ndarray):
+        self.inputs = inputs
+        self.concepto_ids = concepto_ids      # (K,)
+        self.trabajador = trabajador          # (N, K)
+        self.empleador = empleador            # (N, K)
+
+    def matrix(self, kind: str = "trabajador") -> np.ndarray:
+        return self.trabajador if kind == "trabajador" else self.empleador
+
+    def to_columns(self, include_totals: bool = True) -> Dict[str, np.ndarray]:
+        """Filas no nulas en formato columnar (mismo orden que RevisaPlanillaCalculada)."""
+        inp = self.inputs
+        trab, emp = self.trabajador, self.empleador
+        if include_totals:
+            trab = np.vstack([trab, trab.sum(axis=0, keepdims=True)])
+            emp = np.vstack([emp, emp.sum(axis=0, keepdims=True)])
+            ids = np.append(inp.trabajadores, TOTAL_TRABAJADOR_ID)
+            nombres = np.array(list(inp.nombres) + ["TOTAL"], dtype=object)
+        else:
+            ids = inp.trabajadores
+            nombres = np.array(inp.nombres, dtype=object)
+        wi, ci = np.nonzero((trab != 0) | (emp != 0))
+        nombres_concepto = np.array(
+            [inp.conceptos.get(int(c), {}).get("ConceptoPlanilla") for c in self.concepto_ids],
+            dtype=object,
+        )
+        n = len(wi)
+        return {
+            "IdEmpresa": np.full(n, inp.empresa),
+            "Ano": np.full(n, inp.ano),
+            "Mes": np.full(n, inp.mes),
+            "IDTrabajador": ids[wi],
+            "NombreCompleto": nombres[wi],
+            "IDConceptoPlanilla": self.concepto_ids[ci],
+            "ConceptoPlanilla": nombres_concepto[ci],
+            "Trabajador": trab[wi, ci],
+            "Empleador": emp[wi, ci],
+        }
+
+    def to_rows(self, include_totals: bool = True) -> List[dict]:
+        cols = self.to_columns(include_totals)
+        names = list(cols)
+        lists = [cols[k].tolist() for k in names]
+        return [dict(zip(names, vals)) for vals in zip(*lists)]
+
+
+# ---------------------------
+# Cálculo
+# ---------------------------
+def evaluate_brackets(base: np.ndarray, lowers: np.ndarray, rates: np.ndarray) -> np.ndarray:
+    """
+    Impuesto escalonado: cada tramo i grava (base - lower_i) hasta el siguiente límite.
+    lowers ascendentes; rates en porcentaje. Con un solo tramo en 0 es tasa plana.
+    """
+    if len(lowers) == 0:
+        return np.zeros_like(base)
+    uppers = np.append(lowers[1:], np.inf)
+    width = uppers - lowers
+    gravado = np.clip(base[:, None] - lowers[None, :], 0.0, width[None, :])
+    return gravado @ (rates / 100.0)
+
+
+def _round(x: np.ndarray, decimals) -> np.ndarray:
+    return np.round(x, int(decimals) if decimals not in (None, "") else 2)
+
+
+def _clip(x: np.ndarray, lo, hi, aplica: np.ndarray) -> np.ndarray:
+    if lo not in (None, 0):
+        x = np.where(aplica, np.maximum(x, float(lo)), x)
+    if hi not in (None, 0):
+        x = np.minimum(x, float(hi))
+    return x
+
+
+def compute(inputs: PeriodInputs) -> PayrollResult:
+    n = len(inputs.trabajadores)
+    ingresos = np.asarray(inputs.ingresos, dtype=np.float64)
+
+    # Bases imponibles: ingresos (N x Ki) @ indicadores (Ki x B)
+    flags = np.array([
+        [1.0] + [1.0 if inputs.conceptos.get(int(cid), {}).get(col) else 0.0 for col in BASE_FLAGS.values()]
+        for cid in inputs.ingreso_ids
+    ], dtype=np.float64).reshape(len(inputs.ingreso_ids), len(BASE_FLAGS) + 1)
+    base_matrix = ingresos @ flags
+    bases = {"total": base_matrix[:, 0]}
+    for i, name in enumerate(BASE_FLAGS, start=1):
+        bases[name] = base_matrix[:, i]
+
+    afp_idx = np.asarray(inputs.afp_idx, dtype=np.int64)
+    con_afp = afp_idx >= 0
+    mixta = (np.asarray(inputs.comision_mixta, dtype=bool)
+             if inputs.comision_mixta is not None else np.zeros(n, dtype=bool))
+
+    trab_cols: Dict[int, np.ndarray] = {}
+    emp_cols: Dict[int, np.ndarray] = {}
+
+    # ---- AFP: una columna por concepto, tasa según la AFP de cada trabajador ----
+    n_afp = len(inputs.afp_pkids)
+    afp_pos = {pk: i for i, pk in enumerate(inputs.afp_pkids)}
+    por_concepto: Dict[int, dict] = {}
+    for r in inputs.afp_rates:
+        a = afp_pos.get(r["PKIDAfp"])
+        if a is None:
+            continue
+        c = por_concepto.setdefault(int(r["IDConceptoPlanilla"]), {
+            "trab": np.zeros(n_afp), "mixta": np.zeros(n_afp), "tope": np.full(n_afp, np.inf),
+        })
+        c["trab"][a] = float(r["PorcentajeTrabajador"] or 0)
+        c["mixta"][a] = float(r["PorcentajeMixta"] or 0)
+        if r.get("TopeAfp"):
+            c["tope"][a] = float(r["TopeAfp"])
+    safe_idx = np.where(con_afp, afp_idx, 0)
+    for cid, c in por_concepto.items():
+        if n_afp == 0:
+            break
+        tasa = np.where(mixta, c["mixta"][safe_idx], c["trab"][safe_idx])
+        base = np.minimum(bases["afp"], c["tope"][safe_idx])
+        trab_cols[cid] = np.where(con_afp, _round(base * tasa / 100.0, 2), 0.0)
+
+    # ---- DeduccionPeriodo ----
+    renta = [t for t in inputs.renta_tramos if t.get("TasaImpuesto") is not None]
+    renta_lowers = np.array([float(t.get("ImporteBase") or 0) for t in renta])
+    renta_rates = np.array([float(t["TasaImpuesto"]) for t in renta])
+    orden = np.argsort(renta_lowers, kind="stable")
+    renta_lowers, renta_rates = renta_lowers[orden], renta_rates[orden]
+
+    for d in inputs.deducciones:
+        cid = int(d["IDConceptoPlanilla"])
+        if d.get("IndicadorAfpCheck"):
+            base = bases["afp"]
+        else:
+            base = bases["total"]
+        aplica = base > 0
+        if d.get("IndicadorONPCheck"):
+            aplica &= ~con_afp
+
+        trab = np.zeros(n)
+        emp = np.zeros(n)
+        if d.get("IndicadorPorcentajeCheck"):
+            trab = base * float(d.get("PorcentajeTrabajador") or 0) / 100.0
+            emp = base * float(d.get("PorcentajeEmpleador") or 0) / 100.0
+        if d.get("IndicadorCuotaCheck"):
+            trab = trab + float(d.get("AsignaMontoTrabajador") or d.get("ImporteEnlaceTrabajador") or 0)
+            emp = emp + float(d.get("ImporteEnlaceEmpleador") or 0)
+        if d.get("IndicadorRentaCheck"):
+            # Renta mensual: tramos anuales aplicados a la base proyectada a 12 meses
+            anual = np.maximum(base * 12.0 - float(d.get("MontoCreditoDeduccion") or 0), 0.0)
+            trab = trab + evaluate_brackets(anual, renta_lowers, renta_rates) / 12.0
+
+        trab = _clip(trab, d.get("MinimoTrabajador"), d.get("MaximoTrabajador"), aplica)
+        emp = _clip(emp, d.get("MinimoEmpleador"), d.get("MaximoEmpleador"), aplica)
+        redondeo = d.get("MontoRedondeo")
+        trab = np.where(aplica, _round(trab, redondeo), 0.0)
+        emp = np.where(aplica, _round(emp, redondeo), 0.0)
+        trab_cols[cid] = trab_cols.get(cid, 0.0) + trab
+        emp_cols[cid] = emp_cols.get(cid, 0.0) + emp
+
+    # ---- Ensamblar (N x K): ingresos primero, luego descuentos/aportes ----
+    extra_ids = sorted((set(trab_cols) | set(emp_cols)) - set(int(c) for c in inputs.ingreso_ids))
+    concepto_ids = np.array([int(c) for c in inputs.ingreso_ids] + extra_ids, dtype=np.int64)
+    pos = {int(c): i for i, c in enumerate(concepto_ids)}
+    k = len(concepto_ids)
+    trabajador = np.zeros((n, k))
+    empleador = np.zeros((n, k))
+    trabajador[:, :len(inputs.ingreso_ids)] = ingresos
+    for cid, col in trab_cols.items():
+        trabajador[:, pos[cid]] += col
+    for cid, col in emp_cols.items():
+        empleador[:, pos[cid]] += col
+    return PayrollResult(inputs, concepto_ids, trabajador, empleador)
+
+
+# ---------------------------
+# Carga en bloque desde SQL Server
+# ---------------------------
+def _dicts(cur):
+    cols = [c[0] for c in cur.description]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+
+def load_reference(conn, empresa: int, ano: int, mes: int) -> List[dict]:
+    """Salida del SP ya calculada para el periodo (RevisaPlanillaCalculada)."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT *
+            FROM RevisaPlanillaCalculada
+            WHERE IdEmpresa = ? AND Ano = ? AND Mes = ?
+        """, (empresa, ano, mes))
+        return _dicts(cur)
+    finally:
+        cur.close()
+
+
+def load_period_inputs(conn, empresa_pkid: int, ano: int, mes: int,
+                       reference: Optional[List[dict]] = None) -> PeriodInputs:
+    """
+    Carga los insumos del periodo en pocas consultas masivas.
+    Los ingresos (y la AFP de cada trabajador) se toman de RevisaPlanillaCalculada
+    del periodo; para simular se puede modificar la matriz antes de compute().
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT IDEmpresa FROM Empresa WHERE PKID = ?", (empresa_pkid,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Empresa no encontrada")
+        empresa = int(row[0])
+
+        cur.execute("SELECT * FROM ConceptoPlanilla")
+        conceptos_rows = _dicts(cur)
+        conceptos = {int(c["IDConceptoPlanilla"]): c for c in conceptos_rows}
+        pk_to_id = {c["PKID"]: int(c["IDConceptoPlanilla"]) for c in conceptos_rows}
+
+        # Última tasa AFP vigente a (ano, mes) por AFP y concepto
+        afp_rates = afp_rate_index.get_index(conn).rows_as_of(ano, mes)
+        for r in afp_rates:
+            r["IDConceptoPlanilla"] = pk_to_id.get(r["PKIDConceptoPlanilla"])
+        afp_rates = [r for r in afp_rates if r["IDConceptoPlanilla"] is not None]
+
+        cur.execute("""
+            SELECT * FROM DeduccionPeriodo
+            WHERE PKIDEmpresa = ? AND Ano = ? AND Mes = ?
+        """, (empresa_pkid, ano, mes))
+        deducciones = _dicts(cur)
+        for d in deducciones:
+            d["IDConceptoPlanilla"] = pk_to_id.get(d["PKIDConceptoPlanilla"])
+        deducciones = [d for d in deducciones if d["IDConceptoPlanilla"] is not None]
+
+    finally:
+        cur.close()
+
+    vigente = tax_rate_index.get_index(conn).as_of(TIPO_IMPUESTO_RENTA, date(ano, mes, 1))
+    renta_tramos = vigente["tramos"] if vigente else []
+
+    if reference is None:
+        reference = load_reference(conn, empresa, ano, mes)
+    return build_inputs(empresa, ano, mes, reference, conceptos, afp_rates, deducciones, renta_tramos)
+
+
+def build_inputs(empresa, ano, mes, reference, conceptos, afp_rates, deducciones, renta_tramos=()) -> PeriodInputs:
+    """Arma las matrices a partir de filas ya cargadas (útil también para pruebas/benchmarks)."""
+    filas = [r for r in reference if int(r["IDTrabajador"]) != TOTAL_TRABAJADOR_ID]
+    trab_ids = sorted({int(r["IDTrabajador"]) for r in filas})
+    nombres_map = {int(r["IDTrabajador"]): r.get("NombreCompleto") for r in filas}
+    w_pos = {t: i for i, t in enumerate(trab_ids)}
+
+    ingreso_ids = sorted({int(r["IDConceptoPlanilla"]) for r in filas
+                          if INGRESO_MIN <= int(r["IDConceptoPlanilla"]) <= INGRESO_MAX})
+    c_pos = {c: i for i, c in enumerate(ingreso_ids)}
+    ingresos = np.zeros((len(trab_ids), len(ingreso_ids)))
+
+    # AFP de cada trabajador: la AFP cuyos conceptos aparecen en sus filas del SP
+    afp_pkids = sorted({r["PKIDAfp"] for r in afp_rates})
+    concepto_afp = {int(r["IDConceptoPlanilla"]): r["PKIDAfp"] for r in afp_rates}
+    afp_idx = np.full(len(trab_ids), -1, dtype=np.int64)
+    a_pos = {pk: i for i, pk in enumerate(afp_pkids)}
+
+    for r in filas:
+        w = w_pos[int(r["IDTrabajador"])]
+        cid = int(r["IDConceptoPlanilla"])
+        if cid in c_pos:
+            ingresos[w, c_pos[cid]] += float(r.get("Trabajador") or 0)
+        elif cid in concepto_afp and float(r.get("Trabajador") or 0) != 0:
+            afp_idx[w] = a_pos[concepto_afp[cid]]
+
+    return PeriodInputs(
+        empresa=empresa, ano=ano, mes=mes,
+        trabajadores=np.array(trab_ids, dtype=np.int64),
+        nombres=[nombres_map[t] for t in trab_ids],
+        ingreso_ids=np.array(ingreso_ids, dtype=np.int64),
+        ingresos=ingresos,
+        conceptos=conceptos,
+        afp_idx=afp_idx,
+        afp_pkids=afp_pkids,
+        afp_rates=list(afp_rates),
+        deducciones=list(deducciones),
+        renta_tramos=list(renta_tramos),
+    )
+
+
+# ---------------------------
+# Paridad contra el SP
+# ---------------------------
+def parity_check(result: PayrollResult, reference: List[dict], tol: float = 0.01, max_detail: int = 50) -> dict:
+    """
+    Compara Trabajador (y Empleador si el SP lo trae) por (IDTrabajador, IDConceptoPlanilla).
+    Solo se comparan conceptos que el motor calcula.
+    """
+    inp = result.inputs
+    w_pos = {int(t): i for i, t in enumerate(inp.trabajadores)}
+    c_pos = {int(c): i for i, c in enumerate(result.concepto_ids)}
+    visto = np.zeros(result.trabajador.shape, dtype=bool)
+
+    compared = matched = missing_in_engine = 0
+    max_diff = 0.0
+    detail = []
+    for r in reference:
+        if int(r["IDTrabajador"]) == TOTAL_TRABAJADOR_ID:
+            continue
+        w = w_pos.get(int(r["IDTrabajador"]))
+        c = c_pos.get(int(r["IDConceptoPlanilla"]))
+        if c is None:
+            continue
+        if w is None:
+            missing_in_engine += 1
+            continue
+        visto[w, c] = True
+        for col in ("Trabajador", "Empleador"):
+            if col not in r:
+                continue
+            esperado = float(r[col] or 0)
+            obtenido = float(result.matrix(col.lower())[w, c])
+            diff = abs(esperado - obtenido)
+            compared += 1
+            max_diff = max(max_diff, diff)
+            if diff <= tol:
+                matched += 1
+            elif len(detail) < max_detail:
+                detail.append({
+                    "IDTrabajador": int(r["IDTrabajador"]),
+                    "IDConceptoPlanilla": int(r["IDConceptoPlanilla"]),
+                    "columna": col, "sp": esperado, "motor": obtenido,
+                })
+    calculado = (result.trabajador != 0) | (result.empleador != 0)
+    missing_in_sp = int((calculado & ~visto).sum())
+    return {
+        "compared": compared,
+        "matched": matched,
+        "mismatched": compared - matched,
+        "missing_in_engine": missing_in_engine,
+        "missing_in_sp": missing_in_sp,
+        "max_abs_diff": round(max_diff, 6),
+        "ok": compared == matched and missing_in_engine == 0 and missing_in_sp == 0,
+        "mismatches": detail,
+    }
@@ -0,0 +1,202 @@
+# backend/services/payroll_jobs.py
+"""
+Ejecución asíncrona de SP_PAYROLL_VIDEO.
+
+submit() devuelve el job de inmediato y un executor acotado corre el SP.
+Dos envíos con los mismos (CIA, ANO, MES, TPL, PPE) mientras uno sigue
+pendiente o en curso comparten el mismo job.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pyodbc
+
+from services.payroll_service import execute_stored_procedure
+
+MAX_WORKERS = 2          # corridas simultáneas del SP
+MAX_PENDING = 20         # jobs en cola + en curso
+JOB_TTL = 3600           # segundos que se conserva un job terminado
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class PayrollJob:
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.key = dedupe_key(params)
+        self.status = QUEUED
+        self.rows_fetched = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.future = None
+        self._cursor = None
+
+    def to_dict(self) -> dict:
+        def ts(v):
+            return datetime.fromtimestamp(v).isoformat() if v else None
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "rows_fetched": self.rows_fetched,
+            "total_rows": len(self.result) if self.result is not None else None,
+            "error": self.error,
+            "created_at": ts(self.created_at),
+            "started_at": ts(self.started_at),
+            "finished_at": ts(self.finished_at),
+            "elapsed_seconds": elapsed,
+        }
+
+
+def dedupe_key(params: dict) -> tuple:
+    return (
+        params["CIA_CODCIA"], params["ANO_CODANO"], params["MES_CODMES"],
+        params["TPL_CODTPL"], params["PPE_CORPPE"],
+    )
+
+
+class PayrollJobManager:
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING, ttl=JOB_TTL):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payroll-job")
+        self._max_pending = max_pending
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._jobs = {}       # id -> job
+        self._active = {}     # dedupe key -> job pendiente/en curso
+        self._listeners = []
+
+    def add_listener(self, fn):
+        """fn(job) se llama cuando un job termina en DONE."""
+        self._listeners.append(fn)
+
+    def submit(self, params: dict):
+        """Devuelve (job, creado). creado=False si se reutilizó un job en curso."""
+        with self._lock:
+            self._purge()
+            existing = self._active.get(dedupe_key(params))
+            if existing is not None:
+                return existing, False
+            if len(self._active) >= self._max_pending:
+                raise JobQueueFull("Demasiadas corridas de planilla pendientes")
+            job = PayrollJob(params)
+            self._jobs[job.id] = job
+            self._active[job.key] = job
+            job.future = self._executor.submit(self._run, job)
+            return job, True
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+            return job
+        cursor = job._cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except pyodbc.Error:
+                pass
+        return job
+
+    def page(self, job: PayrollJob, page: int, page_size: int):
+        rows = job.result or []
+        start = (page - 1) * page_size
+        return {
+            "job_id": job.id,
+            "page": page,
+            "page_size": page_size,
+            "total": len(rows),
+            "data": rows[start:start + page_size],
+        }
+
+    # ---------- internos ----------
+    def _run(self, job: PayrollJob):
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        def on_cursor(cursor):
+            job._cursor = cursor
+
+        def on_progress(n):
+            job.rows_fetched = n
+            if job.cancel_requested:
+                raise _Cancelled()
+
+        p = job.params
+        try:
+            job.result = execute_stored_procedure(
+                p["CIA_CODCIA"], p["ANO_CODANO"], p["MES_CODMES"],
+                p["TPL_CODTPL"], p["PPE_CORPPE"], p["P_CODAUX"],
+                on_cursor=on_cursor, on_progress=on_progress,
+            )
+        except _Cancelled:
+            self._finish(job, CANCELLED)
+            return
+        except Exception as e:
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+            else:
+                job.error = str(e)
+                self._finish(job, FAILED)
+            return
+        self._finish(job, DONE)
+        for fn in list(self._listeners):
+            try:
+                fn(job)
+            except Exception:
+                pass
+
+    def _finish(self, job: PayrollJob, status: str):
+        with self._lock:
+            if job.status in FINISHED:
+                return
+            job.status = status
+            job.finished_at = time.time()
+            job._cursor = None
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def _purge(self):
+        limit = time.time() - self._ttl
+        expired = [
+            jid for jid, j in self._jobs.items()
+            if j.status in FINISHED and j.finished_at and j.finished_at < limit
+        ]
+        for jid in expired:
+            del self._jobs[jid]
+
+
+class _Cancelled(Exception):
+    pass
+
+
+payroll_jobs = PayrollJobManager()
@@ -1,23 +1,151 @@
-from database import get_connection
-
-def execute_stored_procedure(CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("{CALL dbo.SP_PAYROLL_VIDEO (?, ?, ?, ?, ?, ?)}",
-                   (CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX))
-
-    while True:
-        if cursor.description:
-            columns = [column[0] for column in cursor.description]
-            rows = cursor.fetchall()
-            if rows:
-                results = [dict(zip(columns, row)) for row in rows]
-                break
-        if not cursor.nextset():
-            results = [{"message": "El procedimiento no devolvió resultados."}]
-            break
-
-    cursor.close()
-    conn.close()
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pyodbc
+
+from database import connection
+
+SP_PAYROLL_VIDEO = "{CALL dbo.SP_PAYROLL_VIDEO (?, ?, ?, ?, ?, ?)}"
+FETCH_SIZE = 5000
+
+def execute_stored_procedure(CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX,
+                             on_cursor=None, on_progress=None):
+    """
+    on_cursor(cursor): se llama antes de ejecutar (permite cursor.cancel() desde otro hilo).
+    on_progress(filas_leidas): se llama tras cada bloque leído con fetchmany.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if on_cursor:
+                on_cursor(cursor)
+            cursor.execute(SP_PAYROLL_VIDEO,
+                           (CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX))
+
+            results = None
+            while True:
+                if cursor.description:
+                    columns = [column[0] for column in cursor.description]
+                    rows = []
+                    while True:
+                        chunk = cursor.fetchmany(FETCH_SIZE)
+                        if not chunk:
+                            break
+                        rows.extend(dict(zip(columns, row)) for row in chunk)
+                        if on_progress:
+                            on_progress(len(rows))
+                    if rows:
+                        results = rows
+                        break
+                if not cursor.nextset():
+                    break
+        finally:
+            cursor.close()
+    if results is None:
+        results = [{"message": "El procedimiento no devolvió resultados."}]
     return results
+
+
+# ---------------------------
+# Lectura en streaming (todos los result sets)
+# ---------------------------
+def iter_result_sets(CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX,
+                     chunk_size=FETCH_SIZE):
+    """
+    Recorre TODOS los result sets del SP leyendo con fetchmany.
+    Produce ("columns", idx, [columnas]) al abrir cada set y luego
+    ("rows", idx, [tuplas]) por bloque; nunca materializa el set completo.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SP_PAYROLL_VIDEO,
+                           (CIA_CODCIA, ANO_CODANO, MES_CODMES, TPL_CODTPL, PPE_CORPPE, P_CODAUX))
+            idx = 0
+            while True:
+                if cursor.description:
+                    yield "columns", idx, [column[0] for column in cursor.description]
+                    while True:
+                        chunk = cursor.fetchmany(chunk_size)
+                        if not chunk:
+                            break
+                        yield "rows", idx, [tuple(row) for row in chunk]
+                    idx += 1
+                if not cursor.nextset():
+                    break
+        finally:
+            cursor.close()
+
+def _json_default(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, (datetime, date, time)):
+        return v.isoformat()
+    if isinstance(v, (bytes, bytearray)):
+        return v.hex()
+    raise TypeError(f"Tipo no serializable: {type(v).__name__}")
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+def stream_ndjson(*params, chunk_size=FETCH_SIZE, on_done=None):
+    """
+    Una línea JSON por evento:
+      {"type":"columns","set":0,"columns":[...]}
+      {"type":"row","set":0,"data":{...}}
+      {"type":"end","set":0,"rows":N}
+    y al final {"type":"done","sets":K} (o {"type":"error",...}).
+    on_done(): se llama si el SP terminó sin error, antes de la última línea.
+    """
+    columns, current, count, sets = None, None, 0, 0
+    try:
+        for kind, idx, payload in iter_result_sets(*params, chunk_size=chunk_size):
+            if kind == "columns":
+                if current is not None:
+                    yield _dumps({"type": "end", "set": current, "rows": count}) + "\n"
+                columns, current, count = payload, idx, 0
+                sets += 1
+                yield _dumps({"type": "columns", "set": idx, "columns": columns}) + "\n"
+            else:
+                count += len(payload)
+                yield "".join(
+                    _dumps({"type": "row", "set": idx, "data": dict(zip(columns, row))}) + "\n"
+                    for row in payload
+                )
+        if current is not None:
+            yield _dumps({"type": "end", "set": current, "rows": count}) + "\n"
+        if on_done:
+            on_done()
+        yield _dumps({"type": "done", "sets": sets}) + "\n"
+    except pyodbc.Error as e:
+        yield _dumps({"type": "error", "set": current, "detail": str(e)}) + "\n"
+
+def stream_json(*params, chunk_size=FETCH_SIZE, on_done=None):
+    """
+    JSON único emitido por bloques:
+      {"sets":[{"set":0,"columns":[...],"rows":[[...],...],"count":N}, ...]}
+    on_done(): como en stream_ndjson.
+    """
+    current, count = None, 0
+    yield '{"sets":['
+    try:
+        for kind, idx, payload in iter_result_sets(*params, chunk_size=chunk_size):
+            if kind == "columns":
+                if current is not None:
+                    yield f'],"count":{count}}},'
+                current, count = idx, 0
+                yield f'{{"set":{idx},"columns":{_dumps(payload)},"rows":['
+            else:
+                prefix = "," if count else ""
+                count += len(payload)
+                yield prefix + ",".join(_dumps(list(row)) for row in payload)
+        if current is not None:
+            yield f'],"count":{count}}}'
+        if on_done:
+            on_done()
+        yield "]}"
+    except pyodbc.Error as e:
+        if current is not None:
+            yield f'],"count":{count}}}'
+        yield f'],"error":{_dumps(str(e))}}}'
@@ -0,0 +1,322 @@
+# backend/services/pdf_report.py
+"""
+Render rápido de reportes tabulares en PDF (reportlab).
+
+- Celdas como texto plano: las que no caben en su columna se parten en
+  líneas con simpleSplit (sin Paragraph por celda).
+- La paginación se calcula antes de dibujar (alto de fila = líneas x
+  leading + padding), así que cada página es una Table propia y el costo
+  es lineal en filas, no una sola Table gigante que se parte una y otra vez.
+- Como se sabe de antemano qué filas van en qué página, los documentos
+  grandes se dividen en tramos de páginas que se dibujan en un pool de
+  procesos (cada tramo con su desplazamiento de numeración) y se unen
+  con pypdf. Sin pypdf se dibuja todo en el proceso actual.
+- El resultado queda en un archivo temporal; el llamador lo envía.
+
+Este módulo no importa database para poder cargarse en los procesos hijos.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+try:
+    from pypdf import PdfWriter
+    HAS_PYPDF = True
+except Exception:
+    HAS_PYPDF = False
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 8.5
+LEADING = 10
+PAD_X = 4
+PAD_Y = 3
+FRAME_PAD = 6          # padding por defecto del Frame de SimpleDocTemplate
+SAFETY = 2             # holgura (pt) por página al paginar
+
+PARALLEL_MIN_ROWS = int(os.getenv("PDF_PARALLEL_MIN_ROWS", "20000"))
+MAX_PROCS = int(os.getenv("PDF_MAX_PROCS", str(min(4, os.cpu_count() or 1))))
+
+
+@dataclass
+class ReportLayout:
+    """Textos y marca del reporte (todo picklable para los procesos hijos)."""
+    title: str
+    subtitle: str = ""
+    company: str = ""
+    notes: List[str] = field(default_factory=list)
+    footer_left: str = ""
+    logo_path: Optional[str] = None
+    primary: colors.Color = colors.HexColor("#1F4E79")
+    header_bg: colors.Color = colors.HexColor("#E9F1F8")
+    row_alt_bg: colors.Color = colors.HexColor("#FAFAFA")
+    pagesize: Tuple[float, float] = landscape(A4)
+    left_margin: float = 16 * mm
+    right_margin: float = 16 * mm
+    top_margin: float = 22 * mm
+    bottom_margin: float = 18 * mm
+
+    @property
+    def frame_width(self) -> float:
+        return self.pagesize[0] - self.left_margin - self.right_margin
+
+    @property
+    def frame_height(self) -> float:
+        return self.pagesize[1] - self.top_margin - self.bottom_margin
+
+
+# ---------------------------
+# Preparación de celdas y paginación
+# ---------------------------
+def _fit(value, width: float, font: str) -> Tuple[str, int]:
+    """Texto de la celda (con saltos si hace falta) y su número de líneas."""
+    s = "" if value is None else str(value)
+    # cota superior barata: ningún glifo de Helvetica mide más de 1 em
+    if len(s) * FONT_SIZE <= width and "\n" not in s:
+        return s, 1
+    if stringWidth(s, font, FONT_SIZE) <= width and "\n" not in s:
+        return s, 1
+    lines = simpleSplit(s, font, FONT_SIZE, width) or [""]
+    return "\n".join(lines), len(lines)
+
+
+def prepare_rows(rows, col_widths: Sequence[float], font: str = FONT):
+    """Convierte filas a texto plano; devuelve (celdas, alto de cada fila)."""
+    avail = [w - 2 * PAD_X for w in col_widths]
+    cells, heights = [], []
+    for r in rows:
+        out, n = [], 1
+        for v, w in zip(r, avail):
+            s, k = _fit(v, w, font)
+            out.append(s)
+            if k > n:
+                n = k
+        cells.append(out)
+        heights.append(n * LEADING + 2 * PAD_Y)
+    return cells, heights
+
+
+def _intro(layout: ReportLayout) -> list:
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle("title", parent=styles["Title"], textColor=layout.primary,
+                                 fontSize=18, leading=22)
+    small = ParagraphStyle("small", parent=styles["Normal"], fontName=FONT,
+                           fontSize=FONT_SIZE, leading=LEADING, spaceAfter=0)
+    elements = [Spacer(1, 4 * mm), Paragraph(layout.title, title_style)]
+    elements += [Paragraph(n, small) for n in layout.notes]
+    elements.append(Spacer(1, 4 * mm))
+    return elements
+
+
+def _flow_height(elements, width: float, height: float) -> float:
+    total = 0.0
+    for f in elements:
+        _, h = f.wrap(width, height)
+        total += h + f.getSpaceBefore() + f.getSpaceAfter()
+    return total
+
+
+def paginate(heights: Sequence[float], header_h: float, first_avail: float,
+             avail: float) -> List[Tuple[int, int]]:
+    """Rangos [ini, fin) de filas por página."""
+    pages, ini, usado, cap = [], 0, header_h, first_avail
+    for i, h in enumerate(heights):
+        if usado + h > cap and i > ini:
+            pages.append((ini, i))
+            ini, usado, cap = i, header_h, avail
+        usado += h
+    if ini < len(heights) or not pages:
+        pages.append((ini, len(heights)))
+    return pages
+
+
+# ---------------------------
+# Dibujo
+# ---------------------------
+def _table_style(layout: ReportLayout) -> TableStyle:
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), layout.header_bg),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.6, layout.primary),
+        ("FONTNAME", (0, 0), (-1, -1), FONT),
+        ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+        ("FONTSIZE", (0, 0), (-1, -1), FONT_SIZE),
+        ("LEADING", (0, 0), (-1, -1), LEADING),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#DDDDDD")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, layout.row_alt_bg]),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), PAD_X),
+        ("RIGHTPADDING", (0, 0), (-1, -1), PAD_X),
+        ("TOPPADDING", (0, 0), (-1, -1), PAD_Y),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), PAD_Y),
+    ])
+
+
+def _header_footer(layout: ReportLayout, page_offset: int):
+    def draw(canvas, doc):
+        canvas.saveState()
+        top = doc.height + doc.topMargin
+        canvas.setFillColor(layout.header_bg)
+        canvas.rect(doc.leftMargin, top - 14 * mm, doc.width, 12 * mm, fill=1, stroke=0)
+        if layout.logo_path and os.path.exists(layout.logo_path):
+            try:
+                canvas.drawImage(layout.logo_path, doc.leftMargin + 2 * mm, top - 12 * mm,
+                                 width=22 * mm, height=8 * mm, preserveAspectRatio=True, mask="auto")
+            except Exception:
+                pass
+        canvas.setFillColor(layout.primary)
+        canvas.setFont(FONT_BOLD, 12)
+        canvas.drawString(doc.leftMargin + 26 * mm, top - 6 * mm, layout.company)
+        canvas.setFont(FONT, 9)
+        canvas.setFillColor(colors.black)
+        canvas.drawString(doc.leftMargin + 26 * mm, top - 11 * mm, layout.subtitle)
+
+        canvas.setStrokeColor(colors.HexColor("#DDDDDD"))
+        canvas.line(doc.leftMargin, doc.bottomMargin - 4 * mm, doc.leftMargin + doc.width, doc.bottomMargin - 4 * mm)
+        canvas.setFont(FONT, 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(doc.leftMargin, doc.bottomMargin - 10 * mm, layout.footer_left)
+        canvas.drawRightString(doc.leftMargin + doc.width, doc.bottomMargin - 10 * mm,
+                               f"Página {page_offset + doc.page}")
+        canvas.restoreState()
+    return draw
+
+
+def _render_pages(path: str, layout: ReportLayout, header: List[str], col_widths: List[float],
+                  cells: List[List[str]], pages: List[Tuple[int, int]], page_offset: int,
+                  with_intro: bool) -> str:
+    """Dibuja las páginas dadas (rangos sobre cells) en path. Corre también en procesos hijos."""
+    doc = SimpleDocTemplate(path, pagesize=layout.pagesize,
+                            leftMargin=layout.left_margin, rightMargin=layout.right_margin,
+                            topMargin=layout.top_margin, bottomMargin=layout.bottom_margin)
+    style = _table_style(layout)
+    elements = _intro(layout) if with_intro else []
+    for n, (ini, fin) in enumerate(pages):
+        if n:
+            elements.append(PageBreak())
+        t = Table([header] + cells[ini:fin], colWidths=col_widths)
+        t.setStyle(style)
+        elements.append(t)
+    hf = _header_footer(layout, page_offset)
+    doc.build(elements, onFirstPage=hf, onLaterPages=hf)
+    return path
+
+
+def _render_segment(args) -> str:
+    return _render_pages(*args)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # spawn: el servidor tiene hilos, y fork con hilos activos no es seguro
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _temp_path() -> str:
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    return path
+
+
+def _render_serial(out, layout, header, col_widths, cells, pages):
+    path = _temp_path()
+    try:
+        _render_pages(path, layout, header, col_widths, cells, pages, 0, True)
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+    finally:
+        os.unlink(path)
+    out.seek(0)
+
+
+def render_table_pdf(layout: ReportLayout, header: Sequence[str], rows,
+                     proportions: Optional[Sequence[float]] = None, parallel: Optional[bool] = None):
+    """
+    Dibuja la tabla y devuelve un archivo temporal (binario, posición 0)
+    con el PDF. parallel=None decide por tamaño (PARALLEL_MIN_ROWS).
+    """
+    ncols = len(header)
+    props = list(proportions) if proportions and len(proportions) == ncols else [1.0] * ncols
+    total = sum(props)
+    col_widths = [layout.frame_width * p / total for p in props]
+
+    cells, heights = prepare_rows(rows, col_widths)
+    head_cells, head_h = prepare_rows([header], col_widths, FONT_BOLD)
+    avail = layout.frame_height - 2 * FRAME_PAD - SAFETY
+    intro_h = _flow_height(_intro(layout), layout.frame_width, avail)
+    pages = paginate(heights, head_h[0], avail - intro_h, avail)
+
+    if parallel is None:
+        parallel = len(cells) >= PARALLEL_MIN_ROWS
+    segments = 1
+    if parallel and HAS_PYPDF and MAX_PROCS > 1:
+        segments = min(MAX_PROCS, len(pages))
+
+    out = tempfile.TemporaryFile()
+    if segments <= 1:
+        _render_serial(out, layout, head_cells[0], col_widths, cells, pages)
+        return out
+
+    # tramos contiguos de páginas; cada hijo recibe solo sus filas
+    per = -(-len(pages) // segments)
+    jobs = []
+    for s in range(0, len(pages), per):
+        tramo = pages[s:s + per]
+        base = tramo[0][0]
+        local = [(a - base, b - base) for a, b in tramo]
+        jobs.append((_temp_path(), layout, head_cells[0], col_widths,
+                     cells[base:tramo[-1][1]], local, s, s == 0))
+    try:
+        try:
+            paths = list(_get_pool().map(_render_segment, jobs))
+        except BrokenProcessPool:
+            # un hijo murió: se descarta el pool y se dibuja aquí
+            _reset_pool()
+            _render_serial(out, layout, head_cells[0], col_widths, cells, pages)
+            return out
+        writer = PdfWriter()
+        for p in paths:
+            writer.append(p)
+        writer.write(out)
+    finally:
+        for j in jobs:
+            try:
+                os.unlink(j[0])
+            except OSError:
+                pass
+    out.seek(0)
+    return out
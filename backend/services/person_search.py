@@ -0,0 +1,401 @@
+# backend/services/person_search.py
+"""
+Índice de búsqueda de PersonaNatural por nombres y documento.
+
+Todo se normaliza sin tildes y en minúsculas (fold). El índice base es
+una foto inmutable con las personas ordenadas como el listado
+(ApellidoPaterno, ApellidoMaterno, PrimerNombre, PKID), de modo que la
+posición de una persona ya es su orden de salida:
+
+  tokens     prefijo de cualquier palabra -> rango de tokens ordenados,
+             postings contiguos (CSR)
+  trigramas  subcadena dentro de una palabra (lo que hacía LIKE '%q%')
+  documento  exacto y por prefijo (bisect); no entra en tokens/trigramas
+  apellido   ApellidoPaterno por prefijo: rango contiguo de posiciones
+
+Ranking: documento exacto, documento por prefijo, apellido paterno que
+empieza con la primera palabra, todas las palabras como prefijo, y al
+final subcadena. Cada búsqueda devuelve PKIDs; el router los hidrata.
+
+Altas y cambios no tocan el índice base: la versión anterior se marca
+como borrada y la nueva va a un delta pequeño que se recorre lineal.
+Cuando el delta crece se reconstruye la base en segundo plano.
+"""
+import bisect
+import copy
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database import connection
+
+REBUILD_AT = 5000      # altas/cambios/bajas acumulados antes de reconstruir
+
+_LOAD_SQL = """
+    SELECT PKID, NumeroDocumentoIdentidad, PrimerNombre, SegundoNombre,
+           ApellidoPaterno, ApellidoMaterno
+    FROM dbo.PersonaNatural
+"""
+_WORD = re.compile(r"[a-z0-9]+")
+_NOT_ALNUM = re.compile(r"[^a-z0-9]")
+
+# rangos del ranking
+DOC_EXACTO, DOC_PREFIJO, APELLIDO, PREFIJO, SUBCADENA = range(5)
+
+
+def fold(s) -> str:
+    """Sin tildes ni diacríticos, minúsculas ('Ñuñez' -> 'nunez')."""
+    if not s:
+        return ""
+    s = str(s)
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    return s.lower()
+
+
+def fold_doc(s) -> str:
+    """Documento / código comparable: fold y solo letras y dígitos."""
+    return _NOT_ALNUM.sub("", fold(s))
+
+
+def words(s) -> List[str]:
+    return _WORD.findall(fold(s))
+
+
+class _Person(NamedTuple):
+    pkid: int
+    doc: str
+    ap: str
+    key: Tuple
+    words: Tuple[str, ...]
+    text: str           # nombres, para verificar subcadenas
+
+
+def _person(r) -> _Person:
+    pkid, doc, pn, sn, ap, am = (int(r[0]), fold_doc(r[1]), fold(r[2]), fold(r[3]), fold(r[4]), fold(r[5]))
+    text = " ".join((ap, am, pn, sn))
+    return _Person(pkid, doc, ap, (ap, am, pn, pkid), tuple(dict.fromkeys(_WORD.findall(text))), text)
+
+
+class _Query:
+    def __init__(self, q: str):
+        self.words = list(dict.fromkeys(words(q)))
+        self.doc = fold_doc(q)
+
+    def rank(self, p: _Person) -> Optional[int]:
+        """Rango de una persona (para el delta); None si no coincide."""
+        if self.doc and p.doc == self.doc:
+            return DOC_EXACTO
+        if len(self.doc) >= 3 and p.doc.startswith(self.doc):
+            return DOC_PREFIJO
+        if not self.words:
+            return None
+        if all(any(w.startswith(t) for w in p.words) for t in self.words):
+            return APELLIDO if p.ap.startswith(self.words[0]) else PREFIJO
+        if any(len(t) >= 3 for t in self.words) and all(t in p.text for t in self.words):
+            return SUBCADENA
+        return None
+
+
+def _csr(postings: Dict[str, array]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    keys = sorted(postings)
+    sizes = np.fromiter((len(postings[k]) for k in keys), dtype=np.int64, count=len(keys))
+    off = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=off[1:])
+    flat = np.empty(int(off[-1]), dtype=np.int32)
+    for k, a, b in zip(keys, off[:-1], off[1:]):
+        flat[a:b] = np.frombuffer(postings[k], dtype=np.int32)
+    return keys, off, flat
+
+
+def _union(arrays: List[np.ndarray]) -> np.ndarray:
+    if len(arrays) == 1:
+        return arrays[0]
+    a = np.sort(np.concatenate(arrays))
+    keep = np.empty(len(a), dtype=bool)
+    keep[0] = True
+    np.not_equal(a[1:], a[:-1], out=keep[1:])
+    return a[keep]
+
+
+class _Base:
+    """
+    Foto inmutable de las personas indexadas. Las bajas no tocan alive en el
+    lugar: with_alive() da otra foto que comparte todo salvo la máscara.
+    """
+
+    def __init__(self, persons: Sequence[_Person]):
+        persons = sorted(persons, key=lambda p: p.key)
+        self.persons = persons
+        self.n = len(persons)
+        self.pos = {p.pkid: i for i, p in enumerate(persons)}
+        self.alive = np.ones(self.n, dtype=bool)
+        self.ap = [p.ap for p in persons]
+
+        words: Dict[str, array] = {}
+        for i, p in enumerate(persons):
+            for w in p.words:
+                words.setdefault(w, array("i")).append(i)
+        self.word_keys, self.word_off, self.word_flat = _csr(words)
+
+        # trigramas a partir de las palabras únicas: postings de cada palabra
+        # unidos por trigrama (una persona con dos palabras que comparten
+        # trigrama aparece una sola vez)
+        por_gram: Dict[str, List[np.ndarray]] = {}
+        for k, w in enumerate(self.word_keys):
+            post = self.word_flat[self.word_off[k]:self.word_off[k + 1]]
+            for g in {w[j:j + 3] for j in range(len(w) - 2)}:
+                por_gram.setdefault(g, []).append(post)
+        self.gram_keys = sorted(por_gram)
+        listas = [_union(por_gram[g]) for g in self.gram_keys]
+        self.gram_off = np.zeros(len(listas) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in listas], out=self.gram_off[1:])
+        self.gram_flat = np.concatenate(listas) if listas else np.empty(0, dtype=np.int32)
+        self.gram_pos = {g: k for k, g in enumerate(self.gram_keys)}
+
+        docs = [p.doc for p in persons]
+        orden = sorted((i for i in range(self.n) if docs[i]), key=docs.__getitem__)
+        self.doc_keys = [docs[i] for i in orden]
+        self.doc_idx = np.array(orden, dtype=np.int32)
+
+    def with_alive(self, alive: np.ndarray) -> "_Base":
+        nueva = copy.copy(self)
+        nueva.alive = alive
+        return nueva
+
+    # ---- máscaras / rangos ----
+    def _prefix_range(self, keys: List[str], prefix: str) -> Tuple[int, int]:
+        return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + "\x7f")
+
+    def word_mask(self, prefix: str) -> np.ndarray:
+        lo, hi = self._prefix_range(self.word_keys, prefix)
+        m = np.zeros(self.n, dtype=bool)
+        m[self.word_flat[self.word_off[lo]:self.word_off[hi]]] = True
+        return m
+
+    def gram_mask(self, word: str) -> np.ndarray:
+        m = self.alive.copy()
+        for j in range(len(word) - 2):
+            k = self.gram_pos.get(word[j:j + 3])
+            if k is None:
+                return np.zeros(self.n, dtype=bool)
+            g = np.zeros(self.n, dtype=bool)
+            g[self.gram_flat[self.gram_off[k]:self.gram_off[k + 1]]] = True
+            m &= g
+        return m
+
+    def doc_positions(self, doc: str, exact: bool) -> np.ndarray:
+        if exact:
+            lo, hi = bisect.bisect_left(self.doc_keys, doc), bisect.bisect_right(self.doc_keys, doc)
+        else:
+            lo, hi = self._prefix_range(self.doc_keys, doc)
+        return np.sort(self.doc_idx[lo:hi])
+
+    def search(self, q: _Query, need: int) -> List[Tuple[int, int]]:
+        """[(rango, posición)] de los primeros need resultados, en orden."""
+        out: List[Tuple[int, int]] = []
+        taken = np.zeros(self.n, dtype=bool) if self.n else None
+
+        def take(rango, posiciones):
+            for i in posiciones:
+                if len(out) >= need:
+                    return
+                if self.alive[i] and not taken[i]:
+                    taken[i] = True
+                    out.append((rango, int(i)))
+
+        if self.n == 0 or need <= 0:
+            return out
+        if q.doc:
+            take(DOC_EXACTO, self.doc_positions(q.doc, True))
+            if len(q.doc) >= 3:
+                take(DOC_PREFIJO, self.doc_positions(q.doc, False))
+        if not q.words or len(out) >= need:
+            return out
+
+        todas = self.alive.copy()
+        for t in q.words:
+            todas &= self.word_mask(t)
+        lo, hi = self._prefix_range(self.ap, q.words[0])
+        take(APELLIDO, np.flatnonzero(todas[lo:hi]) + lo)
+        if len(out) < need:
+            take(PREFIJO, np.flatnonzero(todas & ~taken))
+        if len(out) < need:
+            largas = [t for t in q.words if len(t) >= 3]
+            if largas:
+                cand = self.gram_mask(largas[0])
+                for t in largas[1:]:
+                    cand &= self.gram_mask(t)
+                cand &= ~taken
+                # los trigramas dan candidatos; la subcadena se verifica
+                take(SUBCADENA, (i for i in np.flatnonzero(cand)
+                                 if all(t in self.persons[i].text for t in q.words)))
+        return out
+
+
+class PersonSearchIndex:
+    def __init__(self, rebuild_at: int = REBUILD_AT):
+        self._base: Optional[_Base] = None
+        self._extra: Dict[int, _Person] = {}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._log: Optional[List[Tuple[int, Optional[_Person]]]] = None   # cambios durante un build
+        self._rebuild_at = rebuild_at
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.searches = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._base is not None
+
+    # ---------- construcción ----------
+    def load(self):
+        """Carga todas las personas desde la base de datos y reemplaza el índice."""
+        with self._lock:
+            self._log = []
+        try:
+            t0 = time.perf_counter()
+            with connection() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute(_LOAD_SQL)
+                    persons = []
+                    while True:
+                        rows = cur.fetchmany(10000)
+                        if not rows:
+                            break
+                        persons.extend(_person(r) for r in rows)
+                finally:
+                    cur.close()
+            self._install(_Base(persons), time.perf_counter() - t0)
+        except Exception as e:
+            with self._lock:
+                self._log = None
+            self.last_error = str(e)
+            raise
+
+    def start_background_load(self):
+        def run():
+            try:
+                self.load()
+            except Exception:
+                pass    # queda en last_error; las búsquedas usan SQL hasta que cargue
+        threading.Thread(target=run, name="person-search-load", daemon=True).start()
+
+    def _rebuild(self):
+        """Reconstruye la base desde memoria (base viva + delta), sin ir a la BD."""
+        with self._lock:
+            if self._log is not None or self._base is None:
+                return
+            base = self._base
+            persons = [p for i, p in enumerate(base.persons) if base.alive[i]]
+            persons += self._extra.values()
+            self._log = []
+        t0 = time.perf_counter()
+        try:
+            nueva = _Base(persons)
+        except Exception as e:
+            with self._lock:
+                self._log = None
+            self.last_error = str(e)
+            return
+        self._install(nueva, time.perf_counter() - t0)
+
+    def _install(self, base: _Base, seconds: float):
+        with self._lock:
+            self._base, self._extra, self._dirty = base, {}, 0
+            log, self._log = self._log or [], None
+            self._apply(log)
+            self.builds += 1
+            self.build_seconds = round(seconds, 3)
+
+    # ---------- cambios ----------
+    def _apply(self, changes: List[Tuple[int, Optional[_Person]]]):
+        """Con _lock tomado. La máscara se copia una vez por lote y se publica con la base."""
+        base = self._base
+        if base is not None:
+            alive = None
+            for pkid, _ in changes:
+                i = base.pos.get(pkid)
+                if i is not None and (base.alive if alive is None else alive)[i]:
+                    if alive is None:
+                        alive = base.alive.copy()
+                    alive[i] = False
+            if alive is not None:
+                self._base = base.with_alive(alive)
+        for pkid, p in changes:
+            if p is None:
+                self._extra.pop(pkid, None)
+            else:
+                self._extra[pkid] = p
+        self._dirty += len(changes)
+
+    def upsert(self, row: Sequence):
+        """row = (PKID, NumeroDocumentoIdentidad, PrimerNombre, SegundoNombre, ApellidoPaterno, ApellidoMaterno)."""
+        p = _person(row)
+        self._change(p.pkid, p)
+
+    def upsert_many(self, rows: Sequence[Sequence]):
+        """Como upsert() para muchas filas (importación masiva), con un solo bloqueo."""
+        self._change_many([(p.pkid, p) for p in map(_person, rows)])
+
+    def remove(self, pkid: int):
+        self._change(int(pkid), None)
+
+    def _change(self, pkid: int, p: Optional[_Person]):
+        self._change_many([(pkid, p)])
+
+    def _change_many(self, changes: List[Tuple[int, Optional[_Person]]]):
+        with self._lock:
+            if self._log is not None:
+                self._log.extend(changes)
+            self._apply(changes)
+            rebuild = self._dirty >= self._rebuild_at and self._log is None and self._base is not None
+        if rebuild:
+            threading.Thread(target=self._rebuild, name="person-search-rebuild", daemon=True).start()
+
+    # ---------- búsqueda ----------
+    def search(self, q: str, limit: int, offset: int = 0) -> List[int]:
+        """PKIDs ordenados por relevancia (y dentro de cada rango, como el listado)."""
+        query = _Query(q)
+        need = offset + limit
+        # base (con su máscara) y delta del mismo instante
+        with self._lock:
+            base, extra = self._base, list(self._extra.values())
+            if base is not None:
+                self.searches += 1
+        if base is None:
+            raise RuntimeError("Índice de búsqueda no cargado")
+        found = [(r, base.persons[i].key, base.persons[i].pkid) for r, i in base.search(query, need)]
+        for p in extra:
+            r = query.rank(p)
+            if r is not None:
+                found.append((r, p.key, p.pkid))
+        found.sort()
+        return [pkid for _, _, pkid in found[offset:need]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            base, extra, dirty, searches = self._base, len(self._extra), self._dirty, self.searches
+        return {
+            "ready": base is not None,
+            "persons": (int(base.alive.sum()) if base else 0) + extra,
+            "delta": extra,
+            "pending_changes": dirty,
+            "words": len(base.word_keys) if base else 0,
+            "trigrams": len(base.gram_keys) if base else 0,
+            "builds": self.builds,
+            "build_seconds": self.build_seconds,
+            "searches": searches,
+            "last_error": self.last_error,
+        }
+
+
+person_search = PersonSearchIndex()
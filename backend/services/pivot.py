@@ -0,0 +1,54 @@
+# backend/services/pivot.py
+"""
+Pivot columnar con NumPy para las series del dashboard.
+
+pivot() recibe columnas paralelas (label, valor y uno o más ejes enteros,
+p. ej. mes o año) y devuelve la matriz densa label x eje1 x eje2 ... en
+una sola pasada (np.unique + np.bincount), sin diccionarios anidados.
+Los labels salen en orden de primera aparición, igual que el build_series
+original; cada eje sale ordenado.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def pivot(labels: Sequence, values: Sequence[float], *axes: Sequence[int]
+          ) -> Tuple[np.ndarray, List[np.ndarray], np.ndarray]:
+    """
+    -> (labels únicos, [valores únicos de cada eje], matriz (L, A1, A2, ...)).
+    Las celdas repetidas se suman.
+    """
+    labels = np.asarray(labels, dtype=str)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(labels):
+        return labels[:0], [np.empty(0, dtype=np.int64) for _ in axes], np.zeros((0,) * (len(axes) + 1))
+
+    uniq, first, inv = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    flat = rank[inv].astype(np.int64)
+
+    shape = [len(uniq)]
+    axis_values = []
+    for ax in axes:
+        u, ax_inv = np.unique(np.asarray(ax, dtype=np.int64), return_inverse=True)
+        flat = flat * len(u) + ax_inv
+        shape.append(len(u))
+        axis_values.append(u)
+    size = int(np.prod(shape))
+    matrix = np.bincount(flat, weights=values, minlength=size).reshape(shape)
+    return uniq[order], axis_values, matrix
+
+
+def top_n(matrix: np.ndarray, n: int) -> np.ndarray:
+    """
+    Índices (en su orden original) de las n filas con mayor suma, elegidas
+    con argpartition: O(L) en vez de ordenar todos los labels.
+    """
+    rows = matrix.shape[0]
+    if n >= rows:
+        return np.arange(rows)
+    totals = matrix.reshape(rows, -1).sum(axis=1)
+    return np.sort(np.argpartition(-totals, n - 1)[:n])
@@ -0,0 +1,174 @@
+# backend/services/ref_cache.py
+"""
+Caché de datos de referencia para los routers *_combos.
+
+Cada respuesta se guarda ya serializada (bytes JSON) con un ETag fuerte
+(hash del cuerpo), la versión de las tablas de las que depende y un
+vencimiento (el menor TTL de esas tablas). Los routers CRUD llaman
+invalidate("Tabla") después del commit; eso sube la versión de la tabla
+y toda entrada que dependa de ella se recarga en la siguiente consulta.
+
+Las invalidaciones son por proceso: con varios workers, el TTL acota
+cuánto puede tardar otro proceso en ver un cambio.
+
+Uso:
+    @router.get("/situacion")
+    @ref_cached("SituacionRegistro")
+    def combo_situacion(): ...
+"""
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Sequence, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request
+from starlette.responses import Response
+
+from services.serialize import dumps
+
+DEFAULT_TTL = float(os.getenv("REF_CACHE_TTL", "600"))
+STATIC_TTL = float(os.getenv("REF_CACHE_STATIC_TTL", "3600"))
+
+# Catálogos sin CRUD en este backend: solo vencen por TTL.
+# Tablas con CRUD: se invalidan al escribir; el TTL cubre escrituras externas.
+TABLE_TTL: Dict[str, float] = {
+    **{t: STATIC_TTL for t in (
+        "Moneda", "Sexo", "Pais", "Nacionalidad", "TipoPlanilla", "TipoProceso",
+        "TipoEstablecimiento", "TipoDocumentoIdentidad", "TipoCuentaBanco",
+        "TipoComprobante", "SectorEconomico", "RegimenTributario", "Profesion",
+        "NivelInstruccion", "PlameConcepto", "HoraPlanilla", "ModeloContratoLaboral",
+    )},
+    "Trabajador": 60.0,
+}
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    etag: str
+    expires: float
+    tables: Tuple[str, ...]
+    versions: Tuple[int, ...]
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _encode(data) -> bytes:
+    return dumps(data)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class RefCache:
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def _snapshot(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(t, 0) for t in tables)
+
+    @staticmethod
+    def ttl(tables: Sequence[str]) -> float:
+        return min((TABLE_TTL.get(t, DEFAULT_TTL) for t in tables), default=DEFAULT_TTL)
+
+    def get(self, key: str, tables: Sequence[str], loader: Callable) -> _Entry:
+        """Entrada vigente para key; si no hay, ejecuta loader() y la guarda."""
+        now = time.monotonic()
+        with self._lock:
+            e = self._entries.get(key)
+            versions = self._snapshot(tables)
+            if e is not None and e.expires > now and e.versions == versions:
+                self.hits += 1
+                return e
+            self.misses += 1
+        body = _encode(loader())
+        e = _Entry(body, _etag(body), now + self.ttl(tables), tuple(tables), versions)
+        with self._lock:
+            # si hubo una escritura mientras se cargaba, no publicar datos viejos
+            if versions == self._snapshot(tables):
+                self._entries[key] = e
+        return e
+
+    def respond(self, request: Request, key: str, tables: Sequence[str], loader: Callable) -> Response:
+        e = self.get(key, tables, loader)
+        headers = {"ETag": e.etag, "Cache-Control": "private, no-cache"}
+        inm = request.headers.get("if-none-match")
+        if inm and _matches(inm, e.etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(e.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, *tables: str):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+            self.invalidations += 1
+            afectadas = set(tables)
+            self._entries = {
+                k: e for k, e in self._entries.items() if afectadas.isdisjoint(e.tables)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "versions": dict(self._versions),
+            }
+
+
+ref_cache = RefCache()
+
+
+def invalidate(*tables: str):
+    ref_cache.invalidate(*tables)
+
+
+def ref_cached(*tables: str):
+    """
+    Decorador para endpoints de combos: sirve la respuesta desde memoria
+    con ETag/304. La clave es la ruta más los query params, así que los
+    combos filtrados (empresaId, exclude_id) se guardan por separado.
+    """
+    def deco(fn):
+        sig = inspect.signature(fn)
+        req = inspect.Parameter("ref_request", inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                                annotation=Request)
+
+        @functools.wraps(fn)
+        def wrapper(ref_request: Request, *args, **kwargs):
+            key = ref_request.url.path
+            if ref_request.query_params:
+                key += "?" + urlencode(sorted(ref_request.query_params.multi_items()))
+            return ref_cache.respond(ref_request, key, tables, lambda: fn(*args, **kwargs))
+
+        wrapper.__signature__ = sig.replace(parameters=[req, *sig.parameters.values()])
+        return wrapper
+    return deco
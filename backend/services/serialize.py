@@ -0,0 +1,101 @@
+# backend/services/serialize.py
+"""
+Serialización compartida de filas pyodbc.
+
+Reemplaza los rows_to_dicts / row_to_dict de cada módulo. El serializador
+se arma una vez por forma de consulta (cursor.description + columnas a
+omitir) y queda en caché; cada fila es un dict(zip(columnas, fila)) sin
+volver a leer description.
+
+Los listados devuelven la respuesta ya codificada (orjson si está
+instalado) y así FastAPI no recorre cada valor con jsonable_encoder:
+Decimal sale como float y las fechas en ISO, igual que antes.
+
+    cur.execute(sql, params)
+    return rows_response(cur)                  # lista de dicts ya en JSON
+    return json_response({"items": dicts(cur, rows), "total": total})
+"""
+import json
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - sin orjson se usa json estándar
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (date, datetime, time)):
+        return obj.isoformat()
+    # modelos pydantic, sets, bytes...: lo que ya hacía FastAPI
+    return jsonable_encoder(obj)
+
+
+if orjson is not None:
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTS)
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+class RowSerializer:
+    def __init__(self, description, drop: Sequence[str] = ()):
+        keep = [i for i, d in enumerate(description) if d[0] not in drop]
+        self.columns: Tuple[str, ...] = tuple(description[i][0] for i in keep)
+        # solo si hay columnas omitidas hace falta recortar la fila
+        self._pick = itemgetter(*keep) if len(keep) != len(description) else None
+        if self._pick is not None and len(keep) == 1:
+            pick = self._pick
+            self._pick = lambda r: (pick(r),)
+
+    def dict(self, row) -> Dict[str, Any]:
+        return dict(zip(self.columns, self._pick(row) if self._pick else row))
+
+    def dicts(self, rows) -> List[Dict[str, Any]]:
+        cols = self.columns
+        if self._pick is None:
+            return [dict(zip(cols, r)) for r in rows]
+        return [dict(zip(cols, r)) for r in map(self._pick, rows)]
+
+
+_cache: Dict[Tuple, RowSerializer] = {}
+_lock = threading.Lock()
+
+
+def serializer(description, drop: Sequence[str] = ()) -> RowSerializer:
+    key = (tuple((d[0], d[1]) for d in description), tuple(drop))
+    s = _cache.get(key)
+    if s is None:
+        with _lock:
+            s = _cache.setdefault(key, RowSerializer(description, drop))
+    return s
+
+
+def dicts(cur, rows: Optional[Sequence] = None, drop: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """Filas -> dicts con los nombres de columna (rows=None hace fetchall)."""
+    return serializer(cur.description, drop).dicts(cur.fetchall() if rows is None else rows)
+
+
+def row_dict(cur, row, drop: Sequence[str] = ()) -> Dict[str, Any]:
+    return serializer(cur.description, drop).dict(row)
+
+
+def json_response(body, status_code: int = 200) -> Response:
+    return Response(dumps(body), status_code=status_code, media_type="application/json")
+
+
+def rows_response(cur, rows: Optional[Sequence] = None, drop: Sequence[str] = ()) -> Response:
+    return json_response(dicts(cur, rows, drop))
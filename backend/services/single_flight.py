@@ -0,0 +1,81 @@
+# backend/services/single_flight.py
+"""
+Coalescencia de consultas idénticas concurrentes ("single-flight").
+
+El primer llamador de una clave es el líder y ejecuta la carga; los que
+llegan mientras sigue en curso esperan ese mismo resultado (o excepción)
+en lugar de lanzar otra consulta igual.
+
+    flight = SingleFlight()
+    valor, compartido = flight.do(("empresa", 1, 2024), cargar)
+
+Para cargar varias claves en una sola consulta, begin()/finish() permiten
+tomar el liderazgo de un lote y esperar las claves que ya lleva otro.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self._done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+    def wait(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key: Hashable) -> Tuple[_Call, bool]:
+        """-> (llamada, es_líder). El líder debe llamar finish(key, ...) siempre."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def try_begin(self, key: Hashable) -> bool:
+        """Toma el liderazgo solo si nadie carga key (para recargas en segundo plano)."""
+        with self._lock:
+            if key in self._calls:
+                return False
+            self._calls[key] = _Call()
+            self.leaders += 1
+            return True
+
+    def finish(self, key: Hashable, result: Any = None, error: BaseException = None):
+        with self._lock:
+            call = self._calls.pop(key, None)
+        if call is not None:
+            call.result, call.error = result, error
+            call._done.set()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """-> (resultado, compartido). compartido=True si se reutilizó una carga en curso."""
+        call, leader = self.begin(key)
+        if not leader:
+            return call.wait(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
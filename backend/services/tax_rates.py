@@ -0,0 +1,163 @@
+# backend/services/tax_rates.py
+"""
+Índice de vigencias de FechaVigenciaImpuesto por IDTipoImpuesto.
+
+Para cada tipo se guardan las FechaVigencia ordenadas; cada fecha define un
+juego de tramos: las filas con esa misma fecha, donde ImporteBase es el
+límite inferior del tramo (NULL = 0) y TasaImpuesto el porcentaje.
+Una sola fila por fecha equivale a una tasa plana.
+
+as_of()   -> tramos vigentes a una fecha (O(log n))
+resolve() -> tasa marginal e impuesto para arreglos de fechas y bases,
+             en una pasada NumPy.
+
+fecha_vigencia_impuesto.py llama invalidate() en cada escritura.
+"""
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from database import connection
+
+
+def _days(values) -> np.ndarray:
+    """Fechas (date / 'YYYY-MM-DD' / datetime64) -> días desde epoch (int64)."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "O" or arr.dtype.kind == "U":
+        arr = np.array([v if isinstance(v, str) else v.isoformat()[:10] for v in arr.ravel()],
+                       dtype="datetime64[D]").reshape(arr.shape)
+    return arr.astype("datetime64[D]").astype(np.int64)
+
+
+class _TipoIndex:
+    """Vigencias de un IDTipoImpuesto con tramos rellenados a una matriz V x B."""
+
+    def __init__(self, rows: List[dict]):
+        por_fecha: Dict[date, List[tuple]] = {}
+        for r in rows:
+            por_fecha.setdefault(r["FechaVigencia"], []).append(
+                (float(r["ImporteBase"] or 0), float(r["TasaImpuesto"] or 0), r["PKID"])
+            )
+        fechas = sorted(por_fecha)
+        width = max((len(v) for v in por_fecha.values()), default=1)
+        self.fechas = fechas
+        self.fechas_iso = np.array([f.isoformat() for f in fechas], dtype=object)
+        self.dias = _days(fechas) if fechas else np.empty(0, dtype=np.int64)
+        self.lowers = np.full((len(fechas), width), np.inf)
+        self.rates = np.zeros((len(fechas), width))
+        self.tramos: List[List[dict]] = []
+        for i, f in enumerate(fechas):
+            tramos = sorted(por_fecha[f])
+            self.lowers[i, :len(tramos)] = [t[0] for t in tramos]
+            self.rates[i, :len(tramos)] = [t[1] for t in tramos]
+            self.tramos.append([
+                {"PKID": t[2], "ImporteBase": t[0], "TasaImpuesto": t[1]} for t in tramos
+            ])
+
+    def version_at(self, dias: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.dias, dias, side="right") - 1
+
+
+class TaxRateIndex:
+    def __init__(self, rows: Iterable[dict]):
+        por_tipo: Dict[str, List[dict]] = {}
+        for r in rows:
+            if r.get("FechaVigencia") is None or r.get("TasaImpuesto") is None:
+                continue
+            por_tipo.setdefault(str(r["IDTipoImpuesto"]).strip().upper(), []).append(r)
+        self._tipos = {t: _TipoIndex(v) for t, v in por_tipo.items()}
+
+    def tipos(self) -> List[str]:
+        return sorted(self._tipos)
+
+    def as_of(self, tipo: str, fecha) -> Optional[dict]:
+        """Tramos vigentes para tipo a la fecha, o None si no hay vigencia."""
+        idx = self._tipos.get(str(tipo).strip().upper())
+        if idx is None:
+            return None
+        v = int(idx.version_at(_days([fecha]))[0])
+        if v < 0:
+            return None
+        return {"FechaVigencia": idx.fechas[v].isoformat(), "tramos": idx.tramos[v]}
+
+    def resolve(self, tipo: str, fechas, bases=None) -> Dict[str, np.ndarray]:
+        """
+        Lote: para cada (fecha, base) devuelve la FechaVigencia aplicada,
+        la tasa marginal (%) y el impuesto calculado por tramos.
+        Sin vigencia -> found=False, tasa e impuesto NaN.
+        """
+        dias = np.atleast_1d(_days(fechas))
+        n = len(dias)
+        base = np.zeros(n) if bases is None else np.atleast_1d(np.asarray(bases, dtype=np.float64))
+        idx = self._tipos.get(str(tipo).strip().upper())
+        if idx is None or not len(idx.dias):
+            nan = np.full(n, np.nan)
+            return {"found": np.zeros(n, dtype=bool), "fecha_vigencia": np.full(n, None, dtype=object),
+                    "tasa": nan, "impuesto": nan.copy()}
+
+        v = idx.version_at(dias)
+        found = v >= 0
+        vs = np.where(found, v, 0)
+        lowers = idx.lowers[vs]                   # (n, B)
+        rates = idx.rates[vs]                     # (n, B)
+        uppers = np.concatenate([lowers[:, 1:], np.full((n, 1), np.inf)], axis=1)
+        validos = np.isfinite(lowers)             # las columnas de relleno valen inf
+        ancho = np.subtract(uppers, lowers, out=np.zeros_like(lowers), where=validos)
+        gravado = np.clip(base[:, None] - lowers, 0.0, ancho)
+        impuesto = (gravado * rates).sum(axis=1) / 100.0
+        # tasa marginal: último tramo cuyo límite inferior <= base
+        tramo = np.maximum((lowers <= base[:, None]).sum(axis=1) - 1, 0)
+        tasa = rates[np.arange(n), tramo]
+
+        return {
+            "found": found,
+            "fecha_vigencia": np.where(found, idx.fechas_iso[vs], None),
+            "tasa": np.where(found, tasa, np.nan),
+            "impuesto": np.where(found, np.round(impuesto, 2), np.nan),
+        }
+
+
+def load_rows(conn) -> List[dict]:
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT PKID, IDTipoImpuesto, FechaVigencia, TasaImpuesto, ImporteBase
+            FROM FechaVigenciaImpuesto
+        """)
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+_index: Optional[TaxRateIndex] = None
+_version = 0
+_lock = threading.Lock()
+
+
+def get_index(conn=None) -> TaxRateIndex:
+    """conn: conexión que el llamador ya tiene abierta, para no pedir otra al pool."""
+    global _index
+    idx = _index
+    if idx is not None:
+        return idx
+    with _lock:
+        if _index is None:
+            version = _version
+            if conn is not None:
+                built = TaxRateIndex(load_rows(conn))
+            else:
+                with connection() as own:
+                    built = TaxRateIndex(load_rows(own))
+            if version == _version:
+                _index = built
+            return built
+        return _index
+
+
+def invalidate():
+    global _index, _version
+    _version += 1
+    _index = None
@@ -0,0 +1,486 @@
+# backend/services/vacation_engine.py
+"""
+Motor de devengue de vacaciones (NumPy).
+
+Arma el ControlVacacional de cada trabajador de la empresa para uno o
+varios meses (trabajadores x meses en una sola pasada) a partir de:
+
+  - FechaIngreso / FechaCese (último ControlVacacional o ContratoLaboral)
+  - lo consumido por año de servicio en ControlVacacionalPeriodo
+    (gozadas + vendidas + adelantadas + indemnizadas, del último control
+    que tenga ese AnoServicio) y los saldos iniciales
+  - la remuneración del mes (ingresos de RevisaPlanillaCalculada, sin
+    subsidios; si falta un mes se arrastra la última conocida)
+
+Al cierre de cada mes:
+
+  SaldoVacaciones          inicial + ganadas de años completos - consumidas
+  MesesTruncosVacaciones   meses (y días / 30) del año de servicio en curso
+  DiasTruncosVacaciones    dias_por_ano / 12 por mes y / 360 por día
+  SaldoImporteVacaciones   (saldo + truncos) · remuneración / 30
+
+AnoServicio es el año calendario en que empieza cada año de servicio. En
+el último mes se actualizan también los periodos (ControlVacacionalPeriodo)
+con saldo pendiente y el periodo en curso; lo consumido lo sigue cargando
+el usuario y se copia del periodo anterior del mismo AnoServicio.
+
+El modo incremental guarda en dbo.VacacionCorrida una huella por
+trabajador (fechas + periodos + remuneración del mes) y solo recalcula a
+quien cambió o no se calculó para el mes pedido. La corrida guarda un solo
+(Ano, Mes) por trabajador: el incremental es de un mes a la vez.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyodbc
+
+from services.cts_engine import NAT, years_months_days
+from services.payroll_engine import INGRESO_MAX, INGRESO_MIN, TOTAL_TRABAJADOR_ID
+
+DIAS_POR_ANO = 30.0
+
+
+@dataclass
+class VacationInputs:
+    trabajadores: np.ndarray     # (N,) PKID de Trabajador
+    ingreso: np.ndarray          # (N,) datetime64[D]
+    cese: np.ndarray             # (N,) datetime64[D], NaT = vigente
+    meses: List[Tuple[int, int]]  # (M,) (ano, mes) en orden
+    consumo: np.ndarray          # (N, Y) días consumidos por año de servicio (0 = primero)
+    ganadas: np.ndarray          # (N, Y) días ganados por año; NaN = dias_por_ano
+    saldo_inicial: np.ndarray    # (N,)
+    remuneracion: np.ndarray     # (N, M) NaN = sin dato
+    dias_por_ano: float = DIAS_POR_ANO
+
+
+def add_years(d: np.ndarray, k) -> np.ndarray:
+    """d + k años; el 29 de febrero cae en el 28 en años no bisiestos."""
+    m = d.astype("datetime64[M]")
+    dia = (d - m.astype("datetime64[D]")).astype(np.int64)
+    nm = m + 12 * np.asarray(k, dtype=np.int64)
+    largo = ((nm + 1).astype("datetime64[D]") - nm.astype("datetime64[D]")).astype(np.int64)
+    return nm.astype("datetime64[D]") + np.minimum(dia, largo - 1)
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """Arrastra el último valor no NaN a lo largo de cada fila."""
+    idx = np.where(np.isnan(x), 0, np.arange(x.shape[1])[None, :])
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return np.take_along_axis(x, idx, axis=1)
+
+
+class VacationResult:
+    def __init__(self, inputs: VacationInputs, activo, fin, anos, meses, dias, saldo, dias_truncos,
+                 meses_truncos, importe, pendiente_ano, ganadas):
+        self.inputs = inputs
+        self.activo = activo                # (N, M) bool
+        self.fin = fin                      # (N, M) fecha de corte (fin de mes o cese)
+        self.anos = anos                    # (N, M) años de servicio completos
+        self.meses = meses
+        self.dias = dias
+        self.saldo = saldo
+        self.dias_truncos = dias_truncos
+        self.meses_truncos = meses_truncos
+        self.importe = importe              # NaN = sin remuneración
+        self.pendiente_ano = pendiente_ano  # (N, Y) al último mes: ganadas - consumidas por año
+        self.ganadas = ganadas              # (N, Y)
+
+    def rows(self) -> List[dict]:
+        """Filas de ControlVacacional (una por trabajador activo y mes)."""
+        inp = self.inputs
+        wi, mi = np.nonzero(self.activo)
+        ano = np.array([a for a, _ in inp.meses], dtype=np.int64)[mi]
+        mes = np.array([m for _, m in inp.meses], dtype=np.int64)[mi]
+        importe = self.importe[wi, mi]
+        cols = {
+            "PKIDTrabajador": inp.trabajadores[wi].tolist(),
+            "Ano": ano.tolist(),
+            "Mes": mes.tolist(),
+            "FechaIngreso": inp.ingreso[wi].astype(object).tolist(),
+            "SaldoVacaciones": np.round(self.saldo[wi, mi], 2).tolist(),
+            "DiasTruncosVacaciones": self.dias_truncos[wi, mi].tolist(),
+            "MesesTruncosVacaciones": self.meses_truncos[wi, mi].tolist(),
+            "SaldoImporteVacaciones": [None if v != v else v for v in importe.tolist()],
+            "FechaCese": inp.cese[wi].astype(object).tolist(),
+        }
+        names = list(cols)
+        return [dict(zip(names, vals)) for vals in zip(*(cols[k] for k in names))]
+
+    def period_rows(self) -> List[dict]:
+        """
+        Periodos del último mes: años completos con saldo pendiente y el año
+        en curso (IndicadorUltimoPeriodo 'S').
+        """
+        inp = self.inputs
+        ult = self.activo.shape[1] - 1
+        activo = self.activo[:, ult]
+        anos = self.anos[:, ult]
+        y = np.arange(self.pendiente_ano.shape[1])[None, :]
+        completo = y < anos[:, None]
+        en_curso = y == anos[:, None]
+        sel = activo[:, None] & ((completo & (self.pendiente_ano != 0)) | en_curso)
+        wi, yi = np.nonzero(sel)
+        actual = en_curso[wi, yi]
+        inicio = add_years(inp.ingreso[wi], yi)
+        fin = add_years(inp.ingreso[wi], yi + 1) - 1
+        corte = self.fin[wi, ult]
+        hasta = np.where(actual, np.minimum(fin, corte), fin)
+        meses = np.where(actual, self.meses[wi, ult], 0)
+        dias = np.where(actual, self.dias[wi, ult], 0)
+        cols = {
+            "PKIDTrabajador": inp.trabajadores[wi].tolist(),
+            "AnoServicio": (inicio.astype("datetime64[Y]").astype(np.int64) + 1970).tolist(),
+            "FechaInicio": inicio.astype(object).tolist(),
+            "FechaFin": fin.astype(object).tolist(),
+            # el año en curso queda sin ganadas (NULL) para no fijar 0 al completarse
+            "VacacionesGanadas": [None if a else g for a, g in zip(actual.tolist(), self.ganadas[wi, yi].tolist())],
+            "TiempoServicioAno": np.where(actual, 0, 1).tolist(),
+            "TiempoServicioMes": meses.tolist(),
+            "TiempoServicioDia": dias.tolist(),
+            "Dias": ((hasta - inicio).astype(np.int64) + 1).tolist(),
+            "DiasTruncos": np.where(actual, self.dias_truncos[wi, ult], 0.0).tolist(),
+            "MesesTruncos": np.where(actual, self.meses_truncos[wi, ult], 0.0).tolist(),
+            "IndicadorUltimoPeriodo": np.where(actual, "S", "N").tolist(),
+        }
+        names = list(cols)
+        return [dict(zip(names, vals)) for vals in zip(*(cols[k] for k in names))]
+
+
+def compute(inputs: VacationInputs) -> VacationResult:
+    inp = inputs
+    n, k = len(inp.trabajadores), len(inp.meses)
+    mes_ini = np.array([np.datetime64(f"{a:04d}-{m:02d}", "M") for a, m in inp.meses], dtype="datetime64[M]")
+    mes_fin = (mes_ini + 1).astype("datetime64[D]") - 1
+    ingreso = inp.ingreso[:, None]
+    cese = inp.cese[:, None]
+
+    # ---- corte de cada mes y tiempo de servicio (N x M) ----
+    sin_cese = np.isnat(cese)
+    fin = np.where(sin_cese, mes_fin[None, :], np.minimum(cese, mes_fin[None, :]))
+    activo = (ingreso <= fin) & (sin_cese | (cese >= mes_ini.astype("datetime64[D]")[None, :]))
+    fin = np.where(activo, fin, np.broadcast_to(ingreso, (n, k)))
+    anos, meses, dias = years_months_days(np.broadcast_to(ingreso, (n, k)), fin)
+
+    # ---- ganado y consumido acumulado por año de servicio ----
+    ymax = max(int(anos.max()) + 1 if anos.size else 1, inp.consumo.shape[1])
+    ganadas = np.full((n, ymax), inp.dias_por_ano)
+    consumo = np.zeros((n, ymax))
+    if inp.ganadas.size:
+        g = inp.ganadas[:, :ymax]
+        ganadas[:, :g.shape[1]] = np.where(np.isnan(g), inp.dias_por_ano, g)
+    if inp.consumo.size:
+        consumo[:, :inp.consumo.shape[1]] = inp.consumo
+    cum_g = np.concatenate([np.zeros((n, 1)), np.cumsum(ganadas, axis=1)], axis=1)   # (N, Y+1)
+    cum_c = np.concatenate([np.zeros((n, 1)), np.cumsum(consumo, axis=1)], axis=1)
+    ganado = np.take_along_axis(cum_g, np.minimum(anos, ymax), axis=1)
+    consumido = np.take_along_axis(cum_c, np.minimum(anos + 1, ymax), axis=1)   # incluye adelantos del año en curso
+    saldo = inp.saldo_inicial[:, None] + ganado - consumido
+
+    dias_truncos = np.round(meses * inp.dias_por_ano / 12.0 + dias * inp.dias_por_ano / 360.0, 2)
+    meses_truncos = np.round(meses + dias / 30.0, 2)
+    rem = _ffill(inp.remuneracion) if k else inp.remuneracion
+    importe = np.round((saldo + dias_truncos) * rem / 30.0, 2)
+
+    pendiente = ganadas - consumo
+    return VacationResult(inp, activo, fin, anos, meses, dias, saldo, dias_truncos, meses_truncos,
+                          importe, pendiente, ganadas)
+
+
+def fingerprints(inputs: VacationInputs) -> np.ndarray:
+    """Huella (int64) por trabajador de fechas, periodos, saldo inicial y remuneración de los meses."""
+    inp = inputs
+    fechas = np.stack([inp.ingreso.astype(np.int64), np.where(np.isnat(inp.cese), -1, inp.cese.astype(np.int64))],
+                      axis=1).astype(np.float64)
+    # ganadas vacías = dias_por_ano: grabar el valor por defecto no cambia la huella
+    m = np.ascontiguousarray(np.concatenate(
+        [fechas, inp.saldo_inicial[:, None], inp.consumo, np.nan_to_num(inp.ganadas, nan=inp.dias_por_ano),
+         np.nan_to_num(inp.remuneracion, nan=-1.0)], axis=1))
+    return np.array([int.from_bytes(hashlib.blake2b(r.tobytes(), digest_size=8).digest(), "little", signed=True)
+                     for r in m], dtype=np.int64)
+
+
+# ---------------------------
+# Carga en bloque desde SQL Server
+# ---------------------------
+def month_range(desde: Tuple[int, int], hasta: Tuple[int, int]) -> List[Tuple[int, int]]:
+    a = desde[0] * 12 + desde[1] - 1
+    b = hasta[0] * 12 + hasta[1] - 1
+    return [(x // 12, x % 12 + 1) for x in range(a, b + 1)]
+
+
+def _dt(values) -> np.ndarray:
+    return np.array([np.datetime64(v, "D") if v is not None else NAT for v in values], dtype="datetime64[D]")
+
+
+def load_inputs(conn, empresa: int, meses: Sequence[Tuple[int, int]],
+                dias_por_ano: float = DIAS_POR_ANO) -> VacationInputs:
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT IDEmpresa FROM Empresa WHERE PKID = ?", (empresa,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Empresa no encontrada")
+        id_empresa = int(row[0])
+
+        # fechas: el último ControlVacacional manda en el ingreso (tiempo
+        # reconocido); el cese sale de los contratos si los hay
+        cur.execute("""
+            SELECT t.PKID, t.IDTrabajador,
+                   COALESCE(cv.FechaIngreso, k.Ingreso) AS Ingreso,
+                   CASE WHEN k.PKIDTrabajador IS NOT NULL THEN k.Cese ELSE cv.FechaCese END AS Cese
+            FROM Trabajador t
+            LEFT JOIN (
+                SELECT PKIDTrabajador, MIN(FechaInicioContrato) AS Ingreso,
+                       NULLIF(MAX(ISNULL(FechaFinContrato, '9999-12-31')), '9999-12-31') AS Cese
+                FROM ContratoLaboral
+                GROUP BY PKIDTrabajador
+            ) k ON k.PKIDTrabajador = t.PKID
+            OUTER APPLY (
+                SELECT TOP 1 c.FechaIngreso, c.FechaCese
+                FROM ControlVacacional c
+                WHERE c.PKIDTrabajador = t.PKID
+                ORDER BY c.Ano DESC, c.Mes DESC
+            ) cv
+            WHERE t.PKIDEmpresa = ? AND COALESCE(cv.FechaIngreso, k.Ingreso) IS NOT NULL
+            ORDER BY t.PKID
+        """, (empresa,))
+        trab_rows = cur.fetchall()
+        trab = np.array([r[0] for r in trab_rows], dtype=np.int64)
+        pos = {int(r[0]): i for i, r in enumerate(trab_rows)}
+        id_pos = {int(r[1]): i for i, r in enumerate(trab_rows)}
+        ingreso = _dt(r[2] for r in trab_rows)
+        cese = _dt(r[3] for r in trab_rows)
+
+        # periodos: el más reciente de cada (trabajador, AnoServicio)
+        cur.execute("""
+            SELECT x.PKIDTrabajador, x.AnoServicio, x.VacacionesGanadas,
+                   ISNULL(x.VacacionesGozadas, 0) + ISNULL(x.VacacionesVendidas, 0)
+                 + ISNULL(x.VacacionesAdelantadas, 0) + ISNULL(x.VacacionesIndeminzadas, 0) AS Consumo,
+                   CASE WHEN x.IndicadorInicialCheck = 1 THEN ISNULL(x.SaldoInicialVacaciones, 0) ELSE 0 END AS Inicial
+            FROM (
+                SELECT c.PKIDTrabajador, p.*,
+                       ROW_NUMBER() OVER (PARTITION BY c.PKIDTrabajador, p.AnoServicio
+                                          ORDER BY c.Ano DESC, c.Mes DESC, p.PKID DESC) AS rn
+                FROM ControlVacacionalPeriodo p
+                INNER JOIN ControlVacacional c ON c.PKID = p.PKIDControlVacacional
+                INNER JOIN Trabajador t ON t.PKID = c.PKIDTrabajador
+                WHERE t.PKIDEmpresa = ?
+            ) x
+            WHERE x.rn = 1
+        """, (empresa,))
+        periodos = [(pos[int(r[0])], r) for r in cur.fetchall() if int(r[0]) in pos]
+
+        meses = list(meses)
+        anos = sorted({a for a, _ in meses})
+        base = meses[0][0] * 12 + meses[0][1]
+        cur.execute(f"""
+            SELECT r.IDTrabajador, r.Ano, r.Mes, SUM(r.Trabajador)
+            FROM RevisaPlanillaCalculada r
+            LEFT JOIN ConceptoPlanilla cp ON cp.IDConceptoPlanilla = r.IDConceptoPlanilla
+            WHERE r.IdEmpresa = ? AND r.Ano IN ({", ".join("?" * len(anos))})
+              AND r.Ano * 12 + r.Mes BETWEEN ? AND ?
+              AND r.IDConceptoPlanilla BETWEEN ? AND ?
+              AND r.IDTrabajador <> ?
+              AND ISNULL(cp.IndicadorSubsidioCheck, 0) = 0
+            GROUP BY r.IDTrabajador, r.Ano, r.Mes
+        """, [id_empresa, *anos, base, meses[-1][0] * 12 + meses[-1][1],
+              INGRESO_MIN, INGRESO_MAX, TOTAL_TRABAJADOR_ID])
+        planilla = cur.fetchall()
+    finally:
+        cur.close()
+
+    n = len(trab)
+    anio_ing = ingreso.astype("datetime64[Y]").astype(np.int64) + 1970
+    idx = [(w, int(r[1]) - int(anio_ing[w])) for w, r in periodos]
+    ymax = max([y + 1 for _, y in idx if y >= 0] or [0])
+    consumo = np.zeros((n, ymax))
+    ganadas = np.full((n, ymax), np.nan)
+    inicial = np.zeros(n)
+    for (w, y), (_, r) in zip(idx, periodos):
+        inicial[w] += float(r[4] or 0)
+        if y < 0:
+            continue
+        consumo[w, y] += float(r[3] or 0)
+        if r[2] is not None:
+            ganadas[w, y] = float(r[2])
+
+    remuneracion = np.full((n, len(meses)), np.nan)
+    for id_t, a, m, v in planilla:
+        w = id_pos.get(int(id_t))
+        if w is not None:
+            remuneracion[w, int(a) * 12 + int(m) - base] = float(v or 0)
+
+    return VacationInputs(trabajadores=trab, ingreso=ingreso, cese=cese, meses=meses, consumo=consumo,
+                          ganadas=ganadas, saldo_inicial=inicial, remuneracion=remuneracion,
+                          dias_por_ano=dias_por_ano)
+
+
+def subset(inputs: VacationInputs, mask: np.ndarray) -> VacationInputs:
+    return VacationInputs(
+        trabajadores=inputs.trabajadores[mask], ingreso=inputs.ingreso[mask], cese=inputs.cese[mask],
+        meses=inputs.meses, consumo=inputs.consumo[mask], ganadas=inputs.ganadas[mask],
+        saldo_inicial=inputs.saldo_inicial[mask], remuneracion=inputs.remuneracion[mask],
+        dias_por_ano=inputs.dias_por_ano,
+    )
+
+
+# ---------------------------
+# Huellas de la última corrida (modo incremental)
+# ---------------------------
+_RUNS_SQL = """
+IF OBJECT_ID('dbo.VacacionCorrida', 'U') IS NULL
+CREATE TABLE dbo.VacacionCorrida (
+    PKIDTrabajador INT    NOT NULL PRIMARY KEY,
+    Ano            INT    NOT NULL,
+    Mes            INT    NOT NULL,
+    Huella         BIGINT NOT NULL
+)
+"""
+_runs_ready = False
+_runs_lock = threading.Lock()
+
+
+def _ensure_runs(conn, cur):
+    global _runs_ready
+    if _runs_ready:
+        return
+    with _runs_lock:
+        if _runs_ready:
+            return
+        try:
+            cur.execute(_RUNS_SQL)
+            conn.commit()
+        except pyodbc.Error:
+            # otro proceso la creó al mismo tiempo
+            conn.rollback()
+            cur.execute("SELECT OBJECT_ID('dbo.VacacionCorrida', 'U')")
+            if cur.fetchone()[0] is None:
+                raise
+        _runs_ready = True
+
+
+def changed(conn, inputs: VacationInputs, huellas: np.ndarray) -> np.ndarray:
+    """Máscara de trabajadores a recalcular: sin corrida para el último mes o con otra huella."""
+    ano, mes = inputs.meses[-1]
+    cur = conn.cursor()
+    try:
+        _ensure_runs(conn, cur)
+        cur.execute("""
+            SELECT v.PKIDTrabajador, v.Huella
+            FROM dbo.VacacionCorrida v
+            INNER JOIN Trabajador t ON t.PKID = v.PKIDTrabajador
+            WHERE v.Ano = ? AND v.Mes = ?
+        """, (ano, mes))
+        previas: Dict[int, int] = {int(r[0]): int(r[1]) for r in cur.fetchall()}
+    finally:
+        cur.close()
+    previa = np.array([previas.get(t, 0) for t in inputs.trabajadores.tolist()], dtype=np.int64)
+    conocida = np.array([t in previas for t in inputs.trabajadores.tolist()], dtype=bool)
+    return ~conocida | (previa != huellas)
+
+
+# ---------------------------
+# Upsert en bloque
+# ---------------------------
+_CV_COLS = ["PKIDTrabajador", "Ano", "Mes", "FechaIngreso", "SaldoVacaciones", "DiasTruncosVacaciones",
+            "MesesTruncosVacaciones", "SaldoImporteVacaciones", "FechaCese", "PKIDSituacionRegistro"]
+_P_COLS = ["AnoServicio", "FechaInicio", "FechaFin", "VacacionesGanadas", "TiempoServicioAno",
+           "TiempoServicioMes", "TiempoServicioDia", "Dias", "DiasTruncos", "MesesTruncos",
+           "IndicadorUltimoPeriodo", "PKIDSituacionRegistro"]
+# los carga el usuario: en periodos nuevos se copian del último periodo del mismo AnoServicio
+_P_USER_COLS = ["VacacionesGozadas", "VacacionesVendidas", "VacacionesAdelantadas", "VacacionesIndeminzadas",
+                "IndicadorInicialCheck", "SaldoInicialVacaciones", "SaldoAdelantoVacaciones",
+                "DevengadoTrunco", "DiasSubsidiados"]
+
+
+def save(conn, result: VacationResult, situacion: int, huellas: Optional[np.ndarray] = None) -> dict:
+    """Upsert de ControlVacacional por (trabajador, ano, mes) y de los periodos del último mes."""
+    filas = [tuple(r[c] for c in _CV_COLS[:-1]) + (situacion,) for r in result.rows()]
+    periodos = [(p["PKIDTrabajador"],) + tuple(p[c] for c in _P_COLS[:-1]) + (situacion,)
+                for p in result.period_rows()]
+    ano, mes = result.inputs.meses[-1]
+
+    cols = ", ".join(_CV_COLS)
+    pcols = ", ".join(_P_COLS)
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            IF OBJECT_ID('tempdb..#Vac') IS NOT NULL DROP TABLE #Vac;
+            SELECT TOP 0 {cols} INTO #Vac FROM ControlVacacional;
+            IF OBJECT_ID('tempdb..#VacPeriodo') IS NOT NULL DROP TABLE #VacPeriodo;
+            SELECT TOP 0 CAST(0 AS INT) AS PKIDTrabajador, {pcols} INTO #VacPeriodo FROM ControlVacacionalPeriodo;
+        """)
+        cur.fast_executemany = True
+        if filas:
+            cur.executemany(f"INSERT INTO #Vac ({cols}) VALUES ({', '.join('?' * len(_CV_COLS))})", filas)
+        if periodos:
+            cur.executemany(f"INSERT INTO #VacPeriodo (PKIDTrabajador, {pcols}) "
+                            f"VALUES ({', '.join('?' * (len(_P_COLS) + 1))})", periodos)
+        cur.fast_executemany = False
+
+        cur.execute(f"""
+            UPDATE c SET {", ".join(f"{k} = v.{k}" for k in _CV_COLS[3:])}
+            FROM ControlVacacional c
+            INNER JOIN #Vac v ON v.PKIDTrabajador = c.PKIDTrabajador AND v.Ano = c.Ano AND v.Mes = c.Mes
+        """)
+        actualizados = cur.rowcount
+        cur.execute(f"""
+            INSERT INTO ControlVacacional ({cols})
+            SELECT {cols} FROM #Vac v
+            WHERE NOT EXISTS (SELECT 1 FROM ControlVacacional c
+                              WHERE c.PKIDTrabajador = v.PKIDTrabajador AND c.Ano = v.Ano AND c.Mes = v.Mes)
+        """)
+        insertados = cur.rowcount
+
+        # periodos del último mes: se actualiza lo calculado, lo cargado por el usuario no se toca
+        cur.execute(f"""
+            UPDATE p SET {", ".join(f"{k} = x.{k}" for k in _P_COLS[1:])}
+            FROM ControlVacacionalPeriodo p
+            INNER JOIN ControlVacacional c ON c.PKID = p.PKIDControlVacacional AND c.Ano = ? AND c.Mes = ?
+            INNER JOIN #VacPeriodo x ON x.PKIDTrabajador = c.PKIDTrabajador AND x.AnoServicio = p.AnoServicio
+        """, (ano, mes))
+        cur.execute(f"""
+            INSERT INTO ControlVacacionalPeriodo (PKIDControlVacacional, {pcols}, {", ".join(_P_USER_COLS)})
+            SELECT c.PKID, {", ".join("x." + k for k in _P_COLS)}, {", ".join("prev." + k for k in _P_USER_COLS)}
+            FROM #VacPeriodo x
+            INNER JOIN ControlVacacional c ON c.PKIDTrabajador = x.PKIDTrabajador AND c.Ano = ? AND c.Mes = ?
+            OUTER APPLY (
+                SELECT TOP 1 p2.*
+                FROM ControlVacacionalPeriodo p2
+                INNER JOIN ControlVacacional c2 ON c2.PKID = p2.PKIDControlVacacional
+                WHERE c2.PKIDTrabajador = x.PKIDTrabajador AND p2.AnoServicio = x.AnoServicio
+                ORDER BY c2.Ano DESC, c2.Mes DESC, p2.PKID DESC
+            ) prev
+            WHERE NOT EXISTS (SELECT 1 FROM ControlVacacionalPeriodo p
+                              WHERE p.PKIDControlVacacional = c.PKID AND p.AnoServicio = x.AnoServicio)
+        """, (ano, mes))
+
+        if huellas is not None:
+            _ensure_runs(conn, cur)
+            cur.execute("IF OBJECT_ID('tempdb..#VacHuella') IS NOT NULL DROP TABLE #VacHuella;"
+                        "CREATE TABLE #VacHuella (PKIDTrabajador INT PRIMARY KEY, Huella BIGINT NOT NULL);")
+            cur.fast_executemany = True
+            cur.executemany("INSERT INTO #VacHuella (PKIDTrabajador, Huella) VALUES (?, ?)",
+                            list(zip(result.inputs.trabajadores.tolist(), huellas.tolist())))
+            cur.fast_executemany = False
+            cur.execute("""
+                MERGE dbo.VacacionCorrida WITH (HOLDLOCK) AS v
+                USING #VacHuella h ON h.PKIDTrabajador = v.PKIDTrabajador
+                WHEN MATCHED THEN UPDATE SET Ano = ?, Mes = ?, Huella = h.Huella
+                WHEN NOT MATCHED THEN INSERT (PKIDTrabajador, Ano, Mes, Huella) VALUES (h.PKIDTrabajador, ?, ?, h.Huella);
+            """, (ano, mes, ano, mes))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("""
+            IF OBJECT_ID('tempdb..#Vac') IS NOT NULL DROP TABLE #Vac;
+            IF OBJECT_ID('tempdb..#VacPeriodo') IS NOT NULL DROP TABLE #VacPeriodo;
+            IF OBJECT_ID('tempdb..#VacHuella') IS NOT NULL DROP TABLE #VacHuella;
+        """)
+        cur.close()
+    return {"insertados": insertados, "actualizados": actualizados, "periodos": len(periodos)}
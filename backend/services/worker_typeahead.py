@@ -0,0 +1,161 @@
+# backend/services/worker_typeahead.py
+"""
+Autocompletado de trabajadores por empresa.
+
+Por empresa se guarda en memoria la lista de trabajadores ordenada por
+nombre (sin tildes) y un índice de prefijos ordenado con las palabras del
+nombre, el IDTrabajador y el documento de identidad. Una búsqueda es un
+bisect sobre ese índice y devuelve a lo sumo k filas:
+
+  1. IDTrabajador o documento exacto
+  2. nombre que empieza con el texto buscado (rango contiguo del orden)
+  3. todas las palabras buscadas como prefijo de alguna palabra
+
+La carga es perezosa y compartida (single-flight) por empresa; trabajador.py
+invalida la empresa al escribir y MAX_AGE cubre escrituras externas.
+"""
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from database import connection
+from services.person_search import fold_doc, words
+from services.single_flight import SingleFlight
+
+MAX_AGE = float(os.getenv("TYPEAHEAD_MAX_AGE", "300"))
+MAX_EMPRESAS = 50        # empresas en memoria (LRU)
+MAX_K = 50
+
+_LOAD_SQL = """
+    SELECT t.PKID, t.IDTrabajador, t.NombreCompleto, p.NumeroDocumentoIdentidad
+    FROM Trabajador t
+    LEFT JOIN PersonaNatural p ON p.PKID = t.PKIDPersonaNatural
+    WHERE t.PKIDEmpresa = ?
+"""
+
+
+class _EmpresaIndex:
+    def __init__(self, rows):
+        # nombre normalizado: palabras sin tildes separadas por un espacio
+        rows = sorted(((" ".join(words(r[2])),) + tuple(r) for r in rows), key=lambda r: (r[0], r[1]))
+        self.names = [r[0] for r in rows]
+        rows = [r[1:] for r in rows]
+        self.rows = [
+            {"PKID": r[0], "IDTrabajador": r[1], "NombreCompleto": r[2], "NumeroDocumentoIdentidad": r[3]}
+            for r in rows
+        ]
+        self.tokens: List[Tuple[str, ...]] = []
+        self.exact: Dict[str, List[int]] = {}
+        pares = []
+        for pos, r in enumerate(rows):
+            toks = set(self.names[pos].split())
+            for v in (r[1], r[3]):
+                k = fold_doc(v)
+                if k:
+                    toks.add(k)
+                    self.exact.setdefault(k, []).append(pos)
+            self.tokens.append(tuple(toks))
+            pares.extend((t, pos) for t in toks)
+        pares.sort()
+        self.keys = [t for t, _ in pares]
+        self.pos = [p for _, p in pares]
+        self.loaded_at = time.monotonic()
+
+    def search(self, q: str, k: int) -> List[dict]:
+        palabras = words(q)
+        if not palabras:
+            return []
+        out: List[int] = []
+        vistos = set()
+
+        def take(posiciones):
+            for p in posiciones:
+                if len(out) >= k:
+                    return
+                if p not in vistos:
+                    vistos.add(p)
+                    out.append(p)
+
+        take(sorted(self.exact.get(fold_doc(q), ())))
+        frase = " ".join(palabras)
+        lo = bisect.bisect_left(self.names, frase)
+        hi = bisect.bisect_left(self.names, frase + "\x7f")
+        take(range(lo, hi))
+        if len(out) < k:
+            # la palabra más larga es la más selectiva; el resto se verifica
+            w = max(palabras, key=len)
+            lo = bisect.bisect_left(self.keys, w)
+            hi = bisect.bisect_left(self.keys, w + "\x7f")
+            cand = sorted(set(self.pos[lo:hi]))
+            take(p for p in cand
+                 if all(any(t.startswith(x) for t in self.tokens[p]) for x in palabras))
+        return [self.rows[p] for p in out]
+
+
+class WorkerTypeahead:
+    def __init__(self, max_age: float = MAX_AGE, max_empresas: int = MAX_EMPRESAS):
+        self._idx: "OrderedDict[int, _EmpresaIndex]" = OrderedDict()
+        self._gen: Dict[int, int] = {}
+        self._gen_all = 0          # invalidate() sin empresa: también corta cargas de empresas aún no cacheadas
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._max_age = max_age
+        self._max_empresas = max_empresas
+        self.hits = 0
+        self.loads = 0
+
+    def _get(self, empresa: int) -> _EmpresaIndex:
+        with self._lock:
+            idx = self._idx.get(empresa)
+            if idx is not None and time.monotonic() - idx.loaded_at < self._max_age:
+                self._idx.move_to_end(empresa)
+                self.hits += 1
+                return idx
+            gen = (self._gen_all, self._gen.get(empresa, 0))
+        return self._flight.do(empresa, lambda: self._load(empresa, gen))[0]
+
+    def _load(self, empresa: int, gen: Tuple[int, int]) -> _EmpresaIndex:
+        with connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(_LOAD_SQL, (empresa,))
+                idx = _EmpresaIndex([tuple(r) for r in cur.fetchall()])
+            finally:
+                cur.close()
+        with self._lock:
+            self.loads += 1
+            # si hubo una escritura mientras se cargaba, no publicar datos viejos
+            if (self._gen_all, self._gen.get(empresa, 0)) == gen:
+                self._idx[empresa] = idx
+                self._idx.move_to_end(empresa)
+                while len(self._idx) > self._max_empresas:
+                    self._idx.popitem(last=False)
+        return idx
+
+    def search(self, empresa: int, q: str, k: int = 20) -> List[dict]:
+        return self._get(empresa).search(q, max(1, min(k, MAX_K)))
+
+    def invalidate(self, empresa: Optional[int] = None):
+        with self._lock:
+            if empresa is None:
+                self._idx.clear()
+                self._gen_all += 1
+            else:
+                self._idx.pop(empresa, None)
+                self._gen[empresa] = self._gen.get(empresa, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "empresas": len(self._idx),
+                "workers": sum(len(i.rows) for i in self._idx.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+                "coalesced": self._flight.coalesced,
+            }
+
+
+worker_typeahead = WorkerTypeahead()
@@ -0,0 +1,135 @@
+# backend/services/xlsx_export.py
+"""
+Exportación XLSX con memoria constante.
+
+openpyxl en modo write-only escribe las dimensiones de columna y la fila
+congelada al iniciar la hoja (antes de la primera fila), así que el ancho
+no se puede fijar al final. Por eso se hacen dos recorridos secuenciales,
+ninguno sobre objetos celda:
+
+1. las filas se leen con fetchmany, se mide el ancho de cada columna y
+   los bloques se vuelcan (pickle) a un archivo temporal;
+2. se crea el libro write-only con anchos y encabezado con estilo, se
+   repasa el volcado y el .xlsx se guarda en otro archivo temporal, que
+   se envía por bloques.
+"""
+import pickle
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from starlette.responses import StreamingResponse
+
+from database import get_connection
+from services.file_stream import file_response
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CHUNK_SIZE = 2000
+MAX_WIDTH = 40
+
+
+def _len(v) -> int:
+    return 0 if v is None else len(str(v))
+
+
+def iter_cursor_chunks(cursor, row: Optional[Callable] = None,
+                       chunk_size: int = CHUNK_SIZE) -> Iterator[list]:
+    """Bloques de filas (listas) leídos con fetchmany."""
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        yield [row(r) for r in chunk] if row else [tuple(r) for r in chunk]
+
+
+def _spool(chunks: Iterable[list], widths: List[int]):
+    """Vuelca los bloques a disco midiendo el ancho de cada columna."""
+    spool = tempfile.TemporaryFile()
+    for chunk in chunks:
+        for i, col in enumerate(zip(*chunk)):
+            w = max(map(_len, col))
+            if i >= len(widths):
+                widths.append(w)
+            elif w > widths[i]:
+                widths[i] = w
+        pickle.dump(chunk, spool, protocol=pickle.HIGHEST_PROTOCOL)
+    spool.seek(0)
+    return spool
+
+
+def _unspool(spool) -> Iterator[list]:
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def build_xlsx(chunks: Iterable[list], header: Sequence[str], title: str = "Hoja1",
+               header_color: str = "4F46E5", border_color: str = "CCCCCC",
+               freeze: bool = True, max_width: int = MAX_WIDTH):
+    """
+    Construye el .xlsx a partir de bloques de filas y devuelve un archivo
+    temporal posicionado al inicio (el llamador lo cierra).
+    """
+    widths = [_len(h) for h in header]
+    spool = _spool(chunks, widths)
+    try:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title)
+        for i, w in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(w + 2, max_width)
+        if freeze:
+            ws.freeze_panes = "A2"
+
+        font = Font(bold=True, color="FFFFFF")
+        fill = PatternFill("solid", fgColor=header_color)
+        center = Alignment(horizontal="center", vertical="center")
+        thin = Side(style="thin", color=border_color)
+        border = Border(top=thin, left=thin, right=thin, bottom=thin)
+        cells = []
+        for h in header:
+            c = WriteOnlyCell(ws, value=h)
+            c.font, c.fill, c.alignment, c.border = font, fill, center, border
+            cells.append(c)
+        ws.append(cells)
+
+        for chunk in _unspool(spool):
+            for r in chunk:
+                ws.append(r)
+
+        out = tempfile.TemporaryFile()
+        try:
+            wb.save(out)
+        except Exception:
+            out.close()
+            raise
+        out.seek(0)
+        return out
+    finally:
+        spool.close()
+
+
+def xlsx_response(sql: str, params, filename: str, title: str,
+                  header: Optional[Sequence[str]] = None, row: Optional[Callable] = None,
+                  chunk_size: int = CHUNK_SIZE, **estilo) -> StreamingResponse:
+    """
+    Ejecuta sql y devuelve el .xlsx. header: por defecto los nombres de
+    cursor.description. row(r): convierte cada fila pyodbc en lista.
+    estilo: header_color, border_color, freeze, max_width (ver build_xlsx).
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            cols = header if header is not None else [c[0] for c in cur.description]
+            f = build_xlsx(iter_cursor_chunks(cur, row, chunk_size), cols, title, **estilo)
+        finally:
+            cur.close()
+    finally:
+        conn.close()
+    return file_response(f, filename, XLSX_MEDIA_TYPE)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import pyodbc
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
 
 router = APIRouter(prefix="/situacion", tags=["SituacionRegistro"])
 
@@ -32,6 +33,7 @@ def crear_situacion(data: SituacionRegistroModel, user: dict = Depends(get_curre
         cursor.execute("INSERT INTO SituacionRegistro (IDSituacionRegistro, SituacionRegistro) VALUES (?, ?)",
                        data.IDSituacionRegistro, data.SituacionRegistro)
         conn.commit()
+        ref_cache.invalidate("SituacionRegistro")
         return {"message": "Situación registrada exitosamente"}
     except pyodbc.IntegrityError:
         raise HTTPException(status_code=400, detail="El IDSituacionRegistro ya existe")
@@ -49,6 +51,7 @@ def actualizar_situacion(id: int, data: SituacionRegistroModel, user: dict = Dep
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Situación no encontrada")
         conn.commit()
+        ref_cache.invalidate("SituacionRegistro")
         return {"message": "Situación actualizada exitosamente"}
     finally:
         cursor.close()
@@ -63,6 +66,7 @@ def eliminar_situacion(id: int, user: dict = Depends(get_current_user)):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Situación no encontrada")
         conn.commit()
+        ref_cache.invalidate("SituacionRegistro")
         return {"message": "Situación eliminada exitosamente"}
     finally:
         cursor.close()
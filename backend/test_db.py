@@ -1,5 +1,10 @@
 from fastapi import APIRouter
-from database import get_connection
+from database import get_connection, pool_stats
+from services import id_allocator
+from services.count_cache import count_cache
+from services.person_search import person_search
+from services.ref_cache import ref_cache
+from services.worker_typeahead import worker_typeahead
 
 router = APIRouter()
 
@@ -23,3 +28,38 @@ def test_db():
 
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+@router.get("/pool-stats")
+def pool_stats_endpoint():
+    # en uso / libres / espera / p99 del préstamo de conexiones
+    return pool_stats()
+
+
+@router.get("/ref-cache-stats")
+def ref_cache_stats_endpoint():
+    # aciertos / fallos / 304 / invalidaciones de la caché de combos
+    return ref_cache.stats()
+
+
+@router.get("/count-cache-stats")
+def count_cache_stats_endpoint():
+    # totales de listados servidos desde caché / COUNT / metadatos / omitidos
+    return count_cache.stats()
+
+
+@router.get("/person-search-stats")
+def person_search_stats_endpoint():
+    # estado del índice de búsqueda de PersonaNatural
+    return person_search.stats()
+
+
+@router.get("/typeahead-stats")
+def typeahead_stats_endpoint():
+    # empresas cargadas en el autocompletado de trabajadores
+    return worker_typeahead.stats()
+
+
+@router.get("/id-allocator-stats")
+def id_allocator_stats_endpoint():
+    # reservas de bloques e IDs entregados por secuencia
+    return id_allocator.stats()
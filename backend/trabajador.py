@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, File, Query, UploadFile
 from pydantic import BaseModel
+from typing import Optional
 import pyodbc
 from database import get_connection
 from security import get_current_user
+from services import ref_cache
+from services.bulk_import import BATCH_SIZE, check_fk, iter_records, load_keys, parse, run_import
+from services.id_allocator import IdSequence
+from services.worker_typeahead import worker_typeahead
 
 router = APIRouter(prefix="/trabajador", tags=["Trabajador"])
 
+ID_TRABAJADOR = IdSequence("Trabajador", "IDTrabajador", scope="PKIDEmpresa")
+
 class TrabajadorCreate(BaseModel):
     PKIDEmpresa: int
     PKIDSituacionTrabajador: int
@@ -30,14 +37,8 @@ def crear_trabajador(data: TrabajadorCreate, user: dict = Depends(get_current_us
         if not cursor.fetchone():
             raise HTTPException(status_code=400, detail="PersonaNatural no existe")
 
-        # Obtener nuevo IDTrabajador por empresa
-        cursor.execute("""
-            SELECT ISNULL(MAX(IDTrabajador),0) + 1
-            FROM Trabajador
-            WHERE PKIDEmpresa = ?
-        """, data.PKIDEmpresa)
-
-        nuevo_id_trabajador = cursor.fetchone()[0]
+        # Nuevo IDTrabajador por empresa (bloque reservado en memoria)
+        nuevo_id_trabajador = ID_TRABAJADOR.next(data.PKIDEmpresa)
 
         
         cursor.execute("""
@@ -64,6 +65,8 @@ def crear_trabajador(data: TrabajadorCreate, user: dict = Depends(get_current_us
         )
 
         conn.commit()
+        ref_cache.invalidate("Trabajador")
+        worker_typeahead.invalidate(data.PKIDEmpresa)
 
         return {
             "message": "Trabajador registrado correctamente",
@@ -77,3 +80,63 @@ def crear_trabajador(data: TrabajadorCreate, user: dict = Depends(get_current_us
     finally:
         cursor.close()
         conn.close()
+
+
+# ---------- Importación masiva ----------
+_BULK_INSERT_SQL = """
+    INSERT INTO Trabajador (
+        IDTrabajador, PKIDEmpresa, PKIDSituacionTrabajador, PKIDPersonaNatural,
+        NombreCompleto, PKIDTipoTrabajador, PKIDCondicionTrabajador, PKIDSituacionRegistro
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_FK_TABLAS = {
+    "PKIDEmpresa": "Empresa",
+    "PKIDPersonaNatural": "PersonaNatural",
+    "PKIDTipoTrabajador": "TipoTrabajador",
+    "PKIDSituacionTrabajador": "SituacionTrabajador",
+    "PKIDCondicionTrabajador": "CondicionTrabajador",
+    "PKIDSituacionRegistro": "SituacionRegistro",
+}
+
+
+@router.post("/importar")
+def importar_trabajadores(
+    archivo: UploadFile = File(..., description="CSV (, o ;), XLSX o NDJSON con los campos de TrabajadorCreate"),
+    formato: Optional[str] = Query(None, description="csv | xlsx | ndjson (por defecto según la extensión)"),
+    validar: bool = Query(False, description="Solo validar, sin insertar"),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Alta masiva de trabajadores. IDTrabajador sale de ID_TRABAJADOR por
+    empresa, igual que el alta individual, en bloques del tamaño de un lote;
+    si la BD rechaza una fila su número queda libre (hueco en la numeración).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        fks = {campo: load_keys(cursor, f"SELECT PKID FROM {tabla}") for campo, tabla in _FK_TABLAS.items()}
+        empresas = set()
+
+        def validate(raw):
+            data = parse(TrabajadorCreate, raw)
+            for campo, keys in fks.items():
+                check_fk(getattr(data, campo), keys, campo)
+            # al solo validar no se consumen IDs
+            nuevo = None if validar else ID_TRABAJADOR.next(data.PKIDEmpresa, block=BATCH_SIZE)
+            empresas.add(data.PKIDEmpresa)
+            return (nuevo, data.PKIDEmpresa, data.PKIDSituacionTrabajador, data.PKIDPersonaNatural,
+                    data.NombreCompleto, data.PKIDTipoTrabajador, data.PKIDCondicionTrabajador,
+                    data.PKIDSituacionRegistro), None
+
+        report = run_import(conn, iter_records(archivo, formato), validate, _BULK_INSERT_SQL, dry_run=validar)
+        if report.insertados:
+            ref_cache.invalidate("Trabajador")
+            for e in empresas:
+                worker_typeahead.invalidate(e)
+        return report.as_dict()
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        cursor.close()
+        conn.close()
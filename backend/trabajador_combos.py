@@ -0,0 +1,23 @@
+# backend/trabajador_combos.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+import pyodbc
+
+from security import get_current_user
+from services.worker_typeahead import MAX_K, worker_typeahead
+
+router = APIRouter(prefix="/trabajador-combos", tags=["TrabajadorCombos"])
+
+@router.get("/typeahead/", dependencies=[Depends(get_current_user)])
+def typeahead_trabajador(
+    empresaId: int = Query(..., gt=0),
+    q: str = Query(..., min_length=1, max_length=100, description="Nombre, IDTrabajador o documento"),
+    limit: int = Query(20, ge=1, le=MAX_K),
+):
+    """
+    Autocompletado de trabajadores de la empresa (top limit coincidencias).
+    Reemplaza descargar la lista completa de /xxx-combos/trabajador/ en los formularios.
+    """
+    try:
+        return worker_typeahead.search(empresaId, q, limit)
+    except pyodbc.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))